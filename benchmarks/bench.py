@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline benchmark of the clean, build, reason, check and docs pipeline.
+
+The stages are the tasks of the `all` chain in `pixi.toml`.  They are run
+in a temporary copy of the repository exactly as pixi would run them, such
+that the build outputs of the checkout are left alone, except that the
+build uses the vendored copy of the inferred EMMO in `data/` and an
+isolated cache directory, such that no network access is needed.  The
+vendored copy is downloaded on the first run and checked against the
+sha256 digest pinned in `data/emmo-1.0.3-inferred.ttl.sha256`.
+
+Each repetition runs the whole chain.  A warm-up chain (not measured)
+parses EMMO into the cache first.  Each measured chain starts with a fresh
+cache directory containing only the parsed EMMO, and the docs are rendered
+without the figure cache, such that the fragments, the reasoning and the
+figures are built from scratch like in a clean checkout.  The median times
+of each stage and of each phase of the build are written to
+`benchmarks/results.json`, and the stages are compared with
+`benchmarks/baseline.json`.  The script exits with status 1 if a stage is
+slower than its baseline by more than the threshold, or if there is no
+baseline.
+
+    python benchmarks/bench.py                   # run and compare
+    python benchmarks/bench.py --update-baseline # store new baseline
+    python benchmarks/bench.py --vendor          # fetch the EMMO copy again
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+import tomllib
+
+thisdir = os.path.abspath(os.path.dirname(__file__))
+rootdir = os.path.dirname(thisdir)
+sys.path.insert(1, os.path.join(rootdir, "src"))
+
+# pylint: disable=wrong-import-position
+from emmo_cache import EmmoCache, file_digest  # noqa: E402
+
+EMMO_VERSION = "1.0.3"
+EMMO_IRI = f"https://w3id.org/emmo/{EMMO_VERSION}/inferred"
+EMMO_COPY = os.path.join(rootdir, "data", f"emmo-{EMMO_VERSION}-inferred.ttl")
+
+# Files not copied into the temporary tree the chain runs in
+IGNORE = (".git", ".pixi", ".cache", "__pycache__", ".pytest_cache", "*.sqlite3")
+
+BASELINE = os.path.join(thisdir, "baseline.json")
+RESULTS = os.path.join(thisdir, "results.json")
+
+# Default relative slow-down that counts as a regression
+THRESHOLD = 0.25
+
+
+def get_stages(tree=rootdir):
+    """Returns the stages of the `all` task in the `pixi.toml` of
+    repository `tree` as a list of ``(name, command, cwd)`` tuples."""
+    with open(os.path.join(tree, "pixi.toml"), "rb") as handle:
+        tasks = tomllib.load(handle)["tasks"]
+    stages = []
+    for name in tasks["all"]["depends-on"]:
+        task = tasks[name]
+        if isinstance(task, str):
+            task = {"cmd": task}
+        stages.append((name, task["cmd"], os.path.join(tree, task.get("cwd", ""))))
+    return stages
+
+
+def copy_tree(tree):
+    """Copies the repository to directory `tree`, without version control,
+    caches, quadstores and the vendored EMMO."""
+    shutil.copytree(
+        rootdir,
+        tree,
+        ignore=shutil.ignore_patterns(*IGNORE, os.path.basename(EMMO_COPY)),
+    )
+
+
+def offline(name, cmd, emmo_source):
+    """Returns `cmd` of stage `name` modified to run without network and
+    without the figure cache of the docs."""
+    if name == "build":
+        return f"{cmd} --offline --emmo-source {emmo_source}"
+    if name == "docs":
+        return f"{cmd} --no-figure-cache"
+    return cmd
+
+
+def fresh_cache(warm, cachedir):
+    """Creates cache directory `cachedir` containing only the parsed EMMO
+    of cache directory `warm`."""
+    shutil.copytree(os.path.join(warm, "stores"), os.path.join(cachedir, "stores"))
+    shutil.copyfile(
+        os.path.join(warm, "index.json"), os.path.join(cachedir, "index.json")
+    )
+
+
+def run_chain(stages, env, emmo_source, profile=None):
+    """Runs all `stages` once and returns a dict mapping stage names to
+    their wall time in seconds.
+
+    Raises subprocess.CalledProcessError if a stage fails."""
+    times = {}
+    for name, cmd, cwd in stages:
+        cmd = offline(name, cmd, emmo_source)
+        if name == "build" and profile:
+            cmd = f"{cmd} --profile {profile}"
+        start = time.perf_counter()
+        subprocess.run(  # nosec
+            cmd,
+            shell=True,
+            cwd=cwd,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        times[name] = time.perf_counter() - start
+    return times
+
+
+def compare(results, baseline):
+    """Compares `results` with `baseline`.
+
+    Returns a list of ``(stage, median, baseline median, limit)`` tuples
+    for all stages that regressed."""
+    regressions = []
+    default = baseline.get("threshold", THRESHOLD)
+    for name, base in baseline.get("stages", {}).items():
+        if name not in results["stages"]:
+            continue
+        threshold = base.get("threshold", default)
+        limit = base["median"] * (1 + threshold)
+        median = results["stages"][name]["median"]
+        if median > limit:
+            regressions.append((name, median, base["median"], limit))
+    return regressions
+
+
+def pinned_digest(filename=EMMO_COPY):
+    """Returns the sha256 digest pinned for the vendored EMMO `filename` in
+    ``<filename>.sha256``, or None if none is pinned."""
+    if not os.path.exists(f"{filename}.sha256"):
+        return None
+    with open(f"{filename}.sha256", "rt", encoding="utf8") as handle:
+        return handle.read().split()[0]
+
+
+def vendor(filename=EMMO_COPY):
+    """Downloads the inferred EMMO to `filename`.  The download must match
+    the pinned digest; if none is pinned yet, its digest is pinned.
+
+    Raises OSError if the download fails or does not match."""
+    pinned = pinned_digest(filename)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = EmmoCache(tmpdir).fetch(EMMO_IRI)
+        digest = file_digest(source)
+        if pinned and digest != pinned:
+            raise OSError(f"download has sha256 {digest}, pinned is {pinned}")
+        shutil.copyfile(source, filename)
+    print(f"Stored {EMMO_IRI} as {filename} (sha256 {digest})")
+    if not pinned:
+        with open(f"{filename}.sha256", "wt", encoding="utf8") as handle:
+            handle.write(f"{digest}  {os.path.basename(filename)}\n")
+        print(f"Pinned the digest in {filename}.sha256, commit it")
+
+
+def ensure_vendored(parser, filename=EMMO_COPY):
+    """Downloads the inferred EMMO to `filename` if it does not exist and
+    checks it against the pinned digest.  Exits through `parser` if that
+    fails."""
+    if not os.path.exists(filename):
+        print(f"No vendored EMMO {filename!r}, downloading it once", file=sys.stderr)
+        try:
+            vendor(filename)
+        except OSError as exc:
+            parser.error(f"cannot download {EMMO_IRI} to {filename!r}: {exc}")
+        return
+    pinned = pinned_digest(filename)
+    if pinned and file_digest(filename) != pinned:
+        parser.error(
+            f"{filename!r} does not match the pinned sha256 {pinned}.  "
+            "Fetch it again with --vendor."
+        )
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=3,
+        help="Number of measured runs of the chain. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        metavar="STAGE",
+        help="Only run these stages of the chain. Default: all",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        help=(
+            "Relative slow-down of a stage that counts as a regression. "
+            f"Default: from the baseline file or {THRESHOLD}"
+        ),
+    )
+    parser.add_argument(
+        "--emmo-source",
+        metavar="FILE",
+        default=EMMO_COPY,
+        help="Vendored copy of the inferred EMMO. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        default=BASELINE,
+        help="Baseline file. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        default=RESULTS,
+        help="Results file. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results as new baseline instead of comparing.",
+    )
+    parser.add_argument(
+        "--vendor",
+        action="store_true",
+        help=f"Download {EMMO_IRI} to --emmo-source again and exit.",
+    )
+    args = parser.parse_args(args=argv)
+
+    if args.vendor:
+        vendor(args.emmo_source)
+        return 0
+    ensure_vendored(parser, args.emmo_source)
+
+    emmo_source = os.path.abspath(args.emmo_source)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tree = os.path.join(tmpdir, "tree")
+        copy_tree(tree)
+        stages = get_stages(tree)
+        if args.stages:
+            unknown = set(args.stages) - {name for name, _, _ in stages}
+            if unknown:
+                parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+            stages = [stage for stage in stages if stage[0] in args.stages]
+        warm = os.path.join(tmpdir, "cache")
+        try:
+            run_chain(  # warm-up
+                stages, dict(os.environ, MAGMO_CACHE_DIR=warm), emmo_source
+            )
+            runs, phases = [], {}
+            for i in range(args.repeat):
+                cachedir = os.path.join(tmpdir, f"cache-{i}")
+                profile = os.path.join(tmpdir, f"build-profile-{i}.json")
+                fresh_cache(warm, cachedir)
+                env = dict(os.environ, MAGMO_CACHE_DIR=cachedir)
+                runs.append(run_chain(stages, env, emmo_source, profile))
+                shutil.rmtree(cachedir)
+                if os.path.exists(profile):
+                    with open(profile, "rt", encoding="utf8") as handle:
+                        for phase in json.load(handle)["phases"]:
+                            phases.setdefault(phase["name"], []).append(phase["wall"])
+        except subprocess.CalledProcessError as exc:
+            sys.stderr.write(exc.stderr.decode(errors="replace"))
+            print(f"Stage failed: {exc.cmd}", file=sys.stderr)
+            return 2
+
+    results = {
+        "created": time.time(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "emmo_sha256": file_digest(args.emmo_source),
+        "repeat": args.repeat,
+        "stages": {
+            name: {
+                "times": [run[name] for run in runs],
+                "median": statistics.median(run[name] for run in runs),
+            }
+            for name, _, _ in stages
+        },
+        "build_phases": {
+            name: statistics.median(times) for name, times in phases.items()
+        },
+    }
+    with open(args.output, "wt", encoding="utf8") as handle:
+        json.dump(results, handle, indent=2)
+        handle.write("\n")
+
+    for name, result in results["stages"].items():
+        print(f"{name:<10} {result['median']:>8.3f} s")
+
+    if args.update_baseline:
+        baseline = {
+            "threshold": args.threshold or THRESHOLD,
+            "platform": results["platform"],
+            "stages": {
+                name: {"median": result["median"]}
+                for name, result in results["stages"].items()
+            },
+        }
+        with open(args.baseline, "wt", encoding="utf8") as handle:
+            json.dump(baseline, handle, indent=2)
+            handle.write("\n")
+        print(f"Stored baseline in {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(
+            f"No baseline {args.baseline!r}, nothing to compare with.  Store "
+            "one with --update-baseline on this machine.",
+            file=sys.stderr,
+        )
+        return 1
+    with open(args.baseline, "rt", encoding="utf8") as handle:
+        baseline = json.load(handle)
+    if args.threshold is not None:
+        baseline["threshold"] = args.threshold
+        for base in baseline.get("stages", {}).values():
+            base.pop("threshold", None)
+    regressions = compare(results, baseline)
+    for name, median, base, limit in regressions:
+        print(
+            f"Regression in {name}: {median:.3f} s > {limit:.3f} s "
+            f"(baseline {base:.3f} s)",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of class creation: domain modules versus class table.
+
+Compares the two ways of adding the MagMO classes to a world with EMMO:
+
+  - modules: executing the domain modules in `src/modules/`, i.e. creating
+    each class through the Owlready2 metaclass machinery,
+  - table: bulk loading `src/classes.yaml` with `class_table.load()`.
+
+To see how both scale with the size of the ontology, the classes are added
+`scale` times, each time into a new ontology with its own namespace.  The
+median time of each path and scale is printed and, with `--output`, written
+to a JSON file.
+
+    python benchmarks/bench_classes.py --scale 1 2 4 8
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+thisdir = os.path.abspath(os.path.dirname(__file__))
+rootdir = os.path.dirname(thisdir)
+sys.path.insert(1, os.path.join(rootdir, "src"))
+
+# pylint: disable=wrong-import-position
+import class_table  # noqa: E402
+import fragments  # noqa: E402
+from emmo_cache import EmmoCache  # noqa: E402
+from snapshot import ONTOLOGY_IRI  # noqa: E402
+
+from bench import EMMO_COPY, EMMO_IRI, EMMO_VERSION, ensure_vendored  # noqa: E402
+
+
+def namespaces(scale):
+    """Returns the base IRIs of the `scale` copies of MagMO."""
+    return [ONTOLOGY_IRI] + [
+        f"{ONTOLOGY_IRI[:-1]}-{i}#" for i in range(1, scale)
+    ]
+
+
+def add_modules(world, emmo, base_iri, _):
+    """Adds the classes by executing the domain modules."""
+    onto = world.get_ontology(base_iri)
+    onto.imported_ontologies.append(emmo)
+    env = fragments.environment(onto, emmo)
+    for name in fragments.MODULES:
+        fragments.execute(name, env, onto)
+
+
+def add_table(world, emmo, base_iri, table):
+    """Adds the classes by bulk loading the class table."""
+    onto = world.get_ontology(base_iri)
+    onto.imported_ontologies.append(emmo)
+    class_table.load(onto, table)
+
+
+PATHS = {"modules": add_modules, "table": add_table}
+
+
+def measure(cache, entry, path, scale, table):
+    """Returns the time to add the classes `scale` times along `path` to
+    a new world with EMMO."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        world, emmo = cache.attach(entry, os.path.join(tmpdir, "world.sqlite3"))
+        start = time.perf_counter()
+        for base_iri in namespaces(scale):
+            PATHS[path](world, emmo, base_iri, table)
+        seconds = time.perf_counter() - start
+        world.close()
+    return seconds
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scale",
+        nargs="+",
+        type=int,
+        default=[1, 2, 4, 8],
+        help="Number of copies of the classes. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=3,
+        help="Number of measurements per path and scale. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--table",
+        metavar="FILE",
+        default=class_table.TABLE,
+        help="Class table. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--emmo-source",
+        metavar="FILE",
+        default=EMMO_COPY,
+        help="Vendored copy of the inferred EMMO. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        help="Write the results as JSON to FILE.",
+    )
+    args = parser.parse_args(args=argv)
+
+    ensure_vendored(parser, args.emmo_source)
+    table = class_table.read(args.table)
+    classes = sum(1 for entry in table["entries"] if "name" in entry)
+
+    results = {
+        "created": time.time(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "classes": classes,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    print(
+        f"{'scale':>5} {'classes':>8} {'modules/s':>10} {'table/s':>10} "
+        f"{'ratio':>7}"
+    )
+    with tempfile.TemporaryDirectory() as cachedir:
+        cache = EmmoCache(cachedir)
+        entry = cache.store(EMMO_IRI, EMMO_VERSION, args.emmo_source)
+        for scale in args.scale:
+            medians = {
+                path: statistics.median(
+                    measure(cache, entry, path, scale, table)
+                    for _ in range(args.repeat)
+                )
+                for path in PATHS
+            }
+            results["scales"][scale] = medians
+            print(
+                f"{scale:>5} {scale * classes:>8} {medians['modules']:>10.3f} "
+                f"{medians['table']:>10.3f} "
+                f"{medians['modules'] / medians['table']:>6.1f}x"
+            )
+
+    if args.output:
+        with open(args.output, "wt", encoding="utf8") as handle:
+            json.dump(results, handle, indent=2)
+            handle.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
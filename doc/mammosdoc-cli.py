@@ -16,6 +16,9 @@ rootdir = os.path.abspath(
 )
 if rootdir not in sys.path:
     sys.path.insert(1, rootdir)
+srcdir = os.path.join(rootdir, "src")
+if srcdir not in sys.path:
+    sys.path.insert(1, srcdir)
 
 from ontopy import World, onto_path  # pylint: disable=import-error
 from mammosdoc import (  # pylint: disable=import-error
@@ -25,6 +28,7 @@ from mammosdoc import (  # pylint: disable=import-error
     get_maxwidth,
     get_docpp,
 )
+from snapshot import open_snapshot, SnapshotError  # pylint: disable=import-error
 from ontopy.ontodoc_rst import OntologyDocumentation
 from ontopy.utils import get_format
 
@@ -166,6 +170,24 @@ def main(argv: list = None):
         "-w",
         help="Maximum figure width.  The default is inferred from --format.",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help=(
+            "Number of worker processes rendering the generated figures. "
+            "The default is the number of CPUs."
+        ),
+    )
+    parser.add_argument(
+        "--no-figure-cache",
+        action="store_false",
+        dest="figcache",
+        help=(
+            "Render all generated figures, instead of reusing unchanged "
+            "figures from the cache in FIGDIR/.cache."
+        ),
+    )
     parser.add_argument(
         "--pandoc-option",
         "-p",
@@ -223,21 +245,29 @@ def main(argv: list = None):
 
     # Load ontology
     iri = args.iri if args.iri[-1] in "#/" else f"{args.iri}#"
-    world = World(filename=args.database)
-    if args.database != ":memory:" and iri not in world.ontologies:
-        parser.error(
-            "The IRI argument should be one of the ontologies in the database:"
-            "\n  " + "\n  ".join(world.ontologies.keys())
-        )
-    onto = world.get_ontology(args.iri)
-    try:
-        onto.load(
-            only_local=args.local,
-            url_from_catalog=args.url_from_catalog,
-            catalog_file=args.catalog_file,
-        )
-    except owlready2.OwlReadyOntologyParsingError as exc:
-        parser.error(f"error parsing {args.iri!r}: {exc}")
+    if args.database != ":memory:":
+        # Use the quadstore snapshot as is, without parsing anything
+        try:
+            world = open_snapshot(args.database)
+        except SnapshotError as exc:
+            parser.error(str(exc))
+        if iri not in world.ontologies:
+            parser.error(
+                "The IRI argument should be one of the ontologies in the "
+                "database:\n  " + "\n  ".join(world.ontologies.keys())
+            )
+        onto = world.ontologies[iri]
+    else:
+        world = World(filename=args.database)
+        onto = world.get_ontology(args.iri)
+        try:
+            onto.load(
+                only_local=args.local,
+                url_from_catalog=args.url_from_catalog,
+                catalog_file=args.catalog_file,
+            )
+        except owlready2.OwlReadyOntologyParsingError as exc:
+            parser.error(f"error parsing {args.iri!r}: {exc}")
 
     # Sync reasoner
     if args.reasoner:
@@ -277,6 +307,8 @@ def main(argv: list = None):
             figformat=figformat,
             maxwidth=maxwidth,
             imported=args.imported,
+            jobs=args.jobs,
+            figcache=args.figcache,
         )
         docpp.process()
 
@@ -6,6 +6,10 @@ derived from ontodoc.py
 """
 
 # pylint: disable=fixme,too-many-lines,no-member
+import collections
+import functools
+import hashlib
+import json
 import os
 import re
 import time
@@ -13,6 +17,7 @@ import warnings
 import shlex
 import shutil
 import subprocess  # nosec
+from concurrent.futures import ProcessPoolExecutor
 from textwrap import dedent
 from tempfile import NamedTemporaryFile, TemporaryDirectory
 from typing import TYPE_CHECKING
@@ -22,12 +27,200 @@ import owlready2
 
 from ontopy.utils import asstring, camelsplit, get_label, get_format
 from ontopy.graph import OntoGraph, filter_classes
+from ontopy.patch import get_preferred_label
 
 if TYPE_CHECKING:
     from pathlib import Path
     from typing import Iterable, Union
 
 
+class DocIndex:
+    """Index of an ontology for its documentation.
+
+    Documenting an entity through Owlready2 scans the quadstore: the
+    instances of a class are found by a recursive query over all
+    individuals, and the annotations by a query per annotation property.
+    The index is built once, with a few passes over the world, and holds
+
+      - the label of every entity and the entity of every label that
+        is used by only one entity,
+      - the direct instances of every class,
+      - the annotation properties with a value for every class,
+      - the children of every class, sorted by label,
+      - the entities documented by %ALL, sorted by label.
+
+    Parameters
+    ----------
+    onto : Ontology instance
+        The ontology that is documented.
+    """
+
+    def __init__(self, onto):
+        world = onto.world
+        graph = world.graph
+        self.onto = onto
+
+        self.labels = {}
+        self.by_label = {}
+        duplicates = set()
+        for entity in (
+            *world.classes(),
+            *world.properties(),
+            *world.individuals(),
+        ):
+            label = self.labels[entity] = get_label(entity)
+            if self.by_label.setdefault(label, entity) is not entity:
+                duplicates.add(label)
+        for label in duplicates:
+            del self.by_label[label]
+
+        self.parents = {}
+        self.children = collections.defaultdict(list)
+        for cls in world.classes():
+            parents = self.parents[cls] = {
+                parent
+                for parent in cls.is_a
+                if isinstance(parent, owlready2.ThingClass)
+            }
+            for parent in parents:
+                self.children[parent].append(cls)
+        for children in self.children.values():
+            children.sort(key=self.label)
+
+        self.instances = collections.defaultdict(list)
+        for instance in world.individuals():
+            if isinstance(instance.is_instance_of, property):
+                warnings.warn(
+                    f'Ignoring instance "{instance}" which is both an '
+                    "individual and a class. OntoDoc does not support "
+                    "punning at the present moment."
+                )
+                continue
+            for cls in instance.is_instance_of:
+                if isinstance(cls, owlready2.ThingClass):
+                    self.instances[cls].append(instance)
+
+        # Annotation properties with a value, by subject
+        storids = [prop.storid for prop in world.annotation_properties()]
+        self.annotated = collections.defaultdict(set)
+        if storids:
+            marks = ",".join("?" * len(storids))
+            for s, p in graph.execute(
+                f"SELECT s, p FROM datas WHERE p IN ({marks}) "
+                f"UNION SELECT s, p FROM objs WHERE p IN ({marks})",
+                storids * 2,
+            ):
+                self.annotated[s].add(p)
+
+        self._annotations = {}
+        self._annotation_properties = {}
+        self._ancestors = {}
+        self._entities = {}
+
+    def label(self, entity):
+        """Returns the label of `entity`."""
+        if entity not in self.labels:
+            self.labels[entity] = get_label(entity)
+        return self.labels[entity]
+
+    def sort(self, entities):
+        """Returns a list with `entities` sorted by label."""
+        return sorted(entities, key=self.label)
+
+    def get_by_label(self, label):
+        """Returns the entity with `label`.  Labels with a prefix, labels
+        of several entities and labels that are not a label of any entity
+        are looked up with `Ontology.get_by_label()`."""
+        if ":" not in label and label in self.by_label:
+            return self.by_label[label]
+        return self.onto.get_by_label(label)
+
+    def entities(self, kind, imported=False):
+        """Returns the entities of `kind` ("classes", "object_properties",
+        "data_properties", "annotation_properties" or "individuals"),
+        sorted by label."""
+        key = kind, imported
+        if key not in self._entities:
+            items = getattr(self.onto, kind)(imported=imported)
+            self._entities[key] = self.sort(items)
+        return self._entities[key]
+
+    def annotation_properties(self, ontology):
+        """Returns a dict with the annotation properties of `ontology` and
+        its imports by key, as in `ThingClass.get_annotations()`, where the
+        last property with a given key wins."""
+        if ontology not in self._annotation_properties:
+            self._annotation_properties[ontology] = {
+                str(get_preferred_label(prop)): prop
+                for prop in ontology.annotation_properties(imported=True)
+            }
+        return self._annotation_properties[ontology]
+
+    def annotations(self, cls):
+        """Returns a dict with the non-empty annotations of class `cls`,
+        like `cls.get_annotations()`."""
+        if cls not in self._annotations:
+            present = self.annotated.get(cls.storid, ())
+            annotations = {
+                key: prop._get_values_for_class(cls)  # pylint: disable=protected-access
+                for key, prop in self.annotation_properties(
+                    cls.namespace.ontology
+                ).items()
+                if prop.storid in present
+            }
+            for key, values in (("comment", cls.comment), ("label", cls.label)):
+                if key in annotations:
+                    annotations[key].extend(values)
+                else:
+                    annotations[key] = values
+            self._annotations[cls] = {
+                key: values for key, values in annotations.items() if values
+            }
+        return self._annotations[cls]
+
+    def strict_parents(self, cls):
+        """Returns the named parents of `cls` that are not ancestors of
+        its other parents, like `cls.get_parents(strict=True)`."""
+        parents = set(self.parents.get(cls, ()))
+        for parent in list(parents):
+            if parent not in self._ancestors:
+                self._ancestors[parent] = parent.ancestors(include_self=False)
+            parents.difference_update(self._ancestors[parent])
+        return parents
+
+    def branch(self, root, leaves=(), include_leaves=True):
+        """Returns a list with `root` and its direct and indirect
+        subclasses, sorted by label, like `Ontology.get_branch()`.  The
+        branch is not followed beyond the classes in `leaves`, which are
+        included if `include_leaves` is true."""
+        if isinstance(root, str):
+            root = self.get_by_label(root)
+        leaves = {
+            self.get_by_label(leaf) if isinstance(leaf, str) else leaf
+            for leaf in leaves or ()
+        }
+        leaves.discard(root)
+
+        # A class is followed from the strict parents only, such that a
+        # child of both the root and a leaf is not in the branch
+        branch, pending = set(), [root]
+        while pending:
+            cls = pending.pop()
+            if cls in branch:
+                continue
+            if cls in leaves:
+                if include_leaves:
+                    branch.add(cls)
+                continue
+            branch.add(cls)
+            pending.extend(
+                child
+                for child in self.children.get(cls, ())
+                if cls in self.strict_parents(child)
+            )
+        return self.sort(branch)
+
+
 class OntoDoc:
     """A class for helping document ontologies.
 
@@ -170,6 +363,44 @@ class OntoDoc:
         self.onto = onto
         self.style = style
         self.url_regex = re.compile(r"https?:\/\/[^\s ]+")
+        self.index = DocIndex(onto)
+
+        # Per-run caches of rendered items and links, see clear_cache()
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self._itemdocs = {}
+        self._links = {}
+        self._styles = {}
+
+    def clear_cache(self):
+        """Clears the cached items and links and rebuilds the index, e.g.
+        after the ontology or the style has been changed.  The hit and miss
+        counters, by cache ("itemdoc" or "link"), are kept."""
+        self.index = DocIndex(self.onto)
+        self._itemdocs.clear()
+        self._links.clear()
+        self._styles.clear()
+
+    def _cache_key(self, *args):
+        """Returns a cache key for `args` and the current style."""
+        # The style is kept, such that its id is not reused
+        self._styles.setdefault(id(self.style), self.style)
+        return (*args, id(self.style))
+
+    def link(self, obj):
+        """Returns entity, IRI or class expression `obj` formatted with the
+        link style.  Links to named entities and IRIs are cached."""
+        link_style = self.style.get("link", "{name}")
+        iri = obj if isinstance(obj, str) else getattr(obj, "iri", None)
+        if not isinstance(iri, str):
+            return asstring(obj, link_style, ontology=self.onto)
+        key = self._cache_key(iri, isinstance(obj, str))
+        if key in self._links:
+            self.hits["link"] += 1
+        else:
+            self.misses["link"] += 1
+            self._links[key] = asstring(obj, link_style, ontology=self.onto)
+        return self._links[key]
 
     def get_default_template(self):
         """Returns default template."""
@@ -222,9 +453,12 @@ class OntoDoc:
         figwidth = figwidth_style.format(width=width) if width else ""
         return figure_style.format(path=path, caption=caption, figwidth=figwidth)
 
-    def itemdoc(self, item, header_level=3, show_disjoints=False):  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    def itemdoc(self, item, header_level=3, show_disjoints=False):
         """Returns documentation of `item`.
 
+        Rendered items are cached by IRI, `header_level`,
+        `show_disjoints` and style, see `clear_cache()`.
+
         Parameters
         ----------
         item : obj | label
@@ -234,12 +468,19 @@ class OntoDoc:
         show_disjoints : Bool
             Whether to show `disjoint_with` relations.
         """
-        onto = self.onto
         if isinstance(item, str):
-            item = self.onto.get_by_label(item)
+            item = self.index.get_by_label(item)
+        key = self._cache_key(item.iri, header_level, show_disjoints)
+        if key in self._itemdocs:
+            self.hits["itemdoc"] += 1
+        else:
+            self.misses["itemdoc"] += 1
+            self._itemdocs[key] = self._itemdoc(item, header_level, show_disjoints)
+        return self._itemdocs[key]
 
+    def _itemdoc(self, item, header_level, show_disjoints):  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+        onto = self.onto
         header_style = self.style.get("header", "{label}\n")
-        link_style = self.style.get("link", "{name}")
         point_style = self.style.get("point", "{point}")
         points_style = self.style.get("points", "{points}")
         annotation_style = self.style.get("annotation", "{key}: {value}\n")
@@ -259,7 +500,7 @@ class OntoDoc:
         doc = []
 
         # Header
-        label = get_label(item)
+        label = self.index.label(item)
         iriname = item.iri.partition("#")[2]
         anchor = iriname if iriname else label.lower()
         doc.append(
@@ -281,7 +522,7 @@ class OntoDoc:
         doc.append(
             annotation_style.format(
                 key="IRI",
-                value=asstring(item.iri, link_style, ontology=onto),
+                value=self.link(item.iri),
                 ontology=onto,
             )
         )
@@ -289,6 +530,8 @@ class OntoDoc:
         # Add annotations
         if isinstance(item, owlready2.Thing):
             annotations = item.get_individual_annotations()
+        elif isinstance(item, owlready2.ThingClass):
+            annotations = self.index.annotations(item)
         else:
             annotations = item.get_annotations()
 
@@ -299,7 +542,7 @@ class OntoDoc:
                     doc.append(
                         annotation_style.format(
                             key=key,
-                            value=asstring(value, link_style, ontology=onto),
+                            value=self.link(value),
                         )
                     )
                 else:
@@ -321,25 +564,15 @@ class OntoDoc:
                 and isinstance(prop, owlready2.PropertyClass)
             ):
                 points.append(
-                    point_style.format(
-                        point="is_a " + asstring(prop, link_style, ontology=onto),
-                        ontology=onto,
-                    )
+                    point_style.format(point="is_a " + self.link(prop), ontology=onto)
                 )
             else:
-                points.append(
-                    point_style.format(
-                        point=asstring(prop, link_style, ontology=onto),
-                        ontology=onto,
-                    )
-                )
+                points.append(point_style.format(point=self.link(prop), ontology=onto))
 
         # ...add equivalent_to relations
         for entity in item.equivalent_to:
             points.append(
-                point_style.format(
-                    point="equivalent_to " + asstring(entity, link_style, ontology=onto)
-                )
+                point_style.format(point="equivalent_to " + self.link(entity))
             )
 
         # ...add disjoint_with relations
@@ -347,10 +580,7 @@ class OntoDoc:
             subjects = set(item.disjoint_with(reduce=True))
             points.append(
                 point_style.format(
-                    point="disjoint_with "
-                    + ", ".join(
-                        asstring(s, link_style, ontology=onto) for s in subjects
-                    ),
+                    point="disjoint_with " + ", ".join(self.link(s) for s in subjects),
                     ontology=onto,
                 )
             )
@@ -358,39 +588,32 @@ class OntoDoc:
         # ...add disjoint_unions
         if hasattr(item, "disjoint_unions"):
             for unions in item.disjoint_unions:
-                string = ", ".join(
-                    asstring(u, link_style, ontology=onto) for u in unions
-                )
+                string = ", ".join(self.link(u) for u in unions)
                 points.append(
                     point_style.format(
                         point=f"disjoint_union_of {string}", ontology=onto
                     )
                 )
 
+        # Only properties have an inverse, domain and range.  Looking them
+        # up on a class falls back to a label search over all entities.
+        is_property = isinstance(item, owlready2.PropertyClass)
+
         # ...add inverse_of relations
-        if hasattr(item, "inverse_property") and item.inverse_property:
+        if is_property and getattr(item, "inverse_property", None):
             points.append(
                 point_style.format(
-                    point="inverse_of "
-                    + asstring(item.inverse_property, link_style, ontology=onto)
+                    point="inverse_of " + self.link(item.inverse_property)
                 )
             )
 
         # ...add domain restrictions
-        for domain in getattr(item, "domain", ()):
-            points.append(
-                point_style.format(
-                    point="domain " + asstring(domain, link_style, ontology=onto)
-                )
-            )
+        for domain in getattr(item, "domain", ()) if is_property else ():
+            points.append(point_style.format(point="domain " + self.link(domain)))
 
         # ...add range restrictions
-        for restriction in getattr(item, "range", ()):
-            points.append(
-                point_style.format(
-                    point="range " + asstring(restriction, link_style, ontology=onto)
-                )
-            )
+        for restriction in getattr(item, "range", ()) if is_property else ():
+            points.append(point_style.format(point="range " + self.link(restriction)))
 
         # Add points (from is_a)
         if points:
@@ -401,30 +624,17 @@ class OntoDoc:
 
         # Instances (individuals)
         if hasattr(item, "instances"):
-            points = []
-
-            for instance in item.instances():
-                if isinstance(instance.is_instance_of, property):
-                    warnings.warn(
-                        f'Ignoring instance "{instance}" which is both an '
-                        "individual and a class. OntoDoc does not support "
-                        "punning at the present moment."
-                    )
-                    continue
-                if item in instance.is_instance_of:
-                    points.append(
-                        point_style.format(
-                            point=asstring(instance, link_style, ontology=onto),
-                            ontology=onto,
-                        )
-                    )
-                if points:
-                    value = points_style.format(points="".join(points), ontology=onto)
-                    doc.append(
-                        annotation_style.format(
-                            key="Individuals", value=value, ontology=onto
-                        )
+            points = [
+                point_style.format(point=self.link(instance), ontology=onto)
+                for instance in self.index.instances.get(item, ())
+            ]
+            if points:
+                value = points_style.format(points="".join(points), ontology=onto)
+                doc.append(
+                    annotation_style.format(
+                        key="Individuals", value=value, ontology=onto
                     )
+                )
 
         return "\n".join(doc)
 
@@ -468,6 +678,134 @@ def get_options(opts, **kwargs):
     return res
 
 
+class _Figure:  # pylint: disable=too-few-public-methods
+    """A generated figure waiting to be rendered by
+    `DocPP.render_figures()`.  `width` is zero until then, unless given."""
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, dot, filepath, fmt, width, figscale, maxwidth
+    ):
+        self.dot = dot
+        self.filepath = filepath
+        self.fmt = fmt
+        self.width = width
+        self.figscale = figscale
+        self.maxwidth = maxwidth
+
+
+class FigureCache:
+    """Persistent cache of rendered figures, keyed by a fingerprint of
+    their Graphviz graph.
+
+    A figure is stored as `<fingerprint>.<fmt>` in `cachedir`, together
+    with `<fingerprint>.json` holding its width in points as returned by
+    `OntoGraph.get_figsize()`.  The fingerprint is computed from the set of
+    node and edge statements and the attributes of the graph, so it does
+    not depend on the order in which the nodes were added.
+
+    Entries are touched when used.  `evict()` removes the entries that
+    were not used by this instance and not for `max_age` seconds, such
+    that figures of other templates sharing `cachedir` are kept.
+
+    Parameters
+    ----------
+    cachedir : str
+        Directory of the cache.
+    max_age : float
+        Age in seconds after which unused entries are evicted.
+    """
+
+    # Bump if the fingerprint or the layout of the cache changes
+    version = 1
+
+    def __init__(self, cachedir, max_age=7 * 24 * 3600):
+        self.cachedir = cachedir
+        self.max_age = max_age
+        self.used = set()
+        self.hits = self.misses = 0
+
+    def fingerprint(self, dot, fmt):
+        """Returns the fingerprint of Graphviz graph `dot` rendered in
+        format `fmt`."""
+        content = {
+            "version": self.version,
+            "fmt": fmt,
+            "type": type(dot).__name__,
+            "engine": dot.engine,
+            "strict": dot.strict,
+            "graph_attr": dot.graph_attr,
+            "node_attr": dot.node_attr,
+            "edge_attr": dot.edge_attr,
+            "body": sorted(dot.body),
+        }
+        text = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+    def _paths(self, key, fmt):
+        base = os.path.join(self.cachedir, key)
+        return f"{base}.{fmt}", f"{base}.json"
+
+    def get(self, key, fmt, filepath, figsize=True):
+        """Copies the cached figure `key` to `filepath` and returns a
+        ``(hit, figwidth)`` tuple.  Without `figsize`, the width is not
+        needed and may be None."""
+        figfile, metafile = self._paths(key, fmt)
+        try:
+            with open(metafile, "rt", encoding="utf8") as handle:
+                figwidth = json.load(handle)["figwidth"]
+            if figsize and figwidth is None:
+                raise KeyError(key)
+            shutil.copyfile(figfile, filepath)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return False, None
+        for path in (figfile, metafile):
+            os.utime(path)
+        self.used.add(key)
+        self.hits += 1
+        return True, figwidth
+
+    def put(self, key, fmt, filepath, figwidth):
+        """Stores the figure rendered to `filepath` as `key`."""
+        os.makedirs(self.cachedir, exist_ok=True)
+        figfile, metafile = self._paths(key, fmt)
+        tmpfile = f"{figfile}.{os.getpid()}.tmp"
+        shutil.copyfile(filepath, tmpfile)
+        os.replace(tmpfile, figfile)
+        tmpfile = f"{metafile}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump({"figwidth": figwidth}, handle)
+        os.replace(tmpfile, metafile)
+        self.used.add(key)
+
+    def evict(self):
+        """Removes the entries not used by this instance nor within the
+        last `max_age` seconds."""
+        if not os.path.isdir(self.cachedir):
+            return
+        limit = time.time() - self.max_age
+        for name in os.listdir(self.cachedir):
+            path = os.path.join(self.cachedir, name)
+            if name.split(".", 1)[0] not in self.used and (
+                os.path.getmtime(path) < limit
+            ):
+                os.remove(path)
+
+
+def render_figure(dot, filepath, fmt, figsize=True):
+    """Renders the Graphviz graph `dot` of an OntoGraph to `filepath` in
+    format `fmt`.  Returns the width of the figure in points if `figsize`
+    is true, otherwise None.
+
+    This is run in worker processes, which do not have the ontology."""
+    # get_figsize() and save() only use the Graphviz graph
+    graph = OntoGraph.__new__(OntoGraph)
+    graph.dot = dot
+    figwidth = graph.get_figsize()[0] if figsize else None
+    graph.save(filepath, fmt=fmt)
+    return figwidth
+
+
 class DocPP:  # pylint: disable=too-many-instance-attributes
     """Documentation pre-processor.
 
@@ -563,15 +901,16 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
         Maximum figure width.  Figures larger than this will be rescaled.
     imported : bool
         Whether to include imported entities.
+    jobs : int
+        Number of worker processes rendering the generated figures.
+        Defaults to the number of CPUs.
+    figcache : bool
+        Whether to reuse figures rendered by earlier runs from the
+        `FigureCache` in `figdir`/.cache.
     """
 
     # FIXME - this class should be refactored:
-    #   * Instead of rescanning the entire document for each pre-processor
-    #     directive, we should scan the source line-by-line and handle
-    #     each directive as they occur.
     #   * The current implementation has a lot of duplicated code.
-    #   * Instead of modifying the source in-place, we should copy to a
-    #     result list. This will make good error reporting much easier.
     #   * Branch leaves are only looked up in the file with the %BRANCH
     #     directive, not in all included files as expected.
 
@@ -586,6 +925,8 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
         figscale=1.0,
         maxwidth=None,
         imported=False,
+        jobs=None,
+        figcache=True,
     ):
         self.lines = template.split("\n")
         self.ontodoc = ontodoc
@@ -595,6 +936,11 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
         self.figscale = figscale
         self.maxwidth = maxwidth
         self.imported = imported
+        self.jobs = jobs
+        self.figcache = (
+            FigureCache(os.path.join(self.figdir, ".cache")) if figcache else None
+        )
+        self._figures = []  # Figures to be rendered by render_figures()
         self._branch_cache = None
         self._processed = False  # Whether process() has been called
 
@@ -614,6 +960,8 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
             figformat=self.figformat,
             figscale=self.figscale,
             maxwidth=self.maxwidth,
+            jobs=self.jobs,
+            figcache=self.figcache is not None,
         )
         docpp.lines[:] = self.lines
         docpp.figdir = self.figdir
@@ -621,17 +969,15 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
 
     def get_branches(self):
         """Returns a list with all branch names as specified with %BRANCH
-        (in current and all included documents).  The returned value is
-        cached for efficiency purposes and so that it is not lost after
-        processing branches."""
+        in the current document.  Included documents are expanded by their
+        own pre-processor.  The returned value is cached for efficiency
+        purposes and so that it is not lost after processing branches."""
         if self._branch_cache is None:
-            names = []
-            docpp = self.copy()
-            docpp.process_includes()
-            for line in docpp.lines:
-                if line.startswith("%BRANCH"):
-                    names.append(shlex.split(line)[1])
-            self._branch_cache = names
+            self._branch_cache = [
+                shlex.split(line)[1]
+                for line in self.lines
+                if line.startswith("%BRANCH")
+            ]
         return self._branch_cache
 
     def shift_header_levels(self, shift):
@@ -652,88 +998,199 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
                     else:
                         self.lines[i] = line[counter:]
 
+    # Pre-processor directives and the methods expanding them.  A line
+    # starting with a directive followed by a space is replaced by the
+    # lines returned by the method for the shlex tokens of the line.
+    directives = {
+        "%HEADER": "_expand_header",
+        "%FIGURE": "_expand_figure",
+        "%ENTITY": "_expand_entity",
+        "%BRANCH": "_expand_branch",
+        "%BRANCHFIG": "_expand_branchfig",
+        "%BRANCHDOC": "_expand_branchdoc",
+        "%BRANCHHEAD": "_expand_branchdoc",
+        "%ALL": "_expand_all",
+        "%ALLFIG": "_expand_allfig",
+        "%INCLUDE": "_expand_include",
+    }
+
+    def expand(self, directives=None, render=True):
+        """Expands all `directives` (default: all known directives) in a
+        single pass over the buffer.  Comment lines are kept.
+
+        References to generated figures are inserted once the figures are
+        rendered.  If `render` is false, they are left as callables in the
+        buffer, for the document including this one."""
+        if directives is None:
+            directives = self.directives
+        result = []
+        for line in self.lines:
+            keyword, space, _ = line.partition(" ")
+            if space and keyword in directives:
+                tokens = shlex.split(line)
+                result.extend(getattr(self, self.directives[keyword])(tokens))
+            else:
+                result.append(line)
+        if render:
+            self.render_figures()
+            result = [
+                item
+                for entry in result
+                for item in (entry() if callable(entry) else (entry,))
+            ]
+        self.lines = result
+
+    def render_figures(self):
+        """Renders all pending figures with Graphviz, in parallel with
+        `jobs` worker processes, and sets their widths.  Figures found in
+        the figure cache are copied instead."""
+        # pylint: disable=too-many-locals
+        # Figures written to the same file are rendered in document order
+        rounds, counts = [], {}
+        for figure in self._figures:
+            n = counts[figure.filepath] = counts.get(figure.filepath, -1) + 1
+            if n == len(rounds):
+                rounds.append([])
+            rounds[n].append(figure)
+        self._figures.clear()
+
+        jobs = self.jobs or os.cpu_count() or 1
+        cache = self.figcache
+        for figures in rounds:
+            figwidths, keys, pending = {}, {}, []
+            for figure in figures:
+                if cache:
+                    key = keys[id(figure)] = cache.fingerprint(figure.dot, figure.fmt)
+                    hit, figwidth = cache.get(
+                        key, figure.fmt, figure.filepath, not figure.width
+                    )
+                    if hit:
+                        figwidths[id(figure)] = figwidth
+                        continue
+                pending.append(figure)
+
+            args = [(f.dot, f.filepath, f.fmt, not f.width) for f in pending]
+            if jobs == 1 or len(pending) <= 1:
+                rendered = [render_figure(*arg) for arg in args]
+            else:
+                with ProcessPoolExecutor(min(jobs, len(pending))) as executor:
+                    rendered = list(executor.map(render_figure, *zip(*args)))
+            for figure, figwidth in zip(pending, rendered):
+                figwidths[id(figure)] = figwidth
+                if cache:
+                    cache.put(keys[id(figure)], figure.fmt, figure.filepath, figwidth)
+
+            for figure in figures:
+                figwidth = figwidths[id(figure)]
+                if not figure.width:
+                    width = figure.figscale * figwidth
+                    if figure.maxwidth and width > figure.maxwidth:
+                        width = figure.maxwidth
+                    figure.width = width
+
+    def _figure_lines(self, figure, caption, split=True):
+        """Returns the lines referring to rendered `figure`."""
+        text = self.ontodoc.get_figure(
+            figure.filepath, caption=caption, width=figure.width
+        )
+        return text.split("\n") if split else [text]
+
     def process_comments(self):
         """Strips out comment lines starting with "%%"."""
         self.lines = [line for line in self.lines if not line.startswith("%%")]
 
     def process_headers(self):
         """Expand all %HEADER specifications."""
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%HEADER "):
-                tokens = shlex.split(line)
-                name = tokens[1]
-                opts = get_options(tokens[2:], level=1)
-                del self.lines[i]
-                self.lines[i:i] = self.ontodoc.get_header(
-                    name,
-                    int(opts.level),  # pylint: disable=no-member
-                ).split("\n")
+        self.expand(("%HEADER",))
 
     def process_figures(self):
         """Expand all %FIGURE specifications."""
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%FIGURE "):
-                tokens = shlex.split(line)
-                path = tokens[1]
-                opts = get_options(tokens[2:], caption="", width=0)
-                del self.lines[i]
-                self.lines[i:i] = self.ontodoc.get_figure(
-                    os.path.join(self.basedir, path),
-                    caption=opts.caption,  # pylint: disable=no-member
-                    width=opts.width,  # pylint: disable=no-member
-                ).split("\n")
+        self.expand(("%FIGURE",))
 
     def process_entities(self):
         """Expand all %ENTITY specifications."""
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%ENTITY "):
-                tokens = shlex.split(line)
-                name = tokens[1]
-                opts = get_options(tokens[2:], header_level=3)
-                del self.lines[i]
-                self.lines[i:i] = self.ontodoc.itemdoc(
-                    name,
-                    int(opts.header_level),  # pylint: disable=no-member
-                ).split("\n")
+        self.expand(("%ENTITY",))
 
     def process_branches(self):
         """Expand all %BRANCH specifications."""
-        onto = self.ontodoc.onto
+        self.expand(("%BRANCH",))
 
+    def process_branchfigs(self):
+        """Process all %BRANCHFIG directives."""
+        self.expand(("%BRANCHFIG",))
+
+    def process_branchdocs(self):
+        """Process all %BRANCHDOC and  %BRANCHEAD directives."""
+        self.expand(("%BRANCHDOC", "%BRANCHHEAD"))
+
+    def process_alls(self):
+        """Expand all %ALL specifications."""
+        self.expand(("%ALL",))
+
+    def process_allfig(self):
+        """Process all %ALLFIG directives."""
+        self.expand(("%ALLFIG",))
+
+    def process_includes(self):
+        """Process all %INCLUDE directives."""
+        self.expand(("%INCLUDE",))
+
+    def _expand_header(self, tokens):
+        name = tokens[1]
+        opts = get_options(tokens[2:], level=1)
+        return self.ontodoc.get_header(
+            name,
+            int(opts.level),  # pylint: disable=no-member
+        ).split("\n")
+
+    def _expand_figure(self, tokens):
+        path = tokens[1]
+        opts = get_options(tokens[2:], caption="", width=0)
+        return self.ontodoc.get_figure(
+            os.path.join(self.basedir, path),
+            caption=opts.caption,  # pylint: disable=no-member
+            width=opts.width,  # pylint: disable=no-member
+        ).split("\n")
+
+    def _expand_entity(self, tokens):
+        name = tokens[1]
+        opts = get_options(tokens[2:], header_level=3)
+        return self.ontodoc.itemdoc(
+            name,
+            int(opts.header_level),  # pylint: disable=no-member
+        ).split("\n")
+
+    def _expand_branch(self, tokens):
+        name = tokens[1]
+        opts = get_options(
+            tokens[2:],
+            header_level=3,
+            terminated=1,
+            include_leaves=0,
+            namespaces="",
+            ontologies="",
+        )
         # Get all branch names in final document
-        names = self.get_branches()
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%BRANCH "):
-                tokens = shlex.split(line)
-                name = tokens[1]
-                opts = get_options(
-                    tokens[2:],
-                    header_level=3,
-                    terminated=1,
-                    include_leaves=0,
-                    namespaces="",
-                    ontologies="",
-                )
-                leaves = names if opts.terminated else ()  # pylint: disable=no-member
+        leaves = self.get_branches() if opts.terminated else ()  # pylint: disable=no-member
 
-                included_namespaces = (
-                    opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
-                )
-                included_ontologies = (
-                    opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
-                )
+        included_namespaces = (
+            opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
+        )
+        included_ontologies = (
+            opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
+        )
 
-                branch = filter_classes(
-                    onto.get_branch(name, leaves, opts.include_leaves),  # pylint: disable=no-member
-                    included_namespaces=included_namespaces,
-                    included_ontologies=included_ontologies,
-                )
+        index = self.ontodoc.index
+        branch = filter_classes(
+            index.branch(name, leaves, opts.include_leaves),  # pylint: disable=no-member
+            included_namespaces=included_namespaces,
+            included_ontologies=included_ontologies,
+        )
 
-                del self.lines[i]
-                self.lines[i:i] = self.ontodoc.itemsdoc(
-                    branch,
-                    int(opts.header_level),  # pylint: disable=no-member
-                ).split("\n")
+        return self.ontodoc.itemsdoc(
+            index.sort(branch),
+            int(opts.header_level),  # pylint: disable=no-member
+        ).split("\n")
 
     def _make_branchfig(  # pylint: disable=too-many-arguments,too-many-locals, too-many-positional-arguments
         self,
@@ -752,7 +1209,7 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
         included_ontologies: "Iterable[str]",
         addnodes=1,
         parents=1,
-    ) -> "tuple[str, list[str], float]":
+    ) -> "tuple[str, list[str], _Figure]":
         """Help method for process_branchfig().
 
         Args:
@@ -774,7 +1231,7 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
         Returns:
             filepath: path to generated figure
             leaves: used list of leaf node names
-            width: actual figure width
+            figure: the figure, which is rendered by render_figures()
 
         """
         onto = self.ontodoc.onto
@@ -818,292 +1275,253 @@ class DocPP:  # pylint: disable=too-many-instance-attributes
         if legend:
             graph.add_legend()
 
-        if not width:
-            figwidth, _ = graph.get_figsize()
-            width = self.figscale * figwidth
-            if self.maxwidth and width > self.maxwidth:
-                width = self.maxwidth
-
         filepath = os.path.join(self.basedir, path)
         destdir = os.path.dirname(filepath)
         if not os.path.exists(destdir):
             os.makedirs(destdir)
-        graph.save(filepath, fmt=fmt)
-        return filepath, leaves, width
-
-    def process_branchfigs(self):
-        """Process all %BRANCHFIG directives."""
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%BRANCHFIG "):
-                tokens = shlex.split(line)
-                name = tokens[1]
-                opts = get_options(
-                    tokens[2:],
-                    path="",
-                    caption="",
-                    terminated=1,
-                    include_leaves=1,
-                    strict_leaves=1,
-                    width=0,
-                    leaves="",
-                    relations="all",
-                    edgelabels=0,
-                    rankdir="BT",
-                    legend=1,
-                    namespaces="",
-                    ontologies="",
-                    addnodes=1,
-                    parents=1,
-                )
-
-                included_namespaces = (
-                    opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
-                )
-                included_ontologies = (
-                    opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
-                )
-
-                filepath, _, width = self._make_branchfig(
-                    name,
-                    opts.path,  # pylint: disable=no-member
-                    opts.terminated,  # pylint: disable=no-member
-                    opts.include_leaves,  # pylint: disable=no-member
-                    opts.strict_leaves,  # pylint: disable=no-member
-                    opts.width,  # pylint: disable=no-member
-                    opts.leaves,  # pylint: disable=no-member
-                    opts.relations,  # pylint: disable=no-member
-                    opts.edgelabels,  # pylint: disable=no-member
-                    opts.rankdir,  # pylint: disable=no-member
-                    opts.legend,  # pylint: disable=no-member
-                    included_namespaces,
-                    included_ontologies,
-                    opts.addnodes,
-                    opts.parents,
-                )
-
-                del self.lines[i]
-                self.lines[i:i] = self.ontodoc.get_figure(
-                    filepath,
-                    caption=opts.caption,
-                    width=width,  # pylint: disable=no-member
-                ).split("\n")
+        figure = _Figure(
+            graph.dot, filepath, fmt, width, self.figscale, self.maxwidth
+        )
+        self._figures.append(figure)
+        return filepath, leaves, figure
+
+    def _expand_branchfig(self, tokens):
+        name = tokens[1]
+        opts = get_options(
+            tokens[2:],
+            path="",
+            caption="",
+            terminated=1,
+            include_leaves=1,
+            strict_leaves=1,
+            width=0,
+            leaves="",
+            relations="all",
+            edgelabels=0,
+            rankdir="BT",
+            legend=1,
+            namespaces="",
+            ontologies="",
+            addnodes=1,
+            parents=1,
+        )
 
-    def process_branchdocs(self):  # pylint: disable=too-many-locals
-        """Process all %BRANCHDOC and  %BRANCHEAD directives."""
-        onto = self.ontodoc.onto
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%BRANCHDOC ") or line.startswith("%BRANCHHEAD "):
-                with_branch = bool(line.startswith("%BRANCHDOC "))
-                tokens = shlex.split(line)
-                name = tokens[1]
-                title = camelsplit(name)
-                title = title[0].upper() + title[1:] + " branch"
-                opts = get_options(
-                    tokens[2:],
-                    level=2,
-                    path="",
-                    title=title,
-                    caption=title + ".",
-                    terminated=1,
-                    strict_leaves=1,
-                    width=0,
-                    leaves="",
-                    relations="all",
-                    edgelabels=0,
-                    rankdir="BT",
-                    legend=1,
-                    namespaces="",
-                    ontologies="",
-                    addnodes=1,
-                    parents=1,
-                )
+        included_namespaces = (
+            opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
+        )
+        included_ontologies = (
+            opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
+        )
 
-                included_namespaces = (
-                    opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
-                )
-                included_ontologies = (
-                    opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
-                )
+        _, _, figure = self._make_branchfig(
+            name,
+            opts.path,  # pylint: disable=no-member
+            opts.terminated,  # pylint: disable=no-member
+            opts.include_leaves,  # pylint: disable=no-member
+            opts.strict_leaves,  # pylint: disable=no-member
+            opts.width,  # pylint: disable=no-member
+            opts.leaves,  # pylint: disable=no-member
+            opts.relations,  # pylint: disable=no-member
+            opts.edgelabels,  # pylint: disable=no-member
+            opts.rankdir,  # pylint: disable=no-member
+            opts.legend,  # pylint: disable=no-member
+            included_namespaces,
+            included_ontologies,
+            opts.addnodes,
+            opts.parents,
+        )
 
-                include_leaves = 1
-                filepath, leaves, width = self._make_branchfig(
-                    name,
-                    opts.path,  # pylint: disable=no-member
-                    opts.terminated,  # pylint: disable=no-member
-                    include_leaves,
-                    opts.strict_leaves,  # pylint: disable=no-member
-                    opts.width,  # pylint: disable=no-member
-                    opts.leaves,  # pylint: disable=no-member
-                    opts.relations,  # pylint: disable=no-member
-                    opts.edgelabels,  # pylint: disable=no-member
-                    opts.rankdir,  # pylint: disable=no-member
-                    opts.legend,  # pylint: disable=no-member
-                    included_namespaces,
-                    included_ontologies,
-                    opts.addnodes,
-                    opts.parents,
-                )
+        return [functools.partial(self._figure_lines, figure, opts.caption)]
+
+    def _expand_branchdoc(self, tokens):  # pylint: disable=too-many-locals
+        with_branch = tokens[0] == "%BRANCHDOC"
+        name = tokens[1]
+        title = camelsplit(name)
+        title = title[0].upper() + title[1:] + " branch"
+        opts = get_options(
+            tokens[2:],
+            level=2,
+            path="",
+            title=title,
+            caption=title + ".",
+            terminated=1,
+            strict_leaves=1,
+            width=0,
+            leaves="",
+            relations="all",
+            edgelabels=0,
+            rankdir="BT",
+            legend=1,
+            namespaces="",
+            ontologies="",
+            addnodes=1,
+            parents=1,
+        )
 
-                sec = []
-                sec.append(self.ontodoc.get_header(opts.title, int(opts.level)))  # pylint: disable=no-member
-                sec.append(
-                    self.ontodoc.get_figure(
-                        filepath,
-                        caption=opts.caption,
-                        width=width,  # pylint: disable=no-member
-                    )
-                )
-                if with_branch:
-                    include_leaves = 0
-                    branch = filter_classes(
-                        onto.get_branch(name, leaves, include_leaves),
-                        included_namespaces=included_namespaces,
-                        included_ontologies=included_ontologies,
-                    )
-                    sec.append(
-                        self.ontodoc.itemsdoc(branch, int(opts.level + 1))  # pylint: disable=no-member
-                    )
+        included_namespaces = (
+            opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
+        )
+        included_ontologies = (
+            opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
+        )
 
-                del self.lines[i]
-                self.lines[i:i] = sec
+        include_leaves = 1
+        _, leaves, figure = self._make_branchfig(
+            name,
+            opts.path,  # pylint: disable=no-member
+            opts.terminated,  # pylint: disable=no-member
+            include_leaves,
+            opts.strict_leaves,  # pylint: disable=no-member
+            opts.width,  # pylint: disable=no-member
+            opts.leaves,  # pylint: disable=no-member
+            opts.relations,  # pylint: disable=no-member
+            opts.edgelabels,  # pylint: disable=no-member
+            opts.rankdir,  # pylint: disable=no-member
+            opts.legend,  # pylint: disable=no-member
+            included_namespaces,
+            included_ontologies,
+            opts.addnodes,
+            opts.parents,
+        )
 
-    def process_alls(self):
-        """Expand all %ALL specifications."""
-        onto = self.ontodoc.onto
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%ALL "):
-                tokens = shlex.split(line)
-                token = tokens[1]
-                opts = get_options(tokens[2:], header_level=3)
-                if token == "classes":  # nosec
-                    items = onto.classes(imported=self.imported)
-                elif token in ("object_properties", "relations"):
-                    items = onto.object_properties(imported=self.imported)
-                elif token == "data_properties":  # nosec
-                    items = onto.data_properties(imported=self.imported)
-                elif token == "annotation_properties":  # nosec
-                    items = onto.annotation_properties(imported=self.imported)
-                elif token == "individuals":  # nosec
-                    items = onto.individuals(imported=self.imported)
-                else:
-                    raise InvalidTemplateError(f"Invalid argument to %%ALL: {token}")
-                items = sorted(items, key=get_label)
-                del self.lines[i]
-                self.lines[i:i] = self.ontodoc.itemsdoc(
-                    items,
-                    int(opts.header_level),  # pylint: disable=no-member
-                ).split("\n")
-
-    def process_allfig(self):  # pylint: disable=too-many-locals
-        """Process all %ALLFIG directives."""
+        sec = []
+        sec.append(self.ontodoc.get_header(opts.title, int(opts.level)))  # pylint: disable=no-member
+        sec.append(
+            functools.partial(
+                self._figure_lines,
+                figure,
+                opts.caption,  # pylint: disable=no-member
+                split=False,
+            )
+        )
+        if with_branch:
+            include_leaves = 0
+            index = self.ontodoc.index
+            branch = filter_classes(
+                index.branch(name, leaves, include_leaves),
+                included_namespaces=included_namespaces,
+                included_ontologies=included_ontologies,
+            )
+            sec.append(
+                self.ontodoc.itemsdoc(index.sort(branch), int(opts.level + 1))  # pylint: disable=no-member
+            )
+        return sec
+
+    def _expand_all(self, tokens):
+        token = tokens[1]
+        opts = get_options(tokens[2:], header_level=3)
+        if token == "relations":
+            token = "object_properties"
+        if token not in (
+            "classes",
+            "object_properties",
+            "data_properties",
+            "annotation_properties",
+            "individuals",
+        ):
+            raise InvalidTemplateError(f"Invalid argument to %%ALL: {token}")
+        items = self.ontodoc.index.entities(token, imported=self.imported)
+        return self.ontodoc.itemsdoc(
+            items,
+            int(opts.header_level),  # pylint: disable=no-member
+        ).split("\n")
+
+    def _expand_allfig(self, tokens):  # pylint: disable=too-many-locals
         onto = self.ontodoc.onto
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%ALLFIG "):
-                tokens = shlex.split(line)
-                token = tokens[1]
-                opts = get_options(
-                    tokens[2:],
-                    path="",
-                    level=3,
-                    terminated=0,
-                    include_leaves=1,
-                    strict_leaves=1,
-                    width=0,
-                    leaves="",
-                    relations="isA",
-                    edgelabels=0,
-                    rankdir="BT",
-                    legend=1,
-                    namespaces="",
-                    ontologies="",
-                    addnodes=1,
-                    parents=1,
-                )
-                if token == "classes":  # nosec
-                    roots = onto.get_root_classes(imported=self.imported)
-                elif token in ("object_properties", "relations"):
-                    roots = onto.get_root_object_properties(imported=self.imported)
-                elif token == "data_properties":  # nosec
-                    roots = onto.get_root_data_properties(imported=self.imported)
-                else:
-                    raise InvalidTemplateError(f"Invalid argument to %%ALLFIG: {token}")
-
-                included_namespaces = (
-                    opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
-                )
-                included_ontologies = (
-                    opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
-                )
-
-                sec = []
-                for root in roots:
-                    name = asstring(root, link="{label}", ontology=onto)
-                    filepath, _, width = self._make_branchfig(
-                        name,
-                        opts.path,  # pylint: disable=no-member
-                        opts.terminated,  # pylint: disable=no-member
-                        opts.include_leaves,  # pylint: disable=no-member
-                        opts.strict_leaves,  # pylint: disable=no-member
-                        opts.width,  # pylint: disable=no-member
-                        opts.leaves,  # pylint: disable=no-member
-                        opts.relations,  # pylint: disable=no-member
-                        opts.edgelabels,  # pylint: disable=no-member
-                        opts.rankdir,  # pylint: disable=no-member
-                        opts.legend,  # pylint: disable=no-member
-                        included_namespaces,
-                        included_ontologies,
-                        opts.addnodes,
-                        opts.parents,
-                    )
-                    title = f"Taxonomy of {name}."
-                    sec.append(self.ontodoc.get_header(title, int(opts.level)))  # pylint: disable=no-member
-                    sec.extend(
-                        self.ontodoc.get_figure(
-                            filepath, caption=title, width=width
-                        ).split("\n")
-                    )
+        token = tokens[1]
+        opts = get_options(
+            tokens[2:],
+            path="",
+            level=3,
+            terminated=0,
+            include_leaves=1,
+            strict_leaves=1,
+            width=0,
+            leaves="",
+            relations="isA",
+            edgelabels=0,
+            rankdir="BT",
+            legend=1,
+            namespaces="",
+            ontologies="",
+            addnodes=1,
+            parents=1,
+        )
+        if token == "classes":  # nosec
+            roots = onto.get_root_classes(imported=self.imported)
+        elif token in ("object_properties", "relations"):
+            roots = onto.get_root_object_properties(imported=self.imported)
+        elif token == "data_properties":  # nosec
+            roots = onto.get_root_data_properties(imported=self.imported)
+        else:
+            raise InvalidTemplateError(f"Invalid argument to %%ALLFIG: {token}")
 
-                del self.lines[i]
-                self.lines[i:i] = sec
+        included_namespaces = (
+            opts.namespaces.split(",") if opts.namespaces else ()  # pylint: disable=no-member
+        )
+        included_ontologies = (
+            opts.ontologies.split(",") if opts.ontologies else ()  # pylint: disable=no-member
+        )
 
-    def process_includes(self):
-        """Process all %INCLUDE directives."""
-        for i, line in reversed(list(enumerate(self.lines))):
-            if line.startswith("%INCLUDE "):
-                tokens = shlex.split(line)
-                filepath = tokens[1]
-                opts = get_options(tokens[2:], shift=0)
-                with open(
-                    os.path.join(self.basedir, filepath), "rt", encoding="utf8"
-                ) as handle:
-                    docpp = DocPP(
-                        handle.read(),
-                        self.ontodoc,
-                        basedir=os.path.dirname(filepath),
-                        figformat=self.figformat,
-                        figscale=self.figscale,
-                        maxwidth=self.maxwidth,
-                    )
-                    docpp.figdir = self.figdir
-                if opts.shift:  # pylint: disable=no-member
-                    docpp.shift_header_levels(int(opts.shift))  # pylint: disable=no-member
-                docpp.process()
-                del self.lines[i]
-                self.lines[i:i] = docpp.lines
+        sec = []
+        for root in roots:
+            name = asstring(root, link="{label}", ontology=onto)
+            _, _, figure = self._make_branchfig(
+                name,
+                opts.path,  # pylint: disable=no-member
+                opts.terminated,  # pylint: disable=no-member
+                opts.include_leaves,  # pylint: disable=no-member
+                opts.strict_leaves,  # pylint: disable=no-member
+                opts.width,  # pylint: disable=no-member
+                opts.leaves,  # pylint: disable=no-member
+                opts.relations,  # pylint: disable=no-member
+                opts.edgelabels,  # pylint: disable=no-member
+                opts.rankdir,  # pylint: disable=no-member
+                opts.legend,  # pylint: disable=no-member
+                included_namespaces,
+                included_ontologies,
+                opts.addnodes,
+                opts.parents,
+            )
+            title = f"Taxonomy of {name}."
+            sec.append(self.ontodoc.get_header(title, int(opts.level)))  # pylint: disable=no-member
+            sec.append(functools.partial(self._figure_lines, figure, title))
+        return sec
+
+    def _expand_include(self, tokens):
+        filepath = tokens[1]
+        opts = get_options(tokens[2:], shift=0)
+        filename = os.path.join(self.basedir, filepath)
+        with open(filename, "rt", encoding="utf8") as handle:
+            docpp = DocPP(
+                handle.read(),
+                self.ontodoc,
+                basedir=os.path.dirname(filepath),
+                figformat=self.figformat,
+                figscale=self.figscale,
+                maxwidth=self.maxwidth,
+            )
+            docpp.figdir = self.figdir
+        if opts.shift:  # pylint: disable=no-member
+            docpp.shift_header_levels(int(opts.shift))  # pylint: disable=no-member
+        # Figures of the included document are rendered with ours
+        docpp._figures = self._figures  # pylint: disable=protected-access
+        docpp.process_comments()
+        docpp.expand(render=False)
+        return docpp.lines
 
     def process(self):
-        """Perform all pre-processing steps."""
+        """Perform all pre-processing steps.
+
+        Comments are stripped first, then all directives are expanded in
+        a single pass over the buffer, such that the time is linear in the
+        size of the template.  The expansions are not scanned again for
+        directives."""
         if not self._processed:
             self.process_comments()
-            self.process_headers()
-            self.process_figures()
-            self.process_entities()
-            self.process_branches()
-            self.process_branchfigs()
-            self.process_branchdocs()
-            self.process_alls()
-            self.process_allfig()
-            self.process_includes()
+            self.expand()
+            if self.figcache:
+                self.figcache.evict()
             self._processed = True
 
     def write(  # pylint: disable=too-many-arguments
@@ -1414,6 +1832,8 @@ def get_docpp(  # pylint: disable=too-many-arguments
     figformat="png",
     maxwidth=None,
     imported=False,
+    jobs=None,
+    figcache=True,
 ):
     """Read `infile` and return a new docpp instance."""
     if infile:
@@ -1432,6 +1852,8 @@ def get_docpp(  # pylint: disable=too-many-arguments
         figformat=figformat,
         maxwidth=maxwidth,
         imported=imported,
+        jobs=jobs,
+        figcache=figcache,
     )
 
     return docpp
@@ -1,5 +1,6 @@
 import argparse
 import ast
+import functools
 from graphlib import TopologicalSorter
 import inspect
 import re
@@ -298,6 +299,7 @@ def generateClassDefComplex(name, attrname, obj):
     )
 
 
+@functools.lru_cache(maxsize=None)
 def convert_to_iso_unit(unit_string):
     """Converts a string representation of ISQ base quantities to its ISO unit symbols using astropy.
 
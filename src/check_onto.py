@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run `emmocheck` on the quadstore snapshot written by `build_onto.py`.
+
+Accepts the same command line options as `emmocheck`, e.g.
+
+    python src/check_onto.py --database magnetic-materials.sqlite3 \\
+        https://w3id.org/emmo/domain/magnetic-materials#
+
+`emmocheck --database` calls `onto.load()` on the stored ontology, which
+parses and fetches the ontology and its imports again.  This wrapper marks
+all ontologies in the snapshot as loaded before the checks are run.
+"""
+import sys
+
+from emmopy import emmocheck
+
+from snapshot import open_snapshot
+
+
+def main(argv=None):
+    """Main run function."""
+    emmocheck.World = lambda filename: open_snapshot(filename)
+    return emmocheck.main(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,551 @@
+# -*- coding: utf-8 -*-
+"""
+Declarative class table of MagMO and a bulk loader for it.
+
+The domain modules in `modules/` create each class through the Owlready2
+metaclass machinery, which writes the triples of a class one by one.  The
+class table `classes.yaml` describes the same classes as data.  Each entry
+gives
+
+  - `name`: the name of a new entity, or `amend`: a reference to an existing
+    entity (e.g. an EMMO unit) that gets additional parents or annotations,
+  - `type`: ``class`` or ``annotation_property`` (new entities only),
+  - `parents`: named parents,
+  - `restrictions`: anonymous parents (restrictions and class expressions),
+  - `annotations`: annotation values by property,
+  - `elucidation`: the cleaned docstring of the class.
+
+References are written as in the domain modules: ``SpaceGroup`` is an entity
+of MagMO, ``emmo.Length`` the EMMO entity with prefLabel ``Length`` and
+``skos:prefLabel`` an IRI with a well-known prefix.  Other IRIs are written
+as ``<IRI>``.  A restriction is a mapping like
+
+    {property: emmo.hasMeasurementUnit, some: emmo.Tesla}
+    {property: emmo.hasProperty, exactly: 1, class: Coercivity}
+
+with ``some``, ``only``, ``value``, ``exactly``, ``min`` or ``max`` as in
+Owlready2, and class expressions are ``{or: [...]}``, ``{and: [...]}`` and
+``{not: ...}``.  Annotation values are plain strings or ``{lang: text}``
+mappings.
+
+`load()` resolves all references with one query per table, allocates the
+storids of the new IRIs and blank nodes in bulk and inserts all triples
+with one `executemany()` per table in a single transaction, so the time
+grows linearly with the number of classes.  The result is the same as
+merging the fragments of the domain modules.
+
+The table is generated from the domain modules:
+
+    python src/build_onto.py --write-class-table src/classes.yaml
+
+The CI build fails if the table is out of date:
+
+    python src/build_onto.py --check-class-table src/classes.yaml
+
+and used instead of them with
+
+    python src/build_onto.py --class-table src/classes.yaml
+"""
+import inspect
+import os
+
+import yaml
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL = "http://www.w3.org/2002/07/owl#"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+
+PREFIXES = {
+    "rdf": RDF,
+    "rdfs": RDFS,
+    "owl": OWL,
+    "xsd": XSD,
+    "skos": SKOS,
+    "dcterms": "http://purl.org/dc/terms/",
+}
+
+thisdir = os.path.abspath(os.path.dirname(__file__))
+TABLE = os.path.join(thisdir, "classes.yaml")
+
+# Bump if the table format changes
+TABLE_VERSION = 1
+
+TYPES = {
+    "class": OWL + "Class",
+    "annotation_property": OWL + "AnnotationProperty",
+}
+
+# Restriction keywords and the predicates of their value
+RESTRICTIONS = {
+    "some": OWL + "someValuesFrom",
+    "only": OWL + "allValuesFrom",
+    "value": OWL + "hasValue",
+}
+
+# Cardinality keywords and the predicates of qualified and unqualified
+# restrictions
+CARDINALITIES = {
+    "exactly": (OWL + "qualifiedCardinality", OWL + "cardinality"),
+    "min": (OWL + "minQualifiedCardinality", OWL + "minCardinality"),
+    "max": (OWL + "maxQualifiedCardinality", OWL + "maxCardinality"),
+}
+
+# Class expression keywords
+OPERATORS = {
+    "or": OWL + "unionOf",
+    "and": OWL + "intersectionOf",
+}
+
+ELUCIDATION = "emmo.elucidation"
+
+
+class ClassTableError(Exception):
+    """Raised when the class table cannot be written or loaded."""
+
+
+def _imported_contexts(onto):
+    """Returns the contexts of the ontologies imported by `onto`,
+    directly or indirectly."""
+    contexts, pending = set(), list(onto.imported_ontologies)
+    while pending:
+        imported = pending.pop()
+        if imported.graph.c not in contexts:
+            contexts.add(imported.graph.c)
+            pending.extend(imported.imported_ontologies)
+    return contexts
+
+
+class Names:
+    """Maps IRIs to references in the class table and back.
+
+    Parameters
+    ----------
+    onto : owlready2.Ontology
+        MagMO.  Bare names refer to its namespace, ``emmo.<label>`` to the
+        entities with this prefLabel in the ontologies it imports.
+    """
+
+    def __init__(self, onto):
+        graph = onto.world.graph
+        self.namespace = onto.base_iri
+        self.labels = {}
+        abbreviate = graph._abbreviate  # pylint: disable=protected-access
+        preflabel = abbreviate(SKOS + "prefLabel", False)
+        contexts = _imported_contexts(onto)
+        for c, iri, label in graph.execute(
+            "SELECT c, iri, o FROM datas JOIN resources ON s=storid WHERE p=?",
+            (preflabel,),
+        ):
+            if c in contexts:
+                self.labels.setdefault(label, set()).add(iri)
+        self.references = {
+            next(iter(iris)): f"emmo.{label}"
+            for label, iris in self.labels.items()
+            if len(iris) == 1 and label.isidentifier()
+        }
+
+    def reference(self, iri):
+        """Returns the reference to `iri` used in the table."""
+        local = iri[len(self.namespace) :]
+        if iri.startswith(self.namespace) and local.isidentifier():
+            return local
+        for prefix, namespace in PREFIXES.items():
+            if iri.startswith(namespace) and iri[len(namespace) :].isidentifier():
+                return f"{prefix}:{iri[len(namespace) :]}"
+        if iri in self.references:
+            return self.references[iri]
+        return f"<{iri}>"
+
+    def iri(self, reference):
+        """Returns the IRI of `reference`."""
+        if reference.startswith("<") and reference.endswith(">"):
+            return reference[1:-1]
+        if reference.startswith("emmo."):
+            iris = self.labels.get(reference[5:], ())
+            if len(iris) != 1:
+                raise ClassTableError(
+                    f"{reference!r} matches {len(iris)} entities, use <IRI>"
+                )
+            return next(iter(iris))
+        prefix, colon, local = reference.partition(":")
+        if colon:
+            if prefix not in PREFIXES:
+                raise ClassTableError(f"unknown prefix in {reference!r}")
+            return PREFIXES[prefix] + local
+        return self.namespace + reference
+
+
+def _literal(value, datatype, default):
+    """Returns literal `value` with `datatype` (an IRI or ``@lang``) as
+    written in the table.  Plain strings have datatype `default`."""
+    if datatype.startswith("@"):
+        return {datatype[1:]: value}
+    if datatype == default and isinstance(value, str):
+        return value
+    return {"value": value, "datatype": datatype}
+
+
+def _creation_order(po):
+    """Sort key of ``(predicate, object)`` pairs ordering blank nodes by
+    their number, i.e. in the order they were created, after named
+    objects."""
+    p, o = po
+    if o.startswith("_:"):
+        return p, 1, int(o[2:]), ""
+    return p, 0, 0, o
+
+
+def dump(onto, fragments):
+    """Returns the class table of the entities defined and amended by
+    `fragments`, in module order.
+
+    `onto` is MagMO after merging the fragments.  Raises ClassTableError if
+    a fragment contains triples the table cannot express."""
+    # pylint: disable=too-many-locals,too-many-statements
+    names = Names(onto)
+    ref = names.reference
+    entries = []
+
+    for fragment in fragments:
+        if fragment["removed"]["objs"] or fragment["removed"]["datas"]:
+            raise ClassTableError(
+                f"module {fragment['module']!r} removes triples"
+            )
+        objs, datas = {}, {}
+        for _, s, p, o in fragment["added"]["objs"]:
+            objs.setdefault(s, []).append((p, o))
+        for _, s, p, o, d in fragment["added"]["datas"]:
+            datas.setdefault(s, []).append((p, o, d))
+
+        def literal(value, datatype, default):
+            result = _literal(value, datatype, default)
+            if isinstance(result, dict) and "datatype" in result:
+                result["datatype"] = ref(datatype)
+            return result
+
+        def expression(node):
+            if not node.startswith("_:"):
+                return ref(node)
+            pos = dict(objs.get(node, ()))
+            values = {p: (o, d) for p, o, d in datas.get(node, ())}
+            kind = pos.get(RDF + "type")
+            if kind == OWL + "Restriction":
+                result = {"property": ref(pos[OWL + "onProperty"])}
+                for key, predicate in RESTRICTIONS.items():
+                    if predicate in pos and key == "value":
+                        result[key] = {"entity": ref(pos[predicate])}
+                    elif predicate in pos:
+                        result[key] = expression(pos[predicate])
+                    elif predicate in values:
+                        result[key] = literal(*values[predicate], XSD + "string")
+                for key, predicates in CARDINALITIES.items():
+                    for predicate in predicates:
+                        if predicate in values:
+                            result[key] = values[predicate][0]
+                if OWL + "onClass" in pos:
+                    result["class"] = expression(pos[OWL + "onClass"])
+                return result
+            if kind == OWL + "Class":
+                for key, predicate in OPERATORS.items():
+                    if predicate in pos:
+                        return {key: items(pos[predicate])}
+                if OWL + "complementOf" in pos:
+                    return {"not": expression(pos[OWL + "complementOf"])}
+            raise ClassTableError(
+                f"module {fragment['module']!r}: cannot express blank node "
+                f"with {sorted(pos)}"
+            )
+
+        def items(node):
+            result = []
+            while node != RDF + "nil":
+                pos = dict(objs[node])
+                result.append(expression(pos[RDF + "first"]))
+                node = pos[RDF + "rest"]
+            return result
+
+        # Defined entities in source order, followed by the amended ones
+        defined = {iri: name for name, iri in fragment["entities"].items()}
+        subjects = list(defined)
+        subjects.extend(
+            sorted(
+                s
+                for s in {**objs, **datas}
+                if not s.startswith("_:") and s not in defined
+            )
+        )
+        for s in subjects:
+            entry = {}
+            if s in defined:
+                entry["name"] = defined[s]
+            else:
+                entry["amend"] = ref(s)
+            entry["module"] = fragment["module"]
+            parents, restrictions = [], []
+            for p, o in sorted(objs.get(s, ()), key=_creation_order):
+                if p == RDF + "type" and s in defined:
+                    kinds = [key for key, iri in TYPES.items() if iri == o]
+                    if not kinds:
+                        raise ClassTableError(f"{s}: unsupported type {o}")
+                    entry["type"] = kinds[0]
+                elif p == RDFS + "subClassOf":
+                    if o.startswith("_:"):
+                        restrictions.append(expression(o))
+                    else:
+                        parents.append(ref(o))
+                else:
+                    raise ClassTableError(f"{s}: unsupported predicate {p}")
+            if parents:
+                entry["parents"] = parents
+            if restrictions:
+                entry["restrictions"] = restrictions
+            annotations = {}
+            for p, o, d in sorted(datas.get(s, ()), key=repr):
+                annotations.setdefault(ref(p), []).append(
+                    literal(o, d, RDF + "langString")
+                )
+            labels = ("skos:prefLabel", "skos:altLabel")
+            annotations = {
+                key: annotations[key]
+                for key in sorted(
+                    annotations,
+                    key=lambda key: labels.index(key) if key in labels else 2,
+                )
+            }
+            if annotations:
+                entry["annotations"] = annotations
+            if s in defined:
+                doc = fragment["docs"].get(entry["name"])
+                if doc:
+                    entry["elucidation"] = inspect.cleandoc(doc)
+            entries.append(entry)
+
+    return {"version": TABLE_VERSION, "entries": entries}
+
+
+def _str_representer(dumper, data):
+    style = "|" if "\n" in data else None
+    return dumper.represent_scalar("tag:yaml.org,2002:str", data, style=style)
+
+
+class _Dumper(yaml.SafeDumper):  # pylint: disable=too-many-ancestors
+    """Writes multi-line strings as literal blocks."""
+
+
+_Dumper.add_representer(str, _str_representer)
+
+
+def write(table, filename=TABLE):
+    """Writes `table` to `filename`."""
+    tmpfile = f"{filename}.{os.getpid()}.tmp"
+    with open(tmpfile, "wt", encoding="utf8") as handle:
+        handle.write(
+            "# Class table of MagMO, generated from src/modules/ with\n"
+            "#   python src/build_onto.py --write-class-table src/classes.yaml\n"
+            "# See src/class_table.py for the format.\n"
+        )
+        yaml.dump(
+            table,
+            handle,
+            Dumper=_Dumper,
+            allow_unicode=True,
+            sort_keys=False,
+            width=79,
+        )
+    os.replace(tmpfile, filename)
+
+
+def matches(table, filename=TABLE):
+    """Returns whether `filename` contains class `table`, i.e. whether
+    writing `table` would reproduce it."""
+    return os.path.exists(filename) and read(filename) == table
+
+
+def read(filename=TABLE):
+    """Returns the class table in `filename`."""
+    with open(filename, "rt", encoding="utf8") as handle:
+        table = yaml.load(  # nosec
+            handle, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        )
+    if not isinstance(table, dict) or table.get("version") != TABLE_VERSION:
+        raise ClassTableError(
+            f"{filename}: not a class table of version {TABLE_VERSION}"
+        )
+    return table
+
+
+class _Triples:
+    """Collects the triples of the class table with IRIs and numbered blank
+    nodes, to be converted to storids in bulk."""
+
+    def __init__(self, names):
+        self.iri = names.iri
+        self.objs = []
+        self.datas = []
+        self.bnodes = 0
+
+    def bnode(self):
+        """Returns a new blank node."""
+        self.bnodes += 1
+        return -self.bnodes
+
+    def add(self, s, p, o):
+        """Adds an object triple."""
+        self.objs.append((s, p, o))
+
+    def add_data(self, s, p, value, datatype):
+        """Adds a data triple, `datatype` is an IRI or ``@lang``."""
+        self.datas.append((s, p, value, datatype))
+
+    def literal(self, s, p, value, default):
+        """Adds a data triple with `value` as written in the table.  Plain
+        strings have datatype `default`."""
+        if isinstance(value, dict) and "datatype" in value:
+            self.add_data(s, p, value["value"], self.iri(value["datatype"]))
+        elif isinstance(value, dict):
+            ((lang, text),) = value.items()
+            self.add_data(s, p, text, f"@{lang}")
+        else:
+            self.add_data(s, p, value, default)
+
+    def expression(self, expr):
+        """Adds the triples of class expression `expr` and returns its
+        node."""
+        if isinstance(expr, str):
+            return self.iri(expr)
+        node = self.bnode()
+        if "property" in expr:
+            self.add(node, RDF + "type", OWL + "Restriction")
+            self.add(node, OWL + "onProperty", self.iri(expr["property"]))
+            for key, predicate in RESTRICTIONS.items():
+                value = expr.get(key)
+                if value is None:
+                    continue
+                if key != "value":
+                    self.add(node, predicate, self.expression(value))
+                elif isinstance(value, dict) and "entity" in value:
+                    self.add(node, predicate, self.iri(value["entity"]))
+                else:
+                    self.literal(node, predicate, value, XSD + "string")
+            for key, (qualified, unqualified) in CARDINALITIES.items():
+                if key in expr:
+                    predicate = qualified if "class" in expr else unqualified
+                    self.add_data(
+                        node, predicate, expr[key], XSD + "nonNegativeInteger"
+                    )
+            if "class" in expr:
+                self.add(node, OWL + "onClass", self.expression(expr["class"]))
+            return node
+        self.add(node, RDF + "type", OWL + "Class")
+        if "not" in expr:
+            self.add(node, OWL + "complementOf", self.expression(expr["not"]))
+            return node
+        for key, predicate in OPERATORS.items():
+            if key in expr:
+                self.add(node, predicate, self.items(expr[key]))
+                return node
+        raise ClassTableError(f"invalid class expression: {expr!r}")
+
+    def items(self, exprs):
+        """Adds an RDF list of class expressions and returns its head."""
+        head = RDF + "nil"
+        for expr in reversed(exprs):
+            node = self.bnode()
+            self.add(node, RDF + "first", self.expression(expr))
+            self.add(node, RDF + "rest", head)
+            head = node
+        return head
+
+    def entry(self, entry):
+        """Adds the triples of table `entry` and returns the IRI of the
+        entity."""
+        if "name" in entry:
+            s = self.iri(entry["name"])
+            self.add(s, RDF + "type", TYPES[entry.get("type", "class")])
+        else:
+            s = self.iri(entry["amend"])
+        for parent in entry.get("parents", ()):
+            self.add(s, RDFS + "subClassOf", self.iri(parent))
+        for expr in entry.get("restrictions", ()):
+            self.add(s, RDFS + "subClassOf", self.expression(expr))
+        for prop, values in entry.get("annotations", {}).items():
+            for value in values:
+                self.literal(s, self.iri(prop), value, RDF + "langString")
+        if "elucidation" in entry:
+            self.add_data(s, self.iri(ELUCIDATION), entry["elucidation"], "@en")
+        return s
+
+
+def load(onto, table):
+    """Writes the triples of class `table` into `onto` in bulk.
+
+    Returns a dict mapping the names of the new entities to the entities."""
+    world = onto.world
+    graph = world.graph
+    triples = _Triples(Names(onto))
+    new = {}
+    for entry in table["entries"]:
+        iri = triples.entry(entry)
+        if "name" in entry:
+            new[entry["name"]] = iri
+
+    # Storids of all IRIs, allocating the missing ones in one go
+    iris = {s for s, _, _ in triples.objs}
+    iris.update(p for _, p, _ in triples.objs)
+    iris.update(o for _, _, o in triples.objs)
+    iris.update(s for s, _, _, _ in triples.datas)
+    iris.update(p for _, p, _, _ in triples.datas)
+    iris.update(d for _, _, _, d in triples.datas if d and not d.startswith("@"))
+    iris = {iri for iri in iris if isinstance(iri, str)}
+    storids = {}
+    ordered = sorted(iris)
+    for i in range(0, len(ordered), 500):
+        chunk = ordered[i : i + 500]
+        storids.update(
+            graph.execute(
+                "SELECT iri, storid FROM resources WHERE iri IN "
+                f"({','.join('?' * len(chunk))})",
+                chunk,
+            )
+        )
+    missing = sorted(iris - storids.keys())
+    if missing:
+        graph.execute(
+            "UPDATE store SET current_resource=current_resource+?", (len(missing),)
+        )
+        (last,) = graph.execute("SELECT current_resource FROM store").fetchone()
+        first = last - len(missing) + 1
+        graph.db.executemany(
+            "INSERT INTO resources VALUES (?,?)",
+            zip(range(first, last + 1), missing),
+        )
+        storids.update(zip(missing, range(first, last + 1)))
+
+    # Blank nodes
+    graph.execute(
+        "UPDATE store SET current_blank=current_blank+?", (triples.bnodes,)
+    )
+    (offset,) = graph.execute("SELECT current_blank FROM store").fetchone()
+    offset -= triples.bnodes
+
+    def term(node):
+        return storids[node] if isinstance(node, str) else node - offset
+
+    def datatype(d):
+        return d if d.startswith("@") else storids[d]
+
+    c = onto.graph.c
+    graph.db.executemany(
+        "INSERT INTO objs VALUES (?,?,?,?)",
+        ((c, term(s), term(p), term(o)) for s, p, o in triples.objs),
+    )
+    graph.db.executemany(
+        "INSERT INTO datas VALUES (?,?,?,?,?)",
+        (
+            (c, term(s), term(p), value, datatype(d))
+            for s, p, value, d in triples.datas
+        ),
+    )
+    return {name: world[iri] for name, iri in new.items()}
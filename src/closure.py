@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transitive closure of the class hierarchy as a bitset matrix.
+
+Questions like "is `LocalCoercivity` a kind of `Coercivity`?" or "all
+descendants of `MagneticAnisotropy`" need many quadstore queries when
+asked through Owlready2.  The build therefore writes the transitive closure
+of the named class hierarchy of MagMO and of the EMMO classes it refers to
+(with all their ancestors) to `magnetic-materials.closure.npz`:
+
+    iris        IRIs of the classes, the index is the class ID
+    labels      prefLabels of the classes
+    ancestors   uint8 array of shape (n, ceil(n / 8)); bit j of row i
+                (little bit order) is set if class j is class i or one of
+                its ancestors
+
+`Closure` loads the file and answers subclass, ancestor, descendant and
+lowest-common-ancestor queries with bit operations, vectorized over arrays
+of class IDs:
+
+    >>> closure = Closure.load("magnetic-materials.closure.npz")
+    >>> closure.is_subclass("LocalCoercivity", "Coercivity")
+    True
+    >>> closure.labels[closure.descendants("Coercivity")]
+    array(['Coercivity', 'CoercivityHc', 'CoercivityBHc', ...], dtype='<U39')
+
+The file is written by the build and the reason step; to write it for a
+snapshot run
+
+    python src/closure.py --database magnetic-materials.sqlite3
+"""
+import argparse
+import collections
+import os
+import sys
+
+import numpy as np
+
+from store_index import OWL, RDF_TYPE, Index
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+
+# Bump if the file format changes
+CLOSURE_VERSION = 1
+
+
+def closure_path(ttlfile):
+    """Returns the closure file belonging to turtle file `ttlfile`."""
+    return f"{os.path.splitext(ttlfile)[0]}.closure.npz"
+
+
+def hierarchy(onto):
+    """Returns a ``(iris, labels, parents)`` tuple with the named classes of
+    MagMO ontology `onto`, the named EMMO classes it refers to and all
+    their ancestors, sorted such that parents come before their children.
+
+    `parents` is a list with the IDs of the named parents of each class,
+    i.e. its superclasses and equivalent classes."""
+    world = onto.world
+    index = Index(world, onto.base_iri)
+    graph = index.graph
+    owl_class = index.storid(OWL + "Class")
+
+    # Named parents as in `Index.parents`, with owl:equivalentClass in both
+    # directions
+    edges = collections.defaultdict(set)
+    for s, parents in index.parents.items():
+        edges[s].update(parents)
+    for s, o in graph.execute(
+        "SELECT s, o FROM objs WHERE p=? AND s>0 AND o>0",
+        (index.storid(OWL + "equivalentClass"),),
+    ):
+        edges[o].add(s)
+
+    classes = {
+        s
+        for (s,) in graph.execute(
+            "SELECT s FROM objs WHERE p=? AND o=? AND s>0",
+            (index.storid(RDF_TYPE), owl_class),
+        )
+    }
+
+    # Named classes referred to by MagMO, directly or through restrictions
+    # and class expressions
+    touched, pending, seen = set(index.types["Class"]), [], set()
+    pending.extend(
+        o
+        for (o,) in graph.execute(
+            "SELECT DISTINCT o FROM objs WHERE c=?", (onto.graph.c,)
+        )
+    )
+    while pending:
+        o = pending.pop()
+        if o > 0:
+            if o in classes:
+                touched.add(o)
+        elif o not in seen:
+            seen.add(o)
+            pending.extend(
+                obj for (obj,) in graph.execute("SELECT o FROM objs WHERE s=?", (o,))
+            )
+    members, pending = set(), list(touched)
+    while pending:
+        s = pending.pop()
+        if s not in members:
+            members.add(s)
+            pending.extend(edges.get(s, ()))
+    members &= classes
+
+    parents = {
+        s: {o for o in edges.get(s, ()) if o in members and o != s}
+        for s in members
+    }
+
+    # Topological order, ties broken by IRI such that the IDs are stable
+    iri = index.iri
+    order, placed = [], set()
+    remaining = sorted(members, key=iri)
+    while remaining:
+        ready = [s for s in remaining if parents[s] <= placed]
+        if not ready:  # cycle, e.g. equivalent classes
+            ready = remaining[:1]
+        order.extend(ready)
+        placed.update(ready)
+        ready = set(ready)
+        remaining = [s for s in remaining if s not in ready]
+    ids = {s: i for i, s in enumerate(order)}
+    return (
+        [iri(s) for s in order],
+        [index.label(s) for s in order],
+        [sorted(ids[p] for p in parents[s]) for s in order],
+    )
+
+
+def ancestor_matrix(parents):
+    """Returns the boolean ancestor matrix of the classes with `parents`.
+
+    The rows are propagated until they do not change any more.  If the
+    classes come in topological order (see `hierarchy()`), this takes one
+    pass plus one to confirm, cycles (e.g. of equivalent classes) take
+    more."""
+    n = len(parents)
+    matrix = np.eye(n, dtype=bool)
+    changed = True
+    while changed:
+        changed = False
+        for i, ids in enumerate(parents):
+            if not ids:
+                continue
+            row = matrix[i] | np.logical_or.reduce(matrix[ids], axis=0)
+            if not np.array_equal(row, matrix[i]):
+                matrix[i] = row
+                changed = True
+    return matrix
+
+
+def write_closure(onto, filename):
+    """Writes the closure of the class hierarchy of `onto` to
+    `filename`."""
+    iris, labels, parents = hierarchy(onto)
+    packed = np.packbits(ancestor_matrix(parents), axis=1, bitorder="little")
+    tmpfile = f"{filename}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(
+        tmpfile,
+        version=np.array(CLOSURE_VERSION),
+        iris=np.array(iris),
+        labels=np.array(labels),
+        ancestors=packed,
+    )
+    os.replace(tmpfile, filename)
+
+
+class Closure:
+    """Transitive closure of a class hierarchy.
+
+    Classes are given by ID, IRI or prefLabel, or by arrays or lists of
+    them.  Queries on arrays are vectorized.
+
+    Parameters
+    ----------
+    iris : sequence of str
+        IRIs of the classes.
+    labels : sequence of str
+        prefLabels of the classes.
+    ancestors : numpy.ndarray
+        Packed ancestor bitsets, see the module documentation.
+    """
+
+    def __init__(self, iris, labels, ancestors):
+        self.iris = np.asarray(iris)
+        self.labels = np.asarray(labels)
+        self.packed = np.asarray(ancestors, dtype=np.uint8)
+        self.size = len(self.iris)
+        self._matrix = self._strict = None
+        self.names = {}
+        for i, label in enumerate(self.labels.tolist()):
+            self.names.setdefault(label, i)
+        for i, iri in enumerate(self.iris.tolist()):
+            self.names[iri] = i
+
+    @classmethod
+    def load(cls, filename):
+        """Returns the closure stored in `filename`."""
+        with np.load(filename) as data:
+            if int(data["version"]) != CLOSURE_VERSION:
+                raise ValueError(
+                    f"{filename!r} has closure version {int(data['version'])}, "
+                    f"expected {CLOSURE_VERSION}"
+                )
+            return cls(data["iris"], data["labels"], data["ancestors"])
+
+    @property
+    def matrix(self):
+        """Boolean ancestor matrix: ``matrix[i, j]`` is true if `j` is `i`
+        or one of its ancestors."""
+        if self._matrix is None:
+            self._matrix = np.unpackbits(
+                self.packed, axis=1, count=self.size, bitorder="little"
+            ).view(bool)
+        return self._matrix
+
+    def ids(self, classes):
+        """Returns the ID or array of IDs of `classes`.  Raises KeyError
+        for unknown classes."""
+        if isinstance(classes, str):
+            return self.names[classes]
+        if isinstance(classes, (int, np.integer)):
+            return int(classes)
+        array = np.asarray(classes)
+        if array.dtype.kind in "iu":
+            return array
+        return np.array(
+            [self.names[name] for name in array.ravel().tolist()], dtype=np.intp
+        ).reshape(array.shape)
+
+    def is_subclass(self, sub, sup):
+        """Returns whether `sub` is `sup` or one of its descendants.
+
+        `sub` and `sup` are broadcast against each other, e.g. a batch of
+        classes can be checked against one class."""
+        sub, sup = self.ids(sub), self.ids(sup)
+        bits = self.packed[sub, np.right_shift(sup, 3)] >> np.bitwise_and(sup, 7)
+        result = np.bitwise_and(bits, 1).astype(bool)
+        return bool(result) if result.ndim == 0 else result
+
+    def ancestor_mask(self, classes):
+        """Returns the boolean masks of the ancestors of `classes`,
+        including themselves."""
+        return self.matrix[self.ids(classes)]
+
+    def descendant_mask(self, classes):
+        """Returns the boolean masks of the descendants of `classes`,
+        including themselves."""
+        return self.matrix[:, self.ids(classes)].T
+
+    def ancestors(self, cls):
+        """Returns the IDs of the ancestors of `cls`, including itself."""
+        return np.flatnonzero(self.ancestor_mask(cls))
+
+    def descendants(self, cls):
+        """Returns the IDs of the descendants of `cls`, including
+        itself."""
+        return np.flatnonzero(self.descendant_mask(cls))
+
+    def lca_mask(self, first, second):
+        """Returns the boolean masks of the lowest common ancestors of the
+        pairs of classes in `first` and `second`, i.e. the common ancestors
+        that are not an ancestor of another common ancestor."""
+        common = self.ancestor_mask(first) & self.ancestor_mask(second)
+        if self._strict is None:
+            strict = self.matrix & ~np.eye(self.size, dtype=bool)
+            self._strict = strict.astype(np.float32)
+        above = (common.astype(np.float32) @ self._strict) > 0
+        return common & ~above
+
+    def lca(self, first, second):
+        """Returns the IDs of the lowest common ancestors of classes
+        `first` and `second`."""
+        return np.flatnonzero(self.lca_mask(self.ids(first), self.ids(second)))
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        default=closure_path("magnetic-materials.ttl"),
+        help="Closure file to write. Default: %(default)s",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        onto = get_snapshot_ontology(args.database, args.iri)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+    write_closure(onto, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
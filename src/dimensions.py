@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index of dimension strings and vectorized dimension algebra.
+
+EMMO gives the dimension of a unit as a `hasDimensionString` value like
+``"T-2 L-1 M+1 I0 Θ0 N0 J0"``.  The build parses these strings once into
+int8 vectors of the exponents of the seven base quantities (in the order
+T, L, M, I, Θ, N, J) and writes, next to the turtle file,
+`magnetic-materials.dimensions.npz`:
+
+    strings            the distinct dimension strings
+    vectors            int8 array (n, 7) of their exponents
+    units              IRIs of the unit classes with a dimension
+    unit_labels        their prefLabels
+    unit_dimension     index into `strings` of each unit
+    quantities         IRIs of the quantities with a known unit
+    quantity_labels    their prefLabels
+    quantity_dimension index into `strings` of each quantity
+
+`Dimensions` loads the file.  Dimensions are given as strings, as int8
+vectors, as labels or IRIs of units and quantities, or as arrays of any of
+these, and `multiply()`, `divide()`, `power()`, `equal()`, `string()`,
+`quantities_with()` and `units_with()` work on whole arrays at once.
+Exponents are computed in a wider type, and results outside of the int8
+range raise a ValueError instead of wrapping around:
+
+    >>> dims = Dimensions.load("magnetic-materials.dimensions.npz")
+    >>> dims.quantities_with(dims.divide("EnergyUnit", dims.power("LengthUnit", 3)))
+    ['EnergyDensity', 'MagnetocrystallineAnisotropyConstantK1', ...]
+    >>> dims.compatible(column_units, "AmperePerMetre")
+    array([ True,  True, False, ...])
+
+The file is written by the build and the reason step; to write it for a
+snapshot run
+
+    python src/dimensions.py --database magnetic-materials.sqlite3
+"""
+import argparse
+import collections
+import os
+import sys
+
+import numpy as np
+
+from store_index import OWL
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+from units import BASE_QUANTITIES, UnitIndex, parse_dimension, unit_table
+
+# Bump if the file format changes
+DIMENSIONS_VERSION = 1
+
+# Range of the exponents
+EXPONENTS = np.iinfo(np.int8)
+
+
+def dimensions_path(ttlfile):
+    """Returns the dimension index belonging to turtle file `ttlfile`."""
+    return f"{os.path.splitext(ttlfile)[0]}.dimensions.npz"
+
+
+def exponents(values):
+    """Returns the integer exponents `values` as an int8 array.  Raises
+    ValueError if one of them is outside of the int8 range."""
+    values = np.asarray(values)
+    if values.dtype.kind not in "iu":
+        raise ValueError(f"dimension exponents must be integers, not {values.dtype}")
+    if values.size and (values.min() < EXPONENTS.min or values.max() > EXPONENTS.max):
+        raise ValueError(
+            f"dimension exponent out of range [{EXPONENTS.min}, {EXPONENTS.max}]"
+        )
+    return values.astype(np.int8, copy=False)
+
+
+def multiply(first, second):
+    """Returns the dimensions of the products of `first` and `second`,
+    int8 exponent vectors or arrays of them."""
+    return exponents(np.add(first, second, dtype=np.int64))
+
+
+def divide(first, second):
+    """Returns the dimensions of the quotients of `first` and `second`."""
+    return exponents(np.subtract(first, second, dtype=np.int64))
+
+
+def power(dimension, exponent):
+    """Returns `dimension` raised to the integer `exponent`."""
+    if not isinstance(exponent, (int, np.integer)):
+        raise ValueError(f"dimension exponent must be an integer, not {exponent!r}")
+    return exponents(np.multiply(dimension, int(exponent), dtype=np.int64))
+
+
+def equal(first, second):
+    """Returns whether the dimensions `first` and `second` are equal,
+    along the last axis."""
+    return np.all(np.equal(first, second), axis=-1)
+
+
+def _parse_new(name):
+    """Returns the exponent vector of dimension string `name`, which must
+    only contain base quantities, each at most once.  Raises KeyError if it
+    is not a dimension string."""
+    if not isinstance(name, str):
+        raise KeyError(name)
+    symbols = [part[:1] for part in name.split()]
+    if (
+        not symbols
+        or any(symbol not in BASE_QUANTITIES and symbol != "H" for symbol in symbols)
+        or len({"Θ" if symbol == "H" else symbol for symbol in symbols})
+        != len(symbols)
+    ):
+        raise KeyError(name)
+    try:
+        return parse_dimension(name)
+    except ValueError:
+        raise KeyError(name) from None
+
+
+def format_dimension(vector):
+    """Returns the dimension string of exponent vector `vector`."""
+    return " ".join(
+        f"{symbol}{exponent:+d}" if exponent else f"{symbol}0"
+        for symbol, exponent in zip(BASE_QUANTITIES, vector.tolist())
+    )
+
+
+def dimension_index(onto, table=None):
+    """Returns a dict with the arrays of the dimension index of `onto`.
+
+    `table` is the unit table of `onto` (see `units.unit_table()`) and is
+    computed if not given."""
+    # pylint: disable=too-many-locals
+    index = UnitIndex(onto.world, onto.base_iri)
+    graph = index.graph
+    table = table or unit_table(onto)
+
+    # Unit classes with a dimension restriction and their descendants
+    restricted = {
+        s
+        for (s,) in graph.execute(
+            "SELECT DISTINCT objs.s FROM objs JOIN objs AS r ON objs.o=r.s "
+            "WHERE objs.o<0 AND r.p=? AND r.o=?",
+            (index.storid(OWL + "onProperty"), index.dimension_string),
+        )
+        if s > 0
+    }
+    units, pending = set(), list(restricted)
+    while pending:
+        s = pending.pop()
+        if s not in units:
+            units.add(s)
+            pending.extend(index.children.get(s, ()))
+
+    strings = {}
+    unit_rows = []
+    for s in sorted(units, key=lambda s: (index.label(s), s)):
+        dimension = index.dimension(s)
+        if dimension:
+            strings.setdefault(dimension, len(strings))
+            unit_rows.append((index.iri(s), index.label(s), strings[dimension]))
+    quantity_rows = []
+    for iri, row in sorted(table["quantities"].items(), key=lambda x: x[1][0]):
+        if row[1]:
+            strings.setdefault(row[1], len(strings))
+            quantity_rows.append((iri, row[0], strings[row[1]]))
+
+    return {
+        "version": np.array(DIMENSIONS_VERSION),
+        "strings": np.array(list(strings), dtype=str),
+        "vectors": np.array(
+            [parse_dimension(string) for string in strings], dtype=np.int8
+        ).reshape(-1, len(BASE_QUANTITIES)),
+        "units": np.array([row[0] for row in unit_rows], dtype=str),
+        "unit_labels": np.array([row[1] for row in unit_rows], dtype=str),
+        "unit_dimension": np.array([row[2] for row in unit_rows], dtype=np.int32),
+        "quantities": np.array([row[0] for row in quantity_rows], dtype=str),
+        "quantity_labels": np.array([row[1] for row in quantity_rows], dtype=str),
+        "quantity_dimension": np.array(
+            [row[2] for row in quantity_rows], dtype=np.int32
+        ),
+    }
+
+
+def write_dimensions(onto, filename, table=None):
+    """Writes the dimension index of `onto` to `filename`."""
+    tmpfile = f"{filename}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmpfile, **dimension_index(onto, table))
+    os.replace(tmpfile, filename)
+
+
+class Dimensions:
+    """Dimensions of the units and quantities of an ontology.
+
+    Parameters
+    ----------
+    arrays : mapping
+        The arrays of the dimension index, see the module documentation.
+    """
+
+    def __init__(self, arrays):
+        self.strings = arrays["strings"]
+        self.vectors = np.asarray(arrays["vectors"], dtype=np.int8)
+        self.units = arrays["units"]
+        self.unit_labels = arrays["unit_labels"]
+        self.unit_dimension = arrays["unit_dimension"]
+        self.quantities = arrays["quantities"]
+        self.quantity_labels = arrays["quantity_labels"]
+        self.quantity_dimension = arrays["quantity_dimension"]
+
+        # Dimension strings, labels and IRIs by row in `vectors`
+        self.names = {string: i for i, string in enumerate(self.strings.tolist())}
+        for names, rows in (
+            (self.unit_labels, self.unit_dimension),
+            (self.units, self.unit_dimension),
+            (self.quantity_labels, self.quantity_dimension),
+            (self.quantities, self.quantity_dimension),
+        ):
+            for name, row in zip(names.tolist(), rows.tolist()):
+                self.names.setdefault(name, row)
+
+        # Labels of the quantities and units by canonical dimension string
+        canonical = [format_dimension(vector) for vector in self.vectors]
+        self.by_dimension = collections.defaultdict(lambda: ([], []))
+        for label, row in zip(self.quantity_labels.tolist(), self.quantity_dimension):
+            self.by_dimension[canonical[row]][0].append(label)
+        for label, row in zip(self.unit_labels.tolist(), self.unit_dimension):
+            self.by_dimension[canonical[row]][1].append(label)
+
+    @classmethod
+    def load(cls, filename):
+        """Returns the dimension index stored in `filename`."""
+        with np.load(filename) as data:
+            if int(data["version"]) != DIMENSIONS_VERSION:
+                raise ValueError(
+                    f"{filename!r} has dimension index version "
+                    f"{int(data['version'])}, expected {DIMENSIONS_VERSION}"
+                )
+            return cls({key: data[key] for key in data.files})
+
+    def vector(self, dimensions):
+        """Returns the int8 exponent vectors of `dimensions`, which are
+        given as dimension strings, labels or IRIs of units or quantities,
+        or exponent vectors, or arrays of any of these."""
+        array = np.asarray(dimensions)
+        if array.dtype.kind in "iu":
+            return exponents(array)
+        names = array.ravel().tolist()
+
+        # Dimension strings that are not in the index are added at once
+        new = {}
+        for name in names:
+            if name not in self.names and name not in new:
+                new[name] = _parse_new(name)
+        if new:
+            vectors = exponents(np.array(list(new.values()), dtype=np.int64))
+            for row, name in enumerate(new, start=len(self.vectors)):
+                self.names[name] = row
+            self.vectors = np.concatenate([self.vectors, vectors])
+            self.strings = np.append(self.strings, list(new))
+
+        rows = np.array([self.names[name] for name in names], dtype=np.intp)
+        return self.vectors[rows].reshape(
+            (*array.shape, len(BASE_QUANTITIES))
+        )
+
+    def multiply(self, first, second):
+        """Returns the dimensions of the products of `first` and `second`."""
+        return multiply(self.vector(first), self.vector(second))
+
+    def divide(self, first, second):
+        """Returns the dimensions of the quotients of `first` and
+        `second`."""
+        return divide(self.vector(first), self.vector(second))
+
+    def power(self, dimension, exponent):
+        """Returns `dimension` raised to the integer `exponent`."""
+        return power(self.vector(dimension), exponent)
+
+    def equal(self, first, second):
+        """Returns whether the dimensions of `first` and `second` are
+        equal."""
+        return equal(self.vector(first), self.vector(second))
+
+    compatible = equal
+
+    def string(self, dimension):
+        """Returns the dimension string of `dimension`, or an array of the
+        strings of an array of dimensions."""
+        vectors = self.vector(dimension)
+        strings = [format_dimension(vector) for vector in vectors.reshape(-1, len(BASE_QUANTITIES))]
+        if vectors.ndim == 1:
+            return strings[0]
+        return np.array(strings).reshape(vectors.shape[:-1])
+
+    def _labels(self, dimension, column):
+        """Returns the labels in column `column` of `by_dimension` for
+        `dimension`, or nested lists of them for an array of dimensions."""
+
+        def labels(strings):
+            if isinstance(strings, str):
+                return list(self.by_dimension.get(strings, ([], []))[column])
+            return [labels(string) for string in strings]
+
+        strings = self.string(dimension)
+        return labels(strings if isinstance(strings, str) else strings.tolist())
+
+    def quantities_with(self, dimension):
+        """Returns the labels of the quantities with `dimension`, or a list
+        of them for each dimension in an array of dimensions."""
+        return self._labels(dimension, 0)
+
+    def units_with(self, dimension):
+        """Returns the labels of the unit classes with `dimension`, or a
+        list of them for each dimension in an array of dimensions."""
+        return self._labels(dimension, 1)
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        default=dimensions_path("magnetic-materials.ttl"),
+        help="Dimension index to write. Default: %(default)s",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        onto = get_snapshot_ontology(args.database, args.iri)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+    write_dimensions(onto, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
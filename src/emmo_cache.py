@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed local cache of parsed EMMO quadstores.
+
+Parsing the inferred EMMO is by far the most expensive part of
+`build_onto.py`.  This module stores the already parsed EMMO as an
+Owlready2 sqlite3 quadstore, keyed by the ontology IRI, its version and
+the sha256 of the source document.  Later builds attach a copy of the
+stored quadstore instead of fetching and parsing EMMO again, which also
+allows fully offline builds once the cache is populated.
+
+Cache layout (below `cachedir`):
+
+    index.json               maps cache keys to entries
+    sources/<sha256>.<ext>   verbatim copies of the fetched source documents
+    stores/<key>.sqlite3     parsed quadstores
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.request
+
+import owlready2
+from ontopy import World
+
+rootdir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+# Default cache directory.  May be overridden with the MAGMO_CACHE_DIR
+# environment variable or the `cachedir` argument.
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MAGMO_CACHE_DIR", os.path.join(rootdir, ".cache")
+)
+
+# File extensions for content types returned when fetching an ontology
+_EXTENSIONS = {
+    "text/turtle": "ttl",
+    "application/rdf+xml": "rdf",
+    "application/n-triples": "nt",
+}
+
+
+class EmmoCacheError(Exception):
+    """Raised when EMMO can neither be found in the cache nor fetched."""
+
+
+def file_digest(path, chunksize=1 << 20):
+    """Returns the sha256 hex digest of the file `path`."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunksize), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def cache_key(iri, version, digest):
+    """Returns the cache key for source `digest` of ontology `iri` of
+    given `version`.
+
+    The Owlready2 version is part of the key, since the quadstore layout
+    is not guaranteed to be stable between Owlready2 releases."""
+    text = "\n".join([iri, version, digest, str(owlready2.VERSION)])
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+def mark_loaded(onto):
+    """Mark ontology `onto` restored from a quadstore as loaded.
+
+    This performs the same post-load setup as `ontopy.Ontology.load()`
+    without parsing anything."""
+    top = onto.world["http://www.w3.org/2002/07/owl#topObjectProperty"]
+    onto.loaded = True
+    onto._special_labels = {  # pylint: disable=protected-access
+        "Thing": owlready2.Thing,
+        "Nothing": owlready2.Nothing,
+        "topObjectProperty": top,
+        "owl:Thing": owlready2.Thing,
+        "owl:Nothing": owlready2.Nothing,
+        "owl:topObjectProperty": top,
+    }
+    onto.prefix = onto.name
+    onto.set_common_prefix()
+    return onto
+
+
+class EmmoCache:
+    """A persistent cache of parsed ontologies.
+
+    Parameters
+    ----------
+    cachedir : str
+        Cache directory.  Created if it does not exist.
+    """
+
+    def __init__(self, cachedir=DEFAULT_CACHE_DIR):
+        self.cachedir = os.path.abspath(cachedir)
+        self.indexfile = os.path.join(self.cachedir, "index.json")
+        self.sourcedir = os.path.join(self.cachedir, "sources")
+        self.storedir = os.path.join(self.cachedir, "stores")
+
+    def _read_index(self):
+        if not os.path.exists(self.indexfile):
+            return {}
+        with open(self.indexfile, "rt", encoding="utf8") as handle:
+            return json.load(handle)
+
+    def _write_index(self, index):
+        os.makedirs(self.cachedir, exist_ok=True)
+        tmpfile = f"{self.indexfile}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump(index, handle, indent=2, sort_keys=True)
+        os.replace(tmpfile, self.indexfile)
+
+    def lookup(self, iri, version, digest=None):
+        """Returns the cache entry for `iri` and `version`, or None.
+
+        If `digest` is given, only an entry for exactly that source
+        document is returned.  Otherwise the most recently stored entry
+        is returned."""
+        entries = [
+            entry
+            for key, entry in self._read_index().items()
+            if entry["iri"] == iri
+            and entry["version"] == version
+            and (digest is None or entry["sha256"] == digest)
+            and key == cache_key(iri, version, entry["sha256"])
+            and os.path.exists(os.path.join(self.storedir, entry["store"]))
+        ]
+        if not entries:
+            return None
+        return max(entries, key=lambda entry: entry["created"])
+
+    def entry(self, key):
+        """Returns the cache entry with `key`, or None."""
+        entry = self._read_index().get(key)
+        if entry is None or not os.path.exists(
+            os.path.join(self.storedir, entry["store"])
+        ):
+            return None
+        return entry
+
+    def fetch(self, iri):
+        """Downloads `iri` into the source directory and returns the
+        path to the downloaded document."""
+        request = urllib.request.Request(
+            iri,
+            headers={
+                "Accept": "text/turtle, application/rdf+xml;q=0.9, "
+                "application/n-triples;q=0.8"
+            },
+        )
+        os.makedirs(self.sourcedir, exist_ok=True)
+        with urllib.request.urlopen(request) as response:  # nosec
+            ctype = response.headers.get_content_type()
+            url = response.geturl()
+            ext = _EXTENSIONS.get(ctype, os.path.splitext(url)[1].lstrip("."))
+            with tempfile.NamedTemporaryFile(
+                dir=self.sourcedir, delete=False
+            ) as handle:
+                shutil.copyfileobj(response, handle)
+        digest = file_digest(handle.name)
+        path = os.path.join(self.sourcedir, f"{digest}.{ext or 'ttl'}")
+        os.replace(handle.name, path)
+        return path
+
+    def store(self, iri, version, source):
+        """Parses `source` as ontology `iri` and stores the resulting
+        quadstore in the cache.  Returns the new cache entry."""
+        digest = file_digest(source)
+        key = cache_key(iri, version, digest)
+        os.makedirs(self.storedir, exist_ok=True)
+        storefile = os.path.join(self.storedir, f"{key}.sqlite3")
+        tmpfile = f"{storefile}.{os.getpid()}.tmp"
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+
+        world = World(filename=tmpfile)
+        onto = world.get_ontology(iri).load(filename=source)
+        entry = {
+            "iri": iri,
+            "version": version,
+            "sha256": digest,
+            "base_iri": onto.base_iri,
+            "source": os.path.abspath(source),
+            "store": os.path.basename(storefile),
+            "owlready2": str(owlready2.VERSION),
+            "created": time.time(),
+        }
+        world.save()
+        world.close()
+        os.replace(tmpfile, storefile)
+
+        index = self._read_index()
+        index[key] = entry
+        self._write_index(index)
+        return entry
+
+    def attach(self, entry, filename):
+        """Copies the quadstore of cache `entry` to `filename` and opens it.
+
+        Returns a ``(world, onto)`` tuple, where `onto` is the cached
+        ontology ready for use."""
+        if os.path.exists(filename):
+            os.remove(filename)
+        shutil.copyfile(os.path.join(self.storedir, entry["store"]), filename)
+        world = World(filename=filename)
+        onto = world.get_ontology(entry["base_iri"])
+        return world, mark_loaded(onto)
+
+
+def emmo_entry(
+    iri,
+    version,
+    *,
+    cachedir=DEFAULT_CACHE_DIR,
+    source=None,
+    offline=False,
+    refresh=False,
+):
+    """Returns the cache entry of EMMO, storing EMMO in the cache first if
+    needed.  Open it in a new world with `EmmoCache.attach()`.
+
+    Parameters
+    ----------
+    iri : str
+        IRI of the EMMO version to load.
+    version : str
+        EMMO version.  Part of the cache key.
+    cachedir : str
+        Cache directory.
+    source : str
+        Local copy of the EMMO source document.  If given, the cache is
+        looked up by the sha256 of this file and `iri` is never fetched.
+    offline : bool
+        Whether to fail instead of fetching `iri` on a cache miss.
+    refresh : bool
+        Whether to ignore cached entries and fetch `iri` again.
+    """
+    cache = EmmoCache(cachedir)
+    if source:
+        entry = cache.lookup(iri, version, file_digest(source))
+        if entry is None:
+            entry = cache.store(iri, version, source)
+    else:
+        entry = None if refresh else cache.lookup(iri, version)
+        if entry is None:
+            if offline:
+                raise EmmoCacheError(
+                    f"{iri} (version {version}) is not in the cache "
+                    f"{cache.cachedir!r}.  Build once online or pass a local "
+                    "copy of the source document."
+                )
+            entry = cache.store(iri, version, cache.fetch(iri))
+    return entry
@@ -0,0 +1,638 @@
+# -*- coding: utf-8 -*-
+"""
+Single-pass export of an ontology to several RDF serialisations.
+
+`export()` walks the triples of an ontology in the quadstore once, one
+subject at a time, and hands each subject to a writer for every requested
+format:
+
+    ttl      Turtle
+    nt       N-Triples
+    rdf      RDF/XML
+    jsonld   JSON-LD
+
+Each output is streamed to disk and can optionally be gzip-compressed on
+the fly.  The output is deterministic:
+
+- subjects are sorted by IRI, predicates by IRI (with ``rdf:type``
+  first) and objects by their N-Triples representation
+- blank nodes that are referred to once are written inline (or as a
+  collection for RDF lists), other blank nodes get a label derived from
+  their content
+
+Identical triples hence always give byte-identical files, independent of
+the order in which they were added to the quadstore.
+"""
+import collections
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+from xml.sax.saxutils import escape as xml_escape
+from xml.sax.saxutils import quoteattr
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDF_TYPE = RDF + "type"
+RDF_FIRST = RDF + "first"
+RDF_REST = RDF + "rest"
+RDF_NIL = RDF + "nil"
+XSD_BOOLEAN = "http://www.w3.org/2001/XMLSchema#boolean"
+
+# Prefixes that are always declared
+DEFAULT_NAMESPACES = {
+    "dcterms": "http://purl.org/dc/terms/",
+    "owl": "http://www.w3.org/2002/07/owl#",
+    "rdf": RDF,
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "skos": "http://www.w3.org/2004/02/skos/core#",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+}
+
+# A literal.  `lang` is empty for literals without language tag.
+Literal = collections.namedtuple("Literal", "value datatype lang")
+
+# A blank node.  `props` is None for a reference to a labelled blank node
+# and otherwise the list of properties of a blank node written inline.
+BNode = collections.namedtuple("BNode", "label props")
+
+# An RDF list written as a collection
+Collection = collections.namedtuple("Collection", "items")
+
+# Local names that can be written as prefixed names (a conservative
+# subset of PN_LOCAL in Turtle and NCName in XML)
+_LOCAL_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*$")
+
+_ESCAPES = {
+    "\\": "\\\\",
+    '"': '\\"',
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+}
+_ESCAPE = re.compile(r'[\\"\n\r\t]')
+
+INDENT = "    "
+
+
+def _escape(text):
+    return _ESCAPE.sub(lambda match: _ESCAPES[match.group()], text)
+
+
+def split_iri(iri):
+    """Splits `iri` into a ``(namespace, local name)`` tuple."""
+    for sep in "#/":
+        if sep in iri:
+            ns, name = iri.rsplit(sep, 1)
+            if _LOCAL_NAME.match(name):
+                return ns + sep, name
+    return iri, ""
+
+
+def key(obj):
+    """Returns the canonical N-Triples-like sort key of object `obj`."""
+    if isinstance(obj, Literal):
+        if obj.lang:
+            return f'"{_escape(obj.value)}"@{obj.lang}'
+        if obj.datatype:
+            return f'"{_escape(obj.value)}"^^<{obj.datatype}>'
+        return f'"{_escape(obj.value)}"'
+    if isinstance(obj, BNode):
+        if obj.props is None:
+            return obj.label
+        return "[" + " ; ".join(
+            f"<{p}> " + ", ".join(key(o) for o in objects)
+            for p, objects in obj.props
+        ) + "]"
+    if isinstance(obj, Collection):
+        return "(" + " ".join(key(item) for item in obj.items) + ")"
+    return f"<{obj}>"
+
+
+class TripleWalker:
+    """Walks the triples of ontology `onto` in canonical order.
+
+    Only the triples in the graph of `onto` are visited, not those of its
+    imports.  Iterating over the walker yields ``(subject, props)``
+    tuples, where `subject` is an IRI or a labelled `BNode` and `props` is
+    a sorted list of ``(predicate IRI, [objects])`` tuples.  Objects are
+    IRIs (str), `Literal`, `BNode` or `Collection` instances.
+    """
+
+    def __init__(self, onto):
+        self.onto = onto
+        self.graph = onto.world.graph
+        self.c = onto.graph.c
+        self._iris = {}
+        self._labels = {}
+        self._refcounts = dict(
+            self.graph.execute(
+                "SELECT o, COUNT(*) FROM objs WHERE c=? AND o<0 GROUP BY o",
+                (self.c,),
+            )
+        )
+
+        # Use the ontology IRI given to ontopy for the ontology header
+        stored = onto.base_iri.rstrip("#/")
+        self._rename = {stored: onto.iri} if getattr(onto, "iri", None) else {}
+
+    def iri(self, storid):
+        """Returns the full IRI of resource `storid`."""
+        if storid not in self._iris:
+            iri = self.graph._unabbreviate(storid)  # pylint: disable=W0212
+            self._iris[storid] = self._rename.get(iri, iri)
+        return self._iris[storid]
+
+    def predicates(self):
+        """Returns a sorted list with the IRIs of all predicates."""
+        return sorted(
+            self.iri(p)
+            for (p,) in self.graph.execute(
+                "SELECT DISTINCT p FROM quads WHERE c=?", (self.c,)
+            )
+        )
+
+    def literal(self, o, d):
+        """Returns a `Literal` for the value `o` with datatype or language
+        `d` as stored by Owlready2."""
+        if isinstance(d, str):
+            return Literal(str(o), "", d[1:])
+        if not d:
+            return Literal(str(o), "", "")
+        datatype = self.iri(d)
+        if datatype == XSD_BOOLEAN:
+            o = "true" if o in (True, 1, "true", "True") else "false"
+        return Literal(str(o), datatype, "")
+
+    def properties(self, s):
+        """Returns a sorted list of ``(predicate, [objects])`` tuples
+        describing subject `s`."""
+        grouped = {}
+        for p, o in self.graph.execute(
+            "SELECT p, o FROM objs WHERE c=? AND s=?", (self.c, s)
+        ):
+            grouped.setdefault(self.iri(p), []).append(self.node(o))
+        for p, o, d in self.graph.execute(
+            "SELECT p, o, d FROM datas WHERE c=? AND s=?", (self.c, s)
+        ):
+            grouped.setdefault(self.iri(p), []).append(self.literal(o, d))
+        return sorted(
+            ((p, sorted(objects, key=key)) for p, objects in grouped.items()),
+            key=lambda item: (item[0] != RDF_TYPE, item[0]),
+        )
+
+    def node(self, storid):
+        """Returns resource `storid` used as an object."""
+        if storid >= 0:
+            return self.iri(storid)
+        if self._refcounts.get(storid, 0) != 1:
+            return BNode(self.label(storid), None)
+        items = self.collection(storid)
+        if items is not None:
+            return Collection(items)
+        return BNode(None, self.properties(storid))
+
+    def collection(self, storid):
+        """Returns the items of the RDF list starting at blank node
+        `storid`, or None if it is not a well-formed list that can be
+        written as a collection."""
+        items = []
+        while storid is not None:
+            if items and self._refcounts.get(storid, 0) != 1:
+                return None
+            first, rest = [], []
+            for p, o in self.graph.execute(
+                "SELECT p, o FROM objs WHERE c=? AND s=?", (self.c, storid)
+            ):
+                iri = self.iri(p)
+                if iri == RDF_FIRST:
+                    first.append(self.node(o))
+                elif iri == RDF_REST:
+                    rest.append(o)
+                else:
+                    return None
+            for _ in self.graph.execute(
+                "SELECT p, o, d FROM datas WHERE c=? AND s=?", (self.c, storid)
+            ):
+                return None  # literal list items are not used in OWL
+            if len(first) != 1 or len(rest) != 1:
+                return None
+            items.append(first[0])
+            if rest[0] >= 0:
+                if self.iri(rest[0]) != RDF_NIL:
+                    return None
+                storid = None
+            else:
+                storid = rest[0]
+        return items
+
+    def label(self, storid):
+        """Returns a stable label for blank node `storid` derived from
+        the triples describing it."""
+        if storid not in self._labels:
+            self._labels[storid] = "_:b"  # guard against cycles
+            text = key(BNode(None, self.properties(storid)))
+            self._labels[storid] = (
+                "_:b" + hashlib.sha256(text.encode()).hexdigest()[:16]
+            )
+        return self._labels[storid]
+
+    def __iter__(self):
+        for s, _ in self.graph.execute(
+            "SELECT DISTINCT q.s, r.iri FROM quads q, resources r "
+            "WHERE q.c=? AND q.s=r.storid ORDER BY r.iri",
+            (self.c,),
+        ):
+            props = self.properties(s)
+            if props:
+                yield self.iri(s), props
+
+        # Blank nodes that are not written inline, e.g. axiom annotations
+        labelled = sorted(
+            (self.label(s), s)
+            for (s,) in self.graph.execute(
+                "SELECT DISTINCT s FROM quads WHERE c=? AND s<0", (self.c,)
+            )
+            if self._refcounts.get(s, 0) != 1
+        )
+        for label, s in labelled:
+            yield BNode(label, None), self.properties(s)
+
+
+class Writer:
+    """Base class for format writers.
+
+    Parameters
+    ----------
+    handle : file object
+        Text file to write to.
+    namespaces : dict
+        Mapping of prefixes to namespaces.
+    predicates : list
+        IRIs of all predicates that will be written.
+    """
+
+    def __init__(self, handle, namespaces, predicates):
+        self.handle = handle
+        self.namespaces = namespaces
+        self.predicates = predicates
+        # Longest namespaces first, such that the most specific matches
+        self._prefixes = sorted(
+            ((ns, prefix) for prefix, ns in namespaces.items()),
+            key=lambda item: (-len(item[0]), item[1]),
+        )
+
+    def prefixed(self, iri):
+        """Returns `iri` as a ``(prefix, local name)`` tuple or None."""
+        for ns, prefix in self._prefixes:
+            if iri.startswith(ns) and _LOCAL_NAME.match(iri[len(ns) :]):
+                return prefix, iri[len(ns) :]
+        return None
+
+    def begin(self):
+        """Writes the header."""
+
+    def subject(self, subject, props):
+        """Writes all `props` of `subject`."""
+        raise NotImplementedError
+
+    def end(self):
+        """Writes the footer."""
+
+
+class TurtleWriter(Writer):
+    """Writes Turtle."""
+
+    def qname(self, iri):
+        """Returns `iri` as a prefixed name or IRI reference."""
+        prefixed = self.prefixed(iri)
+        if prefixed:
+            return ":".join(prefixed)
+        return f"<{_escape(iri)}>"
+
+    def term(self, obj):
+        """Returns the Turtle representation of `obj`."""
+        if isinstance(obj, Literal):
+            text = f'"{_escape(obj.value)}"'
+            if obj.lang:
+                return f"{text}@{obj.lang}"
+            if obj.datatype:
+                return f"{text}^^{self.qname(obj.datatype)}"
+            return text
+        if isinstance(obj, BNode):
+            if obj.props is None:
+                return obj.label
+            if not obj.props:
+                return "[]"
+            return "[ " + " ; ".join(self.props(obj.props)) + " ]"
+        if isinstance(obj, Collection):
+            return "( " + " ".join(self.term(item) for item in obj.items) + " )"
+        return self.qname(obj)
+
+    def props(self, props, sep=", "):
+        """Returns a list with `props` as Turtle predicate-object lists."""
+        return [
+            ("a" if p == RDF_TYPE else self.qname(p))
+            + " "
+            + sep.join(self.term(o) for o in objects)
+            for p, objects in props
+        ]
+
+    def begin(self):
+        for prefix, ns in sorted(self.namespaces.items()):
+            self.handle.write(f"@prefix {prefix}: <{ns}> .\n")
+        self.handle.write("\n")
+
+    def subject(self, subject, props):
+        head = subject.label if isinstance(subject, BNode) else self.qname(subject)
+        lines = self.props(props, sep=f",\n{INDENT}{INDENT}")
+        self.handle.write(
+            f"{head} " + f" ;\n{INDENT}".join(lines) + " .\n\n"
+        )
+
+
+class NTriplesWriter(Writer):
+    """Writes N-Triples.  Inline blank nodes get sequential labels."""
+
+    def __init__(self, handle, namespaces, predicates):
+        super().__init__(handle, namespaces, predicates)
+        self._counter = 0
+
+    def _bnode(self):
+        self._counter += 1
+        return f"_:n{self._counter}"
+
+    def term(self, obj, pending):
+        """Returns the N-Triples term for `obj`.  Triples describing
+        inline blank nodes are appended to `pending`."""
+        if isinstance(obj, Literal):
+            return key(obj)
+        if isinstance(obj, BNode):
+            if obj.props is None:
+                return obj.label
+            label = self._bnode()
+            pending.append((label, obj.props))
+            return label
+        if isinstance(obj, Collection):
+            head = RDF_NIL
+            for item in reversed(obj.items):
+                label = self._bnode()
+                pending.append((label, [(RDF_FIRST, [item]), (RDF_REST, [head])]))
+                head = BNode(label, None)
+            return self.term(head, pending)
+        return f"<{obj}>"
+
+    def subject(self, subject, props):
+        head = subject.label if isinstance(subject, BNode) else f"<{subject}>"
+        pending = collections.deque([(head, props)])
+        while pending:
+            s, props = pending.popleft()
+            for p, objects in props:
+                for obj in objects:
+                    self.handle.write(f"{s} <{p}> {self.term(obj, pending)} .\n")
+
+
+class RdfXmlWriter(Writer):
+    """Writes RDF/XML."""
+
+    def __init__(self, handle, namespaces, predicates):
+        namespaces = dict(namespaces)
+        namespaces.pop("", None)
+        for iri in predicates:
+            ns, _ = split_iri(iri)
+            if ns not in namespaces.values():
+                namespaces[f"ns{len(namespaces)}"] = ns
+        super().__init__(handle, namespaces, predicates)
+
+    def tag(self, iri):
+        """Returns the XML qualified name of predicate `iri`."""
+        prefixed = self.prefixed(iri)
+        if not prefixed:
+            raise ValueError(f"predicate cannot be written as RDF/XML: {iri}")
+        return ":".join(prefixed)
+
+    def begin(self):
+        self.handle.write('<?xml version="1.0" encoding="utf-8"?>\n<rdf:RDF')
+        for prefix, ns in sorted(self.namespaces.items()):
+            self.handle.write(f"\n{INDENT}xmlns:{prefix}={quoteattr(ns)}")
+        self.handle.write(">\n")
+
+    def description(self, subject, props, level):
+        """Writes an rdf:Description element at indentation `level`."""
+        indent = INDENT * level
+        if subject is None:
+            attr = ""
+        elif isinstance(subject, BNode):
+            attr = f" rdf:nodeID={quoteattr(subject.label[2:])}"
+        else:
+            attr = f" rdf:about={quoteattr(subject)}"
+        if not props:
+            self.handle.write(f"{indent}<rdf:Description{attr}/>\n")
+            return
+        self.handle.write(f"{indent}<rdf:Description{attr}>\n")
+        for p, objects in props:
+            for obj in objects:
+                self.property(self.tag(p), obj, level + 1)
+        self.handle.write(f"{indent}</rdf:Description>\n")
+
+    def property(self, tag, obj, level):
+        """Writes a property element at indentation `level`."""
+        indent = INDENT * level
+        write = self.handle.write
+        if isinstance(obj, Literal):
+            if obj.lang:
+                attr = f" xml:lang={quoteattr(obj.lang)}"
+            elif obj.datatype:
+                attr = f" rdf:datatype={quoteattr(obj.datatype)}"
+            else:
+                attr = ""
+            write(f"{indent}<{tag}{attr}>{xml_escape(obj.value)}</{tag}>\n")
+        elif isinstance(obj, BNode) and obj.props is None:
+            write(f"{indent}<{tag} rdf:nodeID={quoteattr(obj.label[2:])}/>\n")
+        elif isinstance(obj, BNode):
+            write(f"{indent}<{tag}>\n")
+            self.description(None, obj.props, level + 1)
+            write(f"{indent}</{tag}>\n")
+        elif isinstance(obj, Collection):
+            write(f'{indent}<{tag} rdf:parseType="Collection">\n')
+            for item in obj.items:
+                if isinstance(item, BNode) and item.props is not None:
+                    self.description(None, item.props, level + 1)
+                else:
+                    self.description(item, [], level + 1)
+            write(f"{indent}</{tag}>\n")
+        else:
+            write(f"{indent}<{tag} rdf:resource={quoteattr(obj)}/>\n")
+
+    def subject(self, subject, props):
+        self.description(subject, props, 1)
+
+    def end(self):
+        self.handle.write("</rdf:RDF>\n")
+
+
+class JsonLdWriter(Writer):
+    """Writes JSON-LD as a ``@graph`` of node objects."""
+
+    def __init__(self, handle, namespaces, predicates):
+        # JSON-LD has no empty prefix
+        namespaces = {
+            prefix: ns for prefix, ns in namespaces.items() if prefix
+        }
+        super().__init__(handle, namespaces, predicates)
+        self._first = True
+
+    def compact(self, iri):
+        """Returns `iri` as a compact IRI if possible."""
+        prefixed = self.prefixed(iri)
+        return ":".join(prefixed) if prefixed else iri
+
+    def value(self, obj):
+        """Returns the JSON-LD value object for `obj`."""
+        if isinstance(obj, Literal):
+            value = {"@value": obj.value}
+            if obj.lang:
+                value["@language"] = obj.lang
+            elif obj.datatype:
+                value["@type"] = self.compact(obj.datatype)
+            return value
+        if isinstance(obj, BNode):
+            if obj.props is None:
+                return {"@id": obj.label}
+            return self.node(None, obj.props)
+        if isinstance(obj, Collection):
+            return {"@list": [self.value(item) for item in obj.items]}
+        return {"@id": self.compact(obj)}
+
+    def node(self, subject, props):
+        """Returns the JSON-LD node object for `subject`."""
+        node = {}
+        if subject is not None:
+            node["@id"] = (
+                subject.label
+                if isinstance(subject, BNode)
+                else self.compact(subject)
+            )
+        for p, objects in props:
+            if p == RDF_TYPE and all(isinstance(o, str) for o in objects):
+                node["@type"] = [self.compact(o) for o in objects]
+            else:
+                node[self.compact(p)] = [self.value(o) for o in objects]
+        return node
+
+    def begin(self):
+        context = json.dumps(
+            dict(sorted(self.namespaces.items())), indent=2, ensure_ascii=False
+        )
+        self.handle.write(
+            '{\n  "@context": '
+            + context.replace("\n", "\n  ")
+            + ',\n  "@graph": ['
+        )
+
+    def subject(self, subject, props):
+        text = json.dumps(
+            self.node(subject, props), indent=2, ensure_ascii=False
+        )
+        sep = "\n    " if self._first else ",\n    "
+        self.handle.write(sep + text.replace("\n", "\n    "))
+        self._first = False
+
+    def end(self):
+        self.handle.write("\n  ]\n}\n")
+
+
+# Writers for each supported format, keyed by file extension
+FORMATS = {
+    "ttl": TurtleWriter,
+    "nt": NTriplesWriter,
+    "rdf": RdfXmlWriter,
+    "jsonld": JsonLdWriter,
+}
+
+
+@contextlib.contextmanager
+def _output(filename, chunksize=1 << 16):
+    """Opens `filename` for writing text in chunks of `chunksize` bytes.
+
+    The file is written to a temporary file that replaces `filename` when
+    complete.  If `filename` ends with ``.gz``, the output is compressed
+    with gzip (with a zero timestamp, such that the result is
+    reproducible)."""
+    tmpfile = f"{filename}.{os.getpid()}.tmp"
+    compress = filename.endswith(".gz")
+    try:
+        with open(tmpfile, "wb", buffering=chunksize) as raw:
+            binary = (
+                gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0)
+                if compress
+                else raw
+            )
+            handle = io.TextIOWrapper(binary, encoding="utf8", newline="\n")
+            yield handle
+            handle.flush()
+            handle.detach()
+            if compress:
+                binary.close()
+        os.replace(tmpfile, filename)
+    finally:
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+
+
+def get_format(filename):
+    """Returns the format of output file `filename` from its extension,
+    ignoring a trailing ``.gz``."""
+    name = filename[:-3] if filename.endswith(".gz") else filename
+    fmt = os.path.splitext(name)[1].lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"unsupported export format {fmt!r} of {filename!r}.  "
+            f"Supported formats: {', '.join(FORMATS)}"
+        )
+    return fmt
+
+
+def export(onto, filenames, namespaces=None, chunksize=1 << 16):
+    """Writes ontology `onto` to all `filenames` in a single pass over its
+    triples.
+
+    Parameters
+    ----------
+    onto : ontopy.Ontology
+        The ontology to export.
+    filenames : sequence
+        Output files.  The format is given by the extension (see
+        `FORMATS`).  Files ending with ``.gz`` are gzip-compressed while
+        they are written.
+    namespaces : dict
+        Additional mapping of prefixes to namespaces.  The base IRI of
+        `onto` is always bound to the empty prefix.
+    chunksize : int
+        Size of the write buffers.
+    """
+    formats = [get_format(filename) for filename in filenames]
+    allns = dict(DEFAULT_NAMESPACES)
+    allns[""] = onto.base_iri
+    allns.update(namespaces or {})
+
+    walker = TripleWalker(onto)
+    predicates = walker.predicates()
+    with contextlib.ExitStack() as stack:
+        writers = [
+            FORMATS[fmt](
+                stack.enter_context(_output(filename, chunksize)),
+                allns,
+                predicates,
+            )
+            for fmt, filename in zip(formats, filenames)
+        ]
+        for writer in writers:
+            writer.begin()
+        for subject, props in walker:
+            for writer in writers:
+                writer.subject(subject, props)
+        for writer in writers:
+            writer.end()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export MagMO from the quadstore snapshot to several RDF serialisations.
+
+All output files are written in a single pass over the triples, e.g.
+
+    python src/export_onto.py magnetic-materials.nt magnetic-materials.rdf \\
+        magnetic-materials.jsonld magnetic-materials.ttl.gz
+
+The format is given by the extension of each output file (ttl, nt, rdf or
+jsonld).  Files ending with `.gz` are compressed while they are written.
+
+With `--input`, a small standalone ontology file like
+`magnetic-materials-dependencies.ttl` is exported instead of the snapshot.
+Its imports are not followed.
+"""
+import argparse
+import io
+import sys
+
+import rdflib
+from ontopy import World
+
+from export import export
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+
+
+def read_ontology(filename):
+    """Returns the ontology in file `filename` in a new in-memory world,
+    without loading its imports."""
+    graph = rdflib.Graph()
+    graph.parse(filename)
+    iris = sorted(graph.subjects(rdflib.RDF.type, rdflib.OWL.Ontology))
+    if len(iris) != 1:
+        raise ValueError(f"expected one ontology in {filename!r}, got {len(iris)}")
+    world = World()
+    onto = world.get_ontology(f"{iris[0]}#")
+    ntriples = graph.serialize(format="nt", encoding="utf-8")
+    onto.graph.parse(io.BytesIO(ntriples), format="ntriples")
+    return onto
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "output",
+        nargs="+",
+        help="Output files.",
+    )
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology to export. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        metavar="FILE",
+        help="Export the ontology in FILE instead of the snapshot.",
+    )
+    parser.add_argument(
+        "--namespace",
+        "-n",
+        action="append",
+        default=["emmo:https://w3id.org/emmo#"],
+        metavar="PREFIX:NAMESPACE",
+        help="Additional prefix:namespace pair.",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        if args.input:
+            onto = read_ontology(args.input)
+        else:
+            onto = get_snapshot_ontology(args.database, args.iri)
+        export(
+            onto,
+            args.output,
+            namespaces=dict(arg.split(":", 1) for arg in args.namespace),
+        )
+    except (SnapshotError, ValueError) as exc:
+        parser.error(str(exc))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
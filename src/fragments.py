@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Build MagMO from independently cached fragments.
+
+The classes of MagMO are defined in the domain modules in `modules/`
+(crystal structure, units, anisotropy, hysteresis, ...).  Each module is
+built into a *fragment*: the triples it adds to (or removes from) a world
+with EMMO and the modules it depends on, together with the Python names,
+IRIs and docstrings of the classes it defines.  Fragments are stored in
+`.cache/fragments/` keyed by
+
+  - the source of the module,
+  - the triples and entities of the fragments of the modules it depends on,
+  - the parsed EMMO, `labels.py`, this module and the Owlready2 and
+    EMMOntoPy versions.
+
+A module depends on the earlier modules defining a name it uses, e.g. a
+base class, a class in a restriction or an annotation property.  The
+dependencies are found from the source.  An edit in the hysteresis module
+rebuilds the hysteresis fragment, and the fragments of the modules using
+its classes only if the triples of the hysteresis fragment change.
+
+Missing fragments are built in parallel worker processes, each running
+
+    python src/fragments.py MODULE --emmo KEY --key KEY --cache-dir DIR \\
+        --dep KEY ...
+
+A worker merges the fragments of the modules it depends on into its copy
+of EMMO instead of executing these modules again.  With a single job, the
+fragments are built in the build process, in one copy of EMMO.
+
+`merge()` then applies the fragments in module order to the world of the
+build, which gives the same triples as executing all modules one after the
+other.
+"""
+import argparse
+import ast
+import concurrent.futures
+import hashlib
+import json
+import os
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+
+import ontopy
+import owlready2
+from owlready2 import AnnotationProperty, Not, locstr
+
+import labels
+from emmo_cache import DEFAULT_CACHE_DIR, EmmoCache, cache_key, file_digest
+from reason_cache import record
+from snapshot import ONTOLOGY_IRI
+
+thisdir = os.path.abspath(os.path.dirname(__file__))
+MODULE_DIR = os.path.join(thisdir, "modules")
+
+# Domain modules in build order
+MODULES = (
+    "annotations",
+    "crystal_structure",
+    "energy_densities",
+    "intrinsic",
+    "characterisation",
+    "materials",
+    "hysteresis",
+    "magnet",
+    "local_properties",
+    "multilayers",
+    "binder_cumulant",
+)
+
+# Bump if the fragment format changes
+FRAGMENT_VERSION = 1
+
+
+class FragmentError(Exception):
+    """Raised when a fragment cannot be built or merged."""
+
+
+def module_path(name):
+    """Returns the source file of module `name`."""
+    return os.path.join(MODULE_DIR, f"{name}.py")
+
+
+def parse_module(name):
+    """Returns the AST of module `name`."""
+    path = module_path(name)
+    with open(path, "rt", encoding="utf8") as handle:
+        return ast.parse(handle.read(), filename=path)
+
+
+def _names(tree):
+    """Returns a ``(defined, used)`` tuple with the names of the classes
+    defined at the top level of `tree` and all names it uses, including
+    the annotations assigned in class bodies."""
+    defined = {node.name for node in tree.body if isinstance(node, ast.ClassDef)}
+    used = {
+        node.id
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+    }
+    used.update(
+        target.id
+        for cls in ast.walk(tree)
+        if isinstance(cls, ast.ClassDef)
+        for node in cls.body
+        if isinstance(node, ast.Assign)
+        for target in node.targets
+        if isinstance(target, ast.Name)
+    )
+    return defined, used
+
+
+def dependencies(modules=MODULES):
+    """Returns a dict mapping each module to the tuple of modules it
+    depends on, directly or indirectly, in module order."""
+    owner = {}
+    deps = {}
+    for name in modules:
+        defined, used = _names(parse_module(name))
+        direct = {owner[used_name] for used_name in used if used_name in owner}
+        closure = set(direct)
+        for dep in direct:
+            closure.update(deps[dep])
+        deps[name] = tuple(module for module in modules if module in closure)
+        for defined_name in defined:
+            owner.setdefault(defined_name, name)
+    return deps
+
+
+def _digest(*items):
+    sha = hashlib.sha256()
+    for item in items:
+        sha.update(str(item).encode())
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def emmo_key(entry):
+    """Returns the cache key of EMMO cache `entry`."""
+    return cache_key(entry["iri"], entry["version"], entry["sha256"])
+
+
+def base_key(emmo_key):
+    """Returns the part of the fragment keys shared by all modules."""
+    return _digest(
+        FRAGMENT_VERSION,
+        owlready2.VERSION,
+        ontopy.__version__,
+        file_digest(labels.__file__),
+        file_digest(__file__),
+        emmo_key,
+    )
+
+
+def fragment_key(base, name, deps):
+    """Returns the key of the fragment of module `name`.
+
+    `base` is the result of `base_key()` and `deps` are the fragments of
+    the modules `name` depends on.  Only the triples and entities of these
+    fragments enter the key, so e.g. editing a docstring does not rebuild
+    the dependent modules."""
+    return _digest(
+        base,
+        name,
+        file_digest(module_path(name)),
+        *(
+            json.dumps(
+                [dep["module"], dep["added"], dep["removed"], dep["entities"]],
+                sort_keys=True,
+            )
+            for dep in deps
+        ),
+    )[:32]
+
+
+def environment(onto, emmo):
+    """Returns the global namespace the modules are executed in."""
+    return {
+        "__builtins__": __builtins__,
+        "AnnotationProperty": AnnotationProperty,
+        "Not": Not,
+        "locstr": locstr,
+        "en": labels.en,
+        "enGB": labels.enGB,
+        "enUS": labels.enUS,
+        "pl": labels.pl,
+        "add_altLabel": labels.add_altLabel,
+        "emmo": emmo,
+        "onto": onto,
+    }
+
+
+def execute(name, env, onto):
+    """Executes module `name` in namespace `env` inside ``with onto:``."""
+    code = compile(parse_module(name), module_path(name), "exec")
+    with onto:
+        exec(code, env)  # pylint: disable=exec-used
+
+
+class FragmentCache:
+    """A persistent cache of fragments.
+
+    Parameters
+    ----------
+    cachedir : str
+        Cache directory.  Created if it does not exist.
+    """
+
+    def __init__(self, cachedir=DEFAULT_CACHE_DIR):
+        self.cachedir = os.path.abspath(cachedir)
+        self.fragmentdir = os.path.join(self.cachedir, "fragments")
+
+    def path(self, key):
+        """Returns the file of the fragment with `key`."""
+        return os.path.join(self.fragmentdir, f"{key}.json")
+
+    def load(self, key):
+        """Returns the fragment with `key`, or None."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rt", encoding="utf8") as handle:
+            fragment = json.load(handle)
+        if fragment.get("version") != FRAGMENT_VERSION:
+            return None
+        return fragment
+
+    def store(self, key, fragment):
+        """Stores `fragment` under `key`."""
+        os.makedirs(self.fragmentdir, exist_ok=True)
+        path = self.path(key)
+        tmpfile = f"{path}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump(fragment, handle, indent=1)
+            handle.write("\n")
+        os.replace(tmpfile, path)
+
+
+def _open_world(emmo_key, cachedir, filename):
+    """Opens a copy of the cached EMMO `emmo_key` at `filename` with an
+    empty MagMO importing it.
+
+    Returns a ``(world, onto, env)`` tuple, where `env` is the namespace
+    to execute the modules in."""
+    emmo_cache = EmmoCache(cachedir)
+    entry = emmo_cache.entry(emmo_key)
+    if entry is None:
+        raise FragmentError(f"EMMO {emmo_key} is not in the cache {cachedir!r}")
+    world, emmo = emmo_cache.attach(entry, filename)
+    onto = world.get_ontology(ONTOLOGY_IRI)
+    onto.imported_ontologies.append(emmo)
+    return world, onto, environment(onto, emmo)
+
+
+def _relabel(changes, offset):
+    """Numbers the blank nodes in the recorded `changes` from the first one
+    created after `offset`, such that the fragment of a module does not
+    depend on the blank nodes created before it."""
+
+    def label(node):
+        return f"_:{int(node[2:]) - offset}" if node.startswith("_:") else node
+
+    for triples in changes.values():
+        triples["objs"] = sorted(
+            [c, label(s), p, label(o)] for c, s, p, o in triples["objs"]
+        )
+        triples["datas"] = sorted(
+            ([c, label(s), p, o, d] for c, s, p, o, d in triples["datas"]),
+            key=repr,
+        )
+
+
+def _execute_fragment(name, key, env, onto):
+    """Executes module `name` in namespace `env` and returns its fragment
+    with `key`."""
+    tree = parse_module(name)
+    graph = onto.world.graph
+    (offset,) = graph.execute("SELECT current_blank FROM store").fetchone()
+    with record(onto.world, blank_nodes=True) as changes:
+        execute(name, env, onto)
+    _relabel(changes, offset)
+    classes = [
+        node.name
+        for node in tree.body
+        if isinstance(node, ast.ClassDef) and node.name in env
+    ]
+    return {
+        "version": FRAGMENT_VERSION,
+        "module": name,
+        "key": key,
+        "created": time.time(),
+        "entities": {cls: env[cls].iri for cls in classes},
+        "docs": {cls: env[cls].__doc__ for cls in classes if env[cls].__doc__},
+        **changes,
+    }
+
+
+def build_fragment(name, emmo_key, key, cachedir=DEFAULT_CACHE_DIR, deps=()):
+    """Builds the fragment of module `name` in a new world with the cached
+    EMMO `emmo_key`, stores it in the cache under `key` and returns it.
+
+    `deps` are the fragments of the modules `name` depends on, in module
+    order.  They are merged into the world instead of executing their
+    modules again."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        world, onto, env = _open_world(
+            emmo_key, cachedir, os.path.join(tmpdir, "world.sqlite3")
+        )
+        env.update(merge(onto, deps))
+        fragment = _execute_fragment(name, key, env, onto)
+        world.close()
+
+    FragmentCache(cachedir).store(key, fragment)
+    return fragment
+
+
+def _build_in_process(emmo_key, cachedir):
+    """Returns the fragments of all modules in module order, building the
+    missing ones one after the other in this process.
+
+    All modules share one copy of EMMO: the modules before a missing one
+    are merged from their fragments or executed, like in a build without
+    fragments."""
+    cache = FragmentCache(cachedir)
+    base = base_key(emmo_key)
+    deps = dependencies()
+    fragments = {}
+    built = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        world = None
+        for name in MODULES:
+            key = fragment_key(base, name, [fragments[dep] for dep in deps[name]])
+            fragment = cache.load(key)
+            if world is None and fragment is None:
+                world, onto, env = _open_world(
+                    emmo_key, cachedir, os.path.join(tmpdir, "world.sqlite3")
+                )
+                env.update(merge(onto, list(fragments.values())))
+            if fragment is None:
+                fragment = _execute_fragment(name, key, env, onto)
+                cache.store(key, fragment)
+                built.append(name)
+            elif world is not None:
+                env.update(merge(onto, [fragment]))
+            fragments[name] = fragment
+        if world is not None:
+            world.close()
+
+    if built:
+        print(f"Built fragments: {', '.join(built)}", file=sys.stderr)
+    return [fragments[name] for name in MODULES]
+
+
+def build_fragments(emmo_key, cachedir=DEFAULT_CACHE_DIR, jobs=None):
+    """Returns the fragments of all modules in module order.
+
+    Fragments missing in the cache are built in up to `jobs` parallel
+    worker processes, each as soon as the fragments of the modules it
+    depends on are available.  With a single job (by default the number
+    of CPUs), they are built in this process instead, which saves starting
+    the workers."""
+    if (jobs or os.cpu_count()) == 1:
+        return _build_in_process(emmo_key, cachedir)
+    cache = FragmentCache(cachedir)
+    base = base_key(emmo_key)
+    deps = dependencies()
+    fragments = {}
+    built = []
+
+    def run(name, key):
+        return subprocess.run(  # nosec
+            [
+                sys.executable,
+                __file__,
+                name,
+                "--emmo",
+                emmo_key,
+                "--key",
+                key,
+                "--cache-dir",
+                cachedir,
+                *(
+                    arg
+                    for dep in deps[name]
+                    for arg in ("--dep", fragments[dep]["key"])
+                ),
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+        )
+
+    pending = list(MODULES)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while pending or running:
+            for name in [
+                name
+                for name in pending
+                if all(dep in fragments for dep in deps[name])
+            ]:
+                pending.remove(name)
+                key = fragment_key(
+                    base, name, [fragments[dep] for dep in deps[name]]
+                )
+                fragment = cache.load(key)
+                if fragment is None:
+                    running[pool.submit(run, name, key)] = (name, key)
+                else:
+                    fragments[name] = fragment
+            if not running:
+                continue
+            finished, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in finished:
+                name, key = running.pop(future)
+                proc = future.result()
+                if proc.returncode:
+                    raise FragmentError(
+                        f"building fragment {name!r} failed:\n{proc.stdout}"
+                    )
+                fragments[name] = cache.load(key)
+                if fragments[name] is None:
+                    raise FragmentError(f"fragment {name!r} missing in cache")
+                built.append(name)
+
+    if built:
+        print(f"Built fragments: {', '.join(built)}", file=sys.stderr)
+    return [fragments[name] for name in MODULES]
+
+
+def _check_blank_nodes(fragment):
+    """Raises FragmentError if `fragment` changes blank nodes it does not
+    create.  Blank nodes are relabelled on merging, so a fragment can only
+    refer to the blank nodes it creates."""
+    removed, added = fragment["removed"], fragment["added"]
+    created = {triple[1] for triple in added["objs"] + added["datas"]}
+    for kind, triples in (("removes", removed), ("adds", added)):
+        for table, rows in triples.items():
+            for triple in rows:
+                nodes = triple[1:4] if table == "objs" else triple[1:2]
+                if any(
+                    node.startswith("_:")
+                    and (kind == "removes" or node not in created)
+                    for node in nodes
+                ):
+                    raise FragmentError(
+                        f"module {fragment['module']!r} {kind} triples on "
+                        "blank nodes of other modules"
+                    )
+
+
+def merge(onto, fragments, enter=None):
+    """Applies `fragments` in order to the world of `onto`.
+
+    The triples about the entities of `onto` and blank nodes are applied
+    first, then the changes to the entities of the imported ontologies
+    (the altLabels added to EMMO units).  If given, `enter` is called with
+    "merge" and "emmo-units" before each of these steps, e.g.
+    `Profiler.enter` to record them as separate phases.
+
+    Returns a dict mapping the Python names of the classes defined by the
+    modules to the entities."""
+    world = onto.world
+    abbreviate = world._abbreviate  # pylint: disable=protected-access
+    ontologies = {}
+    bnodes = [{} for _ in fragments]
+    namespace = {}
+
+    def datatype(d):
+        if d.startswith("@"):
+            return d
+        return abbreviate(d) if d else 0
+
+    def context(iri):
+        if iri not in ontologies:
+            ontologies[iri] = world.get_ontology(iri)
+        return ontologies[iri]
+
+    def apply(fragment, nodes, imported):
+        def term(iri):
+            if iri.startswith("_:"):
+                if iri not in nodes:
+                    nodes[iri] = world.new_blank_node()
+                return nodes[iri]
+            return abbreviate(iri)
+
+        def select(rows):
+            return [
+                triple
+                for triple in rows
+                if imported != triple[1].startswith(("_:", onto.base_iri))
+            ]
+
+        removed, added = fragment["removed"], fragment["added"]
+        # pylint: disable=protected-access
+        for c, s, p, o in select(removed["objs"]):
+            context(c)._del_obj_triple_spo(term(s), term(p), term(o))
+        for c, s, p, o, d in select(removed["datas"]):
+            context(c)._del_data_triple_spod(term(s), term(p), o, datatype(d))
+        for c, s, p, o in select(added["objs"]):
+            context(c)._add_obj_triple_spo(term(s), term(p), term(o))
+        for c, s, p, o, d in select(added["datas"]):
+            context(c)._add_data_triple_spod(term(s), term(p), o, datatype(d))
+
+    for fragment in fragments:
+        _check_blank_nodes(fragment)
+
+    if enter:
+        enter("merge")
+    for fragment, nodes in zip(fragments, bnodes):
+        apply(fragment, nodes, imported=False)
+        for name, iri in fragment["entities"].items():
+            entity = world[iri]
+            if name in fragment["docs"]:
+                entity.__doc__ = fragment["docs"][name]
+            namespace[name] = entity
+
+    if enter:
+        enter("emmo-units")
+    for fragment, nodes in zip(fragments, bnodes):
+        apply(fragment, nodes, imported=True)
+    return namespace
+
+
+def main(argv=None):
+    """Builds the fragment of one module.  Used by the worker processes."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("module", choices=MODULES, help="Module to build.")
+    parser.add_argument(
+        "--emmo",
+        metavar="KEY",
+        required=True,
+        help="Cache key of the parsed EMMO.",
+    )
+    parser.add_argument(
+        "--key",
+        required=True,
+        help="Key to store the fragment under.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        default=DEFAULT_CACHE_DIR,
+        help="Cache directory. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--dep",
+        metavar="KEY",
+        action="append",
+        default=[],
+        help=(
+            "Key of the fragment of a module the module depends on, in "
+            "module order.  May be given multiple times."
+        ),
+    )
+    args = parser.parse_args(args=argv)
+    cache = FragmentCache(args.cache_dir)
+    try:
+        deps = [cache.load(key) for key in args.dep]
+        if None in deps:
+            raise FragmentError("fragment of a dependency missing in cache")
+        build_fragment(args.module, args.emmo, args.key, args.cache_dir, deps)
+    except FragmentError as exc:
+        parser.error(str(exc))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
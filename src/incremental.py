@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental rebuild of MagMO.
+
+A full build of `build_onto.py` creates all classes, runs
+`onto.sync_attributes()` and serialises the whole ontology.  An
+incremental build (`python src/build_onto.py --incremental`) instead
+
+1. fingerprints every class definition in the domain modules in
+   `modules/` (bases, restrictions, annotations and docstring, but not
+   comments or formatting),
+2. compares the fingerprints with the build manifest written next to the
+   quadstore snapshot by the previous build,
+3. applies only the added, changed or removed classes to the snapshot and
+4. skips serialisation if the triples of MagMO are unchanged.
+
+The changes made to the snapshot by `reason_onto.py` are noted in the
+manifest and reverted before the changed classes are applied, such that
+the build's own triples can be compared with the digest stored by the
+previous build.  Any change outside of the class definitions (metadata,
+helper functions, other statements in the domain modules, other modules in
+`src/`) or any other modification of the snapshot falls back to a full
+build.  An output file rewritten by another step is written again.
+"""
+import ast
+import collections
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+
+import owlready2
+from owlready2 import locstr
+
+from emmo_cache import file_digest, mark_loaded
+from fragments import MODULES, dependencies, environment, module_path, parse_module
+from reason_cache import replay
+from snapshot import ONTOLOGY_IRI, SnapshotError, get_snapshot_ontology
+
+# Bumped when the manifest layout changes
+MANIFEST_VERSION = 2
+
+# IRI of owl:annotatedSource, used for axiom annotations
+_ANNOTATED_SOURCE = "http://www.w3.org/2002/07/owl#annotatedSource"
+
+
+def manifest_path(database):
+    """Returns the build manifest file belonging to snapshot `database`."""
+    return f"{os.path.splitext(database)[0]}.manifest.json"
+
+
+def _digest(*items):
+    sha = hashlib.sha256()
+    for item in items:
+        sha.update(item.encode())
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def fingerprint(path):
+    """Fingerprints the build script `path` and the domain modules in
+    `modules/`.
+
+    Returns a ``(script, classes)`` tuple, where `classes` maps the name of
+    each class defined at the top level of a domain module to a tuple with
+    the fingerprint of its definition, its AST node and the module file,
+    and `script` is a fingerprint of everything else, including the other
+    statements of the domain modules, the other modules in the source
+    directory and the versions of Owlready2 and EMMOntoPy."""
+    with open(path, "rt", encoding="utf8") as handle:
+        tree = ast.parse(handle.read(), filename=path)
+
+    classes = {}
+    statements = []
+    for name in MODULES:
+        modpath = module_path(name)
+        body = []
+        for node in parse_module(name).body:
+            if isinstance(node, ast.ClassDef):
+                classes[node.name] = (_digest(ast.dump(node)), node, modpath)
+            else:
+                body.append(node)
+        statements.append(f"{name}:{ast.dump(ast.Module(body, []))}")
+
+    dirname = os.path.dirname(os.path.abspath(path))
+    modules = sorted(
+        filename
+        for filename in os.listdir(dirname)
+        if filename.endswith(".py") and filename != os.path.basename(path)
+    )
+    script = _digest(
+        ast.dump(tree),
+        *statements,
+        str(owlready2.VERSION),
+        _ontopy_version(),
+        *(
+            f"{filename}:{file_digest(os.path.join(dirname, filename))}"
+            for filename in modules
+        ),
+    )
+    return script, classes
+
+
+def _ontopy_version():
+    import ontopy  # pylint: disable=import-outside-toplevel
+
+    return getattr(ontopy, "__version__", "")
+
+
+def triples_digest(onto):
+    """Returns a digest of the triples of `onto` that does not depend on the
+    order of the triples or on the identity of blank nodes."""
+    graph = onto.world.graph
+    unabbreviate = graph._unabbreviate  # pylint: disable=protected-access
+    c = onto.graph.c
+    bnodes = {}
+
+    def term(storid):
+        if storid >= 0:
+            return f"<{unabbreviate(storid)}>"
+        if storid not in bnodes:
+            bnodes[storid] = None  # guard against cycles
+            bnodes[storid] = "_:" + _digest(*sorted(triples(storid)))
+        return bnodes[storid] or "_:cycle"
+
+    def literal(o, d):
+        if isinstance(d, str):
+            return f"{o!r}{d}"
+        if d:
+            return f"{o!r}^^<{unabbreviate(d)}>"
+        return repr(o)
+
+    def triples(s):
+        for p, o in graph.execute(
+            "SELECT p, o FROM objs WHERE c=? AND s=?", (c, s)
+        ):
+            yield f"{term(p)} {term(o)}"
+        for p, o, d in graph.execute(
+            "SELECT p, o, d FROM datas WHERE c=? AND s=?", (c, s)
+        ):
+            yield f"{term(p)} {literal(o, d)}"
+
+    subjects = [
+        s
+        for (s,) in graph.execute(
+            "SELECT DISTINCT s FROM quads WHERE c=? AND s>0", (c,)
+        )
+    ]
+    lines = sorted(
+        f"{term(s)} {line}" for s in subjects for line in triples(s)
+    )
+    return _digest(*lines)
+
+
+def _delete_entity(onto, storid):
+    """Deletes all triples of `onto` with subject `storid`, including the
+    blank nodes (restrictions, lists, axioms) that only describe it."""
+    graph = onto.world.graph
+    c = onto.graph.c
+    source = graph._abbreviate(_ANNOTATED_SOURCE)  # pylint: disable=W0212
+    pending = [storid]
+    pending.extend(
+        s
+        for (s,) in graph.execute(
+            "SELECT s FROM objs WHERE c=? AND s<0 AND p=? AND o=?",
+            (c, source, storid),
+        )
+    )
+    while pending:
+        s = pending.pop()
+        pending.extend(
+            o
+            for (o,) in graph.execute(
+                "SELECT o FROM objs WHERE c=? AND s=? AND o<0", (c, s)
+            )
+        )
+        graph.execute("DELETE FROM objs WHERE c=? AND s=?", (c, s))
+        graph.execute("DELETE FROM datas WHERE c=? AND s=?", (c, s))
+
+
+def _sync_entity(entity, iri_map, base_iri):
+    """Per-entity equivalent of `onto.sync_attributes(
+    class_docstring="elucidation")` followed by renaming via `iri_map`."""
+    if not entity.prefLabel:
+        entity.prefLabel.append(locstr(entity.__name__, lang="en"))
+    if entity.__doc__:
+        entity.elucidation.append(
+            locstr(inspect.cleandoc(entity.__doc__), lang="en")
+        )
+    iri_map.rename([entity], base_iri)
+
+
+def _take_over(onto, old, new):
+    """Redirects all references to the entity with storid `old` to entity
+    `new` and releases the IRI of `old`."""
+    graph = onto.world.graph
+    graph.execute("UPDATE objs SET o=? WHERE o=?", (new.storid, old))
+    graph.execute("DELETE FROM resources WHERE storid=?", (old,))
+
+
+class Manifest:
+    """Build manifest stored next to the quadstore snapshot.
+
+    Parameters
+    ----------
+    database : str
+        The quadstore snapshot written by the build.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.filename = manifest_path(database)
+        self.data = {}
+        if os.path.exists(self.filename):
+            with open(self.filename, "rt", encoding="utf8") as handle:
+                self.data = json.load(handle)
+        if self.data.get("version") != MANIFEST_VERSION:
+            self.data = {}
+
+    def check(self, script, emmo_source):
+        """Returns None if an incremental build is possible, otherwise a
+        string with the reason for a full build."""
+        if not self.data:
+            return "no build manifest"
+        if self.data["script"] != script:
+            return "build script changed outside of class definitions"
+        if self.data["emmo_source"] != emmo_source:
+            return "EMMO source changed"
+        return None
+
+    def check_snapshot(self, onto):
+        """Reverts the changes made to the snapshot since the build and
+        returns None if the triples of MagMO ontology `onto` are then the
+        ones written by the build, otherwise a string with the reason for a
+        full build."""
+        changes = self.data.get("changes", [])
+        if None in changes:
+            return "snapshot contains changes that cannot be reverted"
+        for change in reversed(changes):
+            replay(
+                onto.world, {"added": change["removed"], "removed": change["added"]}
+            )
+        if triples_digest(onto) != self.data["triples"]:
+            return "snapshot modified since last build"
+        return None
+
+    def output_changed(self, output):
+        """Returns whether `output` is missing or not the file written by
+        the build."""
+        return not os.path.exists(output) or self.data["output"] != [
+            os.path.abspath(output),
+            file_digest(output),
+        ]
+
+    def add_changes(self, *changes):
+        """Notes that `changes` (in the format of `reason_cache.record()`)
+        were made to the snapshot, in this order.  A change is None if it
+        is not known or involves blank nodes."""
+        self.data.setdefault("changes", []).extend(
+            None
+            if change is None or change.get("blank_nodes")
+            else {"added": change["added"], "removed": change["removed"]}
+            for change in changes
+        )
+        self._save()
+
+    def write(self, script, classes, iris, emmo, emmo_source, output, digest):
+        """Writes the manifest after a build."""
+        self.data = {
+            "version": MANIFEST_VERSION,
+            "script": script,
+            "classes": {
+                name: [classes[name][0], iris[name]] for name in sorted(classes)
+            },
+            "emmo": emmo,
+            "emmo_source": emmo_source,
+            "triples": digest,
+            "output": [os.path.abspath(output), file_digest(output)],
+            "created": time.time(),
+        }
+        self._save()
+
+    def _save(self):
+        tmpfile = f"{self.filename}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump(self.data, handle, indent=2, sort_keys=True)
+        os.replace(tmpfile, self.filename)
+
+
+def emmo_source_digest(args):
+    """Returns a string identifying the EMMO source selected by `args`."""
+    return file_digest(args.emmo_source) if args.emmo_source else ""
+
+
+def invalidate_manifest(database):
+    """Removes the build manifest of snapshot `database`, if any.  Called
+    before a full build replaces the snapshot, such that an incremental
+    build after a failed full build does a full build too."""
+    filename = manifest_path(database)
+    if os.path.exists(filename):
+        os.remove(filename)
+
+
+def add_changes(database, *changes):
+    """Notes in the build manifest of snapshot `database`, if any, that
+    `changes` were made to the snapshot after the build, such that an
+    incremental build can revert them."""
+    manifest = Manifest(database)
+    if manifest.data:
+        manifest.add_changes(*changes)
+
+
+def write_manifest(path, namespace, output):
+    """Writes the build manifest after a full build of script `path`.
+
+    `namespace` is the global namespace of the build script."""
+    script, classes = fingerprint(path)
+    onto, args = namespace["onto"], namespace["args"]
+    Manifest(args.database).write(
+        script,
+        classes,
+        {name: namespace[name].iri for name in classes},
+        namespace["emmo"].base_iri,
+        emmo_source_digest(args),
+        output,
+        triples_digest(onto),
+    )
+
+
+def build(path, namespace, output):
+    """Incrementally rebuilds MagMO from build script `path`.
+
+    `namespace` is the global namespace of the build script at the point
+    where it is about to load EMMO.  It must provide `args`, `iri_map`
+    and `save_onto()`.
+
+    Returns MagMO in the up-to-date snapshot, or None if a full build is
+    needed."""
+    args = namespace["args"]
+    manifest = Manifest(args.database)
+    script, classes = fingerprint(path)
+    reason = manifest.check(script, emmo_source_digest(args))
+    if not reason:
+        try:
+            onto = get_snapshot_ontology(args.database, ONTOLOGY_IRI)
+        except SnapshotError as exc:
+            reason = str(exc)
+        else:
+            world = onto.world
+            reason = manifest.check_snapshot(onto)
+    if reason:
+        print(f"Full build: {reason}", file=sys.stderr)
+        return None
+
+    previous = manifest.data["classes"]
+    removed = [name for name in previous if name not in classes]
+    changed = [
+        name
+        for name, (fp, _, _) in classes.items()
+        if name in previous and previous[name][0] != fp
+    ]
+    added = [name for name in classes if name not in previous]
+    missing = [filename for filename in args.export if not os.path.exists(filename)]
+    stale = manifest.output_changed(output)
+    reverted = manifest.data.get("changes")
+    if not (removed or changed or added or missing or stale or reverted):
+        print("Up to date", file=sys.stderr)
+        return onto
+
+    emmo = mark_loaded(world.get_ontology(manifest.data["emmo"]))
+
+    for name in removed:
+        owlready2.destroy_entity(world[previous[name][1]])
+
+    iri_map = namespace["iri_map"]
+    env = {
+        name: world[iri]
+        for name, (_, iri) in previous.items()
+        if name in classes and name not in changed
+    }
+    # Annotations in class bodies are looked up by the Python name of the
+    # property, which is not stored in the snapshot
+    for name, entity in list(env.items()):
+        if name in previous and isinstance(entity, owlready2.PropertyClass):
+            world._props[name] = entity  # pylint: disable=protected-access
+    iris = {name: iri for name, (_, iri) in previous.items()}
+    for name in removed:
+        del iris[name]
+
+    # Define changed and added classes in source order.  Like in a full
+    # build, a class only sees the classes of the modules its module
+    # depends on and the classes defined before it in its own module.
+    deps = dependencies()
+    modules = {module_path(module): module for module in MODULES}
+    defined = collections.defaultdict(list)
+    for name, (_, _, modpath) in classes.items():
+        defined[modules[modpath]].append(name)
+    for name, (_, node, modpath) in classes.items():
+        if name not in changed and name not in added:
+            continue
+        module = modules[modpath]
+        visible = [
+            *(other for dep in deps[module] for other in defined[dep]),
+            *defined[module][: defined[module].index(name)],
+        ]
+        scope = environment(onto, emmo)
+        scope.update((other, env[other]) for other in visible if other in env)
+        if name in changed:
+            old = world._abbreviate(iris[name])  # pylint: disable=W0212
+            _delete_entity(onto, old)
+        code = ast.Module(body=[node], type_ignores=[])
+        with onto:
+            exec(  # pylint: disable=exec-used
+                compile(code, modpath, "exec"), scope
+            )
+        entity = env[name] = scope[name]
+        if name in changed:
+            _take_over(onto, old, entity)
+        _sync_entity(entity, iri_map, onto.base_iri)
+        iris[name] = entity.iri
+
+    print(
+        f"Incremental build: {len(added)} added, {len(changed)} changed, "
+        f"{len(removed)} removed",
+        file=sys.stderr,
+    )
+    digest = triples_digest(onto)
+    if digest != manifest.data["triples"] or missing or stale:
+        namespace["save_onto"](onto, output, args.export)
+    world.save()
+    iri_map.save()
+    manifest.write(
+        script,
+        classes,
+        iris,
+        emmo.base_iri,
+        emmo_source_digest(args),
+        output,
+        digest,
+    )
+    return onto
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Indexes written next to the turtle file.
+
+The build and the reason step write, next to `magnetic-materials.ttl`,
+indexes that let applications look up units, the class hierarchy,
+restrictions and dimensions without loading the ontology:
+
+    magnetic-materials.units.json          units.py
+    magnetic-materials.closure.npz         closure.py
+    magnetic-materials.restrictions.json   restrictions.py
+    magnetic-materials.dimensions.npz      dimensions.py
+"""
+from closure import closure_path, write_closure
+from dimensions import dimensions_path, write_dimensions
+from restrictions import restriction_index, restrictions_path, write_restrictions
+from units import unit_table, units_path, write_units
+
+
+def write_indexes(onto, ttlfile):
+    """Writes the indexes of `onto` next to turtle file `ttlfile`."""
+    table = unit_table(onto)
+    write_units(table, units_path(ttlfile))
+    write_closure(onto, closure_path(ttlfile))
+    write_restrictions(restriction_index(onto), restrictions_path(ttlfile))
+    write_dimensions(onto, dimensions_path(ttlfile), table)
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Per-phase instrumentation of the ontology build.
+
+A `Profiler` splits a run into named phases.  For each phase it records
+the wall and CPU time, the peak resident set size (RSS) of the process and
+of its largest child process (e.g. a fragment worker) and the number of
+triples in the world and in the ontology being built.  The
+results are written as a JSON report, e.g. by
+
+    python src/build_onto.py --profile build-profile.json
+
+A disabled profiler does nothing, such that the phase markers can stay in
+the build script.
+"""
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import owlready2
+
+
+def peak_rss(children=False):
+    """Returns the peak resident set size of the process in bytes, or None
+    if it cannot be determined on this platform.
+
+    With `children`, returns the peak resident set size of the largest
+    terminated child process instead."""
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler:
+    """Records wall time, CPU time, peak RSS and triple counts per phase.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to record anything.
+    world : owlready2.World
+        World to count triples in.  May also be assigned later.
+    onto : owlready2.Ontology
+        Ontology to count triples in.  May also be assigned later.
+    """
+
+    def __init__(self, enabled=True, world=None, onto=None):
+        self.enabled = enabled
+        self.world = world
+        self.onto = onto
+        self.phases = {}
+        self._current = None
+        self._start = None
+        self._created = time.time()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    def _triples(self):
+        """Returns a dict with the number of triples in the world and in
+        the ontology, or None if no world is assigned."""
+        if self.world is None:
+            return None
+        graph = self.world.graph
+        counts = {
+            "world": sum(
+                graph.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("objs", "datas")
+            )
+        }
+        if self.onto is not None:
+            counts["onto"] = sum(
+                graph.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE c=?",
+                    (self.onto.graph.c,),
+                ).fetchone()[0]
+                for table in ("objs", "datas")
+            )
+        return counts
+
+    def _sample(self):
+        return {
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+            "peak_rss": peak_rss(),
+            "children_peak_rss": peak_rss(children=True),
+            "triples": self._triples(),
+        }
+
+    def enter(self, name):
+        """Ends the current phase and starts phase `name`.
+
+        Time spent in a phase that is entered several times is
+        accumulated."""
+        if not self.enabled:
+            return
+        self.stop()
+        self._current = name
+        self._start = self._sample()
+
+    def stop(self):
+        """Ends the current phase."""
+        if not self.enabled or self._current is None:
+            return
+        end = self._sample()
+        start = self._start
+        phase = self.phases.setdefault(
+            self._current,
+            {
+                "calls": 0,
+                "wall": 0.0,
+                "cpu": 0.0,
+                "peak_rss": None,
+                "rss_growth": None,
+                "children_peak_rss": None,
+                "triples": None,
+                "triples_added": None,
+            },
+        )
+        phase["calls"] += 1
+        phase["wall"] += end["wall"] - start["wall"]
+        phase["cpu"] += end["cpu"] - start["cpu"]
+        if end["peak_rss"] is not None:
+            phase["peak_rss"] = end["peak_rss"]
+            phase["rss_growth"] = (phase["rss_growth"] or 0) + (
+                end["peak_rss"] - start["peak_rss"]
+            )
+            phase["children_peak_rss"] = end["children_peak_rss"] or None
+        if end["triples"] is not None:
+            phase["triples"] = end["triples"]
+            added = phase["triples_added"] or {}
+            for key, count in end["triples"].items():
+                before = (start["triples"] or {}).get(key, 0)
+                added[key] = added.get(key, 0) + count - before
+            phase["triples_added"] = added
+        self._current = self._start = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager recording the enclosed code as phase `name`."""
+        self.enter(name)
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def report(self):
+        """Returns the report as a dict."""
+        self.stop()
+        return {
+            "created": self._created,
+            "command": sys.argv,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "owlready2": str(owlready2.VERSION),
+            "total": {
+                "wall": time.perf_counter() - self._t0,
+                "cpu": time.process_time() - self._cpu0,
+                "peak_rss": peak_rss(),
+                "children_peak_rss": peak_rss(children=True) or None,
+            },
+            "phases": [
+                dict(name=name, **phase) for name, phase in self.phases.items()
+            ],
+        }
+
+    def write(self, filename):
+        """Writes the report to `filename` and a summary to stderr."""
+        if not self.enabled:
+            return
+        report = self.report()
+        tmpfile = f"{filename}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump(report, handle, indent=2)
+            handle.write("\n")
+        os.replace(tmpfile, filename)
+        print(self.summary(report), file=sys.stderr)
+
+    @staticmethod
+    def summary(report):
+        """Returns a table summarising `report`."""
+        lines = [
+            f"{'phase':<20} {'wall/s':>8} {'cpu/s':>8} "
+            f"{'peak RSS/MB':>12} {'child RSS/MB':>13} {'+triples':>9}"
+        ]
+
+        def megabytes(rss):
+            return "-" if rss is None else f"{rss / 2**20:.1f}"
+
+        for phase in report["phases"]:
+            rss = megabytes(phase["peak_rss"])
+            children = megabytes(phase.get("children_peak_rss"))
+            added = (phase["triples_added"] or {}).get("world", "-")
+            lines.append(
+                f"{phase['name']:<20} {phase['wall']:>8.3f} "
+                f"{phase['cpu']:>8.3f} {rss:>12} {children:>13} {added:>9}"
+            )
+        total = report["total"]
+        lines.append(f"{'total':<20} {total['wall']:>8.3f} {total['cpu']:>8.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent map from prefLabel to IRI for the entities of MagMO.
+
+`onto.sync_attributes(name_policy="uuid")` derives the EMMO_<uuid> name
+of each entity from its Python name.  Renaming a Python class hence
+changes its IRI, which invalidates everything downstream that refers to
+it (doc figures, generated NOMAD schemas, instance data).
+
+The build instead reads the IRIs of known entities from the sidecar file
+`magnetic-materials.iris.json`, which maps prefLabels to IRIs.  Only
+entities with a new prefLabel get a new EMMO_<uuid> name, which is then
+added to the map.  Entries of removed entities are kept, such that an
+entity that is added again gets its old IRI back.
+"""
+import json
+import os
+import uuid
+
+rootdir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+# Default sidecar file, under version control next to the ontology
+IRI_MAP = os.path.join(rootdir, "magnetic-materials.iris.json")
+
+
+class IriMapError(Exception):
+    """Raised when entities cannot be given unique IRIs."""
+
+
+def preflabel(entity):
+    """Returns the English prefLabel of `entity` as a string.
+
+    Falls back to the first prefLabel in any language and finally to the
+    name of the entity."""
+    labels = list(entity.prefLabel)
+    for label in labels:
+        if getattr(label, "lang", None) == "en":
+            return str(label)
+    return str(labels[0]) if labels else entity.name
+
+
+def _is_valid_name(name, name_prefix):
+    """Returns whether `name` is a valid EMMO_<uuid> name."""
+    if not name.startswith(name_prefix):
+        return False
+    try:
+        uuid.UUID(name[len(name_prefix) :], version=5)
+    except ValueError:
+        return False
+    return True
+
+
+def _release(entity, iri):
+    """Releases `iri` for `entity`.
+
+    An IRI that is still known to the quadstore, but no longer describes
+    anything (e.g. of a destroyed entity), is released and the remaining
+    references to it are redirected to `entity`."""
+    graph = entity.namespace.world.graph
+    storid = graph._abbreviate(iri, False)  # pylint: disable=protected-access
+    if storid is None:
+        return
+    if graph.execute("SELECT 1 FROM quads WHERE s=? LIMIT 1", (storid,)).fetchone():
+        raise IriMapError(
+            f"IRI {iri!r} of {preflabel(entity)!r} is already used by "
+            "another entity"
+        )
+    graph.execute("UPDATE objs SET o=? WHERE o=?", (entity.storid, storid))
+    graph.execute("DELETE FROM resources WHERE storid=?", (storid,))
+
+
+class IriMap:
+    """A map from prefLabel to IRI, persisted as a JSON file.
+
+    Parameters
+    ----------
+    filename : str
+        The sidecar file.  It is created by `save()` if it does not exist.
+    """
+
+    def __init__(self, filename=IRI_MAP):
+        self.filename = filename
+        self.iris = {}
+        if os.path.exists(filename):
+            with open(filename, "rt", encoding="utf8") as handle:
+                self.iris = json.load(handle)
+        self.changed = False
+
+    def __len__(self):
+        return len(self.iris)
+
+    def __contains__(self, label):
+        return label in self.iris
+
+    def get(self, label, default=None):
+        """Returns the IRI of the entity with prefLabel `label`."""
+        return self.iris.get(label, default)
+
+    def assign(self, label, iri):
+        """Maps `label` to `iri`.
+
+        Other labels mapped to `iri` (e.g. the old prefLabel of a
+        relabelled entity) are removed, such that no IRI can be handed out
+        twice."""
+        if self.iris.get(label) == iri:
+            return
+        for other in [key for key, value in self.iris.items() if value == iri]:
+            del self.iris[other]
+        self.iris[label] = iri
+        self.changed = True
+
+    def rename(self, entities, base_iri, name_prefix="EMMO_"):
+        """Gives all `entities` of the ontology `base_iri` their mapped
+        IRIs.
+
+        Entities that are not in the map get the name `name_prefix`
+        followed by the UUID of their Python name, like
+        `onto.sync_attributes(name_policy="uuid")`, and are added to the
+        map.  Entities that already have a valid EMMO_<uuid> name are
+        only added to the map."""
+        labels = {}
+        for entity in entities:
+            label = preflabel(entity)
+            if label in labels:
+                raise IriMapError(
+                    f"entities {labels[label].name!r} and {entity.name!r} "
+                    f"have the same prefLabel {label!r}"
+                )
+            labels[label] = entity
+
+        # Release the names of all renamed entities before handing them out
+        # again, since two entities may swap their names
+        renamed = []
+        for label, entity in labels.items():
+            iri = self.iris.get(label)
+            if iri is None:
+                if _is_valid_name(entity.name, name_prefix):
+                    iri = entity.iri
+                else:
+                    iri = base_iri + name_prefix + str(
+                        uuid.uuid5(uuid.NAMESPACE_DNS, entity.name)
+                    )
+            if not iri.startswith(base_iri):
+                raise IriMapError(
+                    f"IRI {iri!r} of {label!r} is not in namespace {base_iri!r}"
+                )
+            if entity.iri != iri:
+                entity.name = f"_{entity.storid}"
+                renamed.append((entity, iri))
+            self.assign(label, iri)
+        for entity, iri in renamed:
+            _release(entity, iri)
+            entity.name = iri[len(base_iri) :]
+
+    def save(self, filename=None):
+        """Writes the map to `filename` if it has changed.  Defaults to the
+        file it was read from."""
+        filename = filename or self.filename
+        if not self.changed and os.path.exists(filename):
+            return
+        tmpfile = f"{filename}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump(self.iris, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        os.replace(tmpfile, filename)
+        self.changed = False
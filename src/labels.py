@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for the labels and annotations of the classes in `modules/`.
+"""
+from owlready2 import locstr
+
+
+# From https://github.com/emmo-repo/domain-atomistic/blob/master/domain-atomistic.py
+def en(s):
+    """Returns `s` as an English location string."""
+    return locstr(s, lang="en")
+
+
+def enGB(s):
+    """Returns `s` as an British-English location string."""
+    return locstr(s, lang="en-GB")
+
+
+def enUS(s):
+    """Returns `s` as an American-English location string."""
+    return locstr(s, lang="en-US")
+
+
+def pl(s):
+    """Returns `s` as a plain literal string."""
+    return locstr(s, lang="")
+
+
+# Append a new altLabel to an EMMO entry: if the entry already
+# has an altLabel list, append the value; otherwise create altLabel
+# as a new list containing the value.
+def add_altLabel(entry, label):
+    if hasattr(entry, "altLabel"):
+        entry.altLabel.append(label)
+    else:
+        entry.altLabel = [label]
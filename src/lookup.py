@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generates a lookup module with the identifiers of MagMO and EMMO.
+
+Services that only need to map labels, altLabels and IRIs to each other,
+walk the hierarchy or find the unit of a quantity should not have to import
+Owlready2 and load EMMO for that.  This module writes a static Python
+module, `magnetic_materials.py`, without any dependencies:
+
+  - every named class and property of MagMO and EMMO gets an integer ID,
+  - `IRIS`, `LABELS`, `TYPES` and `PARENTS` are tuples indexed by ID,
+  - frozen dicts map IRIs, prefLabels, altLabels (e.g. both
+    `JoulePerCubicMetre` and `JoulePerCubicMeter`) and `EMMO_<uuid>` names
+    to IDs, and the IDs of quantities to their unit (see `units.py`),
+  - a few functions (`lookup()`, `iri()`, `label()`, `parents()`,
+    `ancestors()`, `unit()`) work on these tables.
+
+The module is compiled to bytecode right away, such that importing it only
+unmarshals the tables.  IDs are only valid together with the generated
+module they come from.  To generate it from the snapshot run
+
+    python src/lookup.py --database magnetic-materials.sqlite3
+"""
+import argparse
+import os
+import py_compile
+import sys
+
+from store_index import OWL, RDF_TYPE, RDFS, SKOS
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+from units import unit_table
+
+# Bump if the layout of the generated module changes
+LOOKUP_VERSION = 1
+
+LOOKUP_MODULE = "magnetic_materials.py"
+
+# Types of the entities in the lookup module and the properties giving
+# their parents
+ENTITY_TYPES = {
+    "Class": RDFS + "subClassOf",
+    "ObjectProperty": RDFS + "subPropertyOf",
+    "DatatypeProperty": RDFS + "subPropertyOf",
+    "AnnotationProperty": RDFS + "subPropertyOf",
+}
+
+# Source of the generated module, filled in with `str.format()`
+TEMPLATE = '''\
+# -*- coding: utf-8 -*-
+"""
+Identifiers of MagMO {version} and the EMMO entities it builds on.
+
+Generated by `src/lookup.py` from the quadstore snapshot, do not edit.
+
+    >>> import magnetic_materials as mm
+    >>> mm.iri("JoulePerCubicMeter")
+    'https://w3id.org/emmo#...'
+    >>> mm.unit("Coercivity")
+    ('T0 L-1 M0 I+1 Θ0 N0 J0', 'A.m-1', 'AmperePerMetre')
+
+Every entity has an integer ID, which indexes the tuples `IRIS`, `LABELS`,
+`TYPES` and `PARENTS`.  IDs are only valid within this module.
+"""
+from types import MappingProxyType
+
+VERSION = {version!r}
+LOOKUP_VERSION = {lookup_version!r}
+
+# IRI, prefLabel, type and IDs of the named parents of each entity, by ID
+IRIS = (
+{iris})
+LABELS = (
+{labels})
+TYPES = (
+{types})
+PARENTS = (
+{parents})
+
+# IDs by full IRI
+IDS = MappingProxyType({{
+{ids}}})
+
+# IDs by prefLabel, altLabel and IRI fragment (EMMO_<uuid>)
+NAMES = MappingProxyType({{
+{names}}})
+
+# (dimension string, UCUM code, ID of the SI unit or None) of quantities
+UNITS = MappingProxyType({{
+{units}}})
+
+
+def lookup(name):
+    """Returns the ID of the entity with IRI, prefLabel, altLabel or IRI
+    fragment `name`.  An int is returned as is.  Raises KeyError if there
+    is no such entity."""
+    if isinstance(name, int):
+        if not 0 <= name < len(IRIS):
+            raise KeyError(name)
+        return name
+    if name in IDS:
+        return IDS[name]
+    return NAMES[name]
+
+
+def iri(name):
+    """Returns the IRI of entity `name`."""
+    return IRIS[lookup(name)]
+
+
+def label(name):
+    """Returns the prefLabel of entity `name`."""
+    return LABELS[lookup(name)]
+
+
+def parents(name):
+    """Returns the prefLabels of the named parents of entity `name`."""
+    return tuple(LABELS[parent] for parent in PARENTS[lookup(name)])
+
+
+def ancestors(name):
+    """Returns the IDs of the named ancestors of entity `name`, including
+    itself."""
+    seen, pending = set(), [lookup(name)]
+    while pending:
+        entity = pending.pop()
+        if entity not in seen:
+            seen.add(entity)
+            pending.extend(PARENTS[entity])
+    return frozenset(seen)
+
+
+def unit(name):
+    """Returns a ``(dimension, ucum, unit)`` tuple with the dimension
+    string, the UCUM code and the prefLabel of the SI unit of quantity
+    `name`.  Raises KeyError if the unit is unknown."""
+    dimension, ucum, si_unit = UNITS[lookup(name)]
+    return dimension, ucum, None if si_unit is None else LABELS[si_unit]
+'''
+
+
+def _version(onto):
+    """Returns the owl:versionInfo of `onto`, or an empty string."""
+    graph = onto.world.graph
+    abbreviate = graph._abbreviate  # pylint: disable=protected-access
+    version_info = abbreviate(OWL + "versionInfo", False)
+    row = graph.execute(
+        "SELECT o FROM datas WHERE s=? AND p=?", (onto.storid, version_info)
+    ).fetchone()
+    return str(row[0]) if row else ""
+
+
+def entities(world):
+    """Returns a list of ``(storid, type)`` tuples with the named classes
+    and properties in `world` that have a prefLabel, sorted by IRI.
+
+    The position in the list is the ID of the entity."""
+    graph = world.graph
+    abbreviate = graph._abbreviate  # pylint: disable=protected-access
+    types = {
+        storid: name
+        for name in ENTITY_TYPES
+        if (storid := abbreviate(OWL + name, False))
+    }
+    preflabel = abbreviate(SKOS + "prefLabel", False)
+    found = {}
+    for s, o, iri in graph.execute(
+        "SELECT s, o, iri FROM objs JOIN resources ON s=storid "
+        "WHERE s>0 AND p=? AND s IN (SELECT s FROM datas WHERE p=?) "
+        "ORDER BY iri",
+        (abbreviate(RDF_TYPE, False), preflabel),
+    ):
+        if o in types:
+            found.setdefault(s, (iri, types[o]))
+    return [(s, name) for s, (_, name) in found.items()]
+
+
+def lookup_tables(onto):
+    """Returns a dict with the tables of the lookup module for `onto` and
+    the ontologies it imports."""
+    # pylint: disable=too-many-locals
+    world = onto.world
+    graph = world.graph
+    abbreviate = graph._abbreviate  # pylint: disable=protected-access
+    unabbreviate = graph._unabbreviate  # pylint: disable=protected-access
+    entries = entities(world)
+    ids = {s: i for i, (s, _) in enumerate(entries)}
+
+    def all_values(prop):
+        values = {}
+        for s, o in graph.execute(
+            "SELECT s, o FROM datas WHERE p=? ORDER BY s, o",
+            (abbreviate(prop, False),),
+        ):
+            values.setdefault(s, []).append(str(o))
+        return values
+
+    preflabels = all_values(SKOS + "prefLabel")
+    altlabels = all_values(SKOS + "altLabel")
+
+    parents = {s: set() for s in ids}
+    for prop in set(ENTITY_TYPES.values()):
+        for s, o in graph.execute(
+            "SELECT s, o FROM objs WHERE p=? AND s>0 AND o>0",
+            (abbreviate(prop, False),),
+        ):
+            if s in ids and o in ids and s != o:
+                parents[s].add(ids[o])
+
+    iris = [unabbreviate(s) for s, _ in entries]
+    labels = [min(preflabels[s]) for s, _ in entries]
+
+    # prefLabels take precedence over altLabels, which take precedence
+    # over IRI fragments
+    names = {}
+    for i, (s, _) in enumerate(entries):
+        for label in preflabels[s]:
+            names.setdefault(label, i)
+    for i, (s, _) in enumerate(entries):
+        for label in altlabels.get(s, ()):
+            names.setdefault(label, i)
+    for i, iri in enumerate(iris):
+        names.setdefault(iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1], i)
+
+    index = {iri: i for i, iri in enumerate(iris)}
+    units = {}
+    for iri, row in unit_table(onto)["quantities"].items():
+        if iri in index and row[1]:
+            units[index[iri]] = (row[1], row[6], index.get(row[4]))
+
+    return {
+        "version": _version(onto),
+        "iris": iris,
+        "labels": labels,
+        "types": [name for _, name in entries],
+        "parents": [tuple(sorted(parents[s])) for s, _ in entries],
+        "ids": index,
+        "names": names,
+        "units": units,
+    }
+
+
+def render(tables):
+    """Returns the source of the lookup module with `tables`."""
+
+    def items(values):
+        return "".join(f"    {value!r},\n" for value in values)
+
+    def mapping(values):
+        return "".join(f"    {key!r}: {value!r},\n" for key, value in values)
+
+    return TEMPLATE.format(
+        version=tables["version"],
+        lookup_version=LOOKUP_VERSION,
+        iris=items(tables["iris"]),
+        labels=items(tables["labels"]),
+        types=items(tables["types"]),
+        parents=items(tables["parents"]),
+        ids=mapping(tables["ids"].items()),
+        names=mapping(sorted(tables["names"].items())),
+        units=mapping(sorted(tables["units"].items())),
+    )
+
+
+def write_lookup(onto, filename=LOOKUP_MODULE):
+    """Writes the lookup module for `onto` to `filename` and compiles it
+    to bytecode."""
+    tmpfile = f"{filename}.{os.getpid()}.tmp"
+    with open(tmpfile, "wt", encoding="utf8") as handle:
+        handle.write(render(lookup_tables(onto)))
+    os.replace(tmpfile, filename)
+    py_compile.compile(filename, doraise=True)
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        default=LOOKUP_MODULE,
+        help="Lookup module to write. Default: %(default)s",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        onto = get_snapshot_ontology(args.database, args.iri)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+    write_lookup(onto, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Classification of MagMO against the fixed, pre-classified EMMO hierarchy.
+
+MagMO imports the inferred EMMO, whose hierarchy is already classified.
+Instead of running the reasoner on the whole world, `classify()` extracts
+a module containing
+
+  - all logical axioms stored in MagMO,
+  - for the EMMO entities MagMO refers to and all their named ancestors:
+    their logical axioms, including restrictions and definitions,
+  - for all other entities referred to by these axioms: their declarations,
+    named ancestors, domains, ranges and inverses (the "taxonomy"),
+
+runs the reasoner on this module only and returns the inferred parents and
+equivalents of the entities in the MagMO namespace.  The time spent in the
+reasoner therefore scales with MagMO and the part of EMMO it builds on, not
+with EMMO.
+
+Since the EMMO hierarchy is treated as fixed, inferences about EMMO entities
+(e.g. an EMMO class that would be classified below a MagMO class) are not
+returned.  Run the reasoner on the whole world to get those.
+"""
+from ontopy import World
+
+from reason_cache import non_logical, record
+
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL = "http://www.w3.org/2002/07/owl#"
+
+# Predicates whose named objects are ancestors of the subject
+HIERARCHY = (
+    RDFS + "subClassOf",
+    RDFS + "subPropertyOf",
+    OWL + "equivalentClass",
+    OWL + "equivalentProperty",
+)
+
+# Predicates included in the taxonomy of an entity
+TAXONOMY = (
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#type",
+    *HIERARCHY,
+    RDFS + "domain",
+    RDFS + "range",
+    OWL + "inverseOf",
+)
+
+MODULE_IRI = "http://magmo-module/"
+
+
+class BlankNodeError(ValueError):
+    """Raised when the inferences of the module involve blank nodes, which
+    cannot be transferred to the world of MagMO."""
+
+
+class _Extractor:  # pylint: disable=too-few-public-methods
+    """Collects the triples of the module of ontology `onto`."""
+
+    def __init__(self, onto):
+        graph = onto.world.graph
+        self.graph = graph
+        self.skip_predicates, self.skip_subjects = non_logical(onto.world)
+        abbreviate = graph._abbreviate  # pylint: disable=protected-access
+        self.hierarchy = {abbreviate(iri) for iri in HIERARCHY}
+        self.taxonomy = {abbreviate(iri) for iri in TAXONOMY}
+        self.objs = set()
+        self.datas = set()
+        self.full = set()
+        self.partial = set()
+
+    def _triples(self, s):
+        """Returns the logical object and data triples of subject `s`."""
+        if s in self.skip_subjects:
+            return [], []
+        objs = [
+            (p, o)
+            for p, o in self.graph.execute(
+                "SELECT p, o FROM objs WHERE s=?", (s,)
+            )
+            if p not in self.skip_predicates
+        ]
+        datas = [
+            (p, o, d)
+            for p, o, d in self.graph.execute(
+                "SELECT p, o, d FROM datas WHERE s=?", (s,)
+            )
+            if p not in self.skip_predicates
+        ]
+        return objs, datas
+
+    def add_full(self, s, pending):
+        """Adds all logical axioms of named entity or blank node `s`."""
+        objs, datas = self._triples(s)
+        self.datas.update((s, p, o, d) for p, o, d in datas)
+        for p, o in objs:
+            self.objs.add((s, p, o))
+            if o < 0:
+                pending.append((o, True))
+            elif s > 0 and p in self.hierarchy:
+                pending.append((o, True))
+            else:
+                pending.append((o, False))
+            pending.append((p, False))
+
+    def add_taxonomy(self, s, pending):
+        """Adds the declarations and named ancestors of entity `s`."""
+        objs, _ = self._triples(s)
+        for p, o in objs:
+            if p in self.taxonomy and o > 0:
+                self.objs.add((s, p, o))
+                pending.append((o, False))
+
+    def extract(self, seeds):
+        """Extracts the module for the named entities in `seeds`."""
+        pending = [(s, True) for s in seeds]
+        while pending:
+            s, full = pending.pop()
+            if full and s not in self.full:
+                self.full.add(s)
+                self.add_full(s, pending)
+            elif not full and s > 0 and s not in self.full | self.partial:
+                self.partial.add(s)
+                self.add_taxonomy(s, pending)
+
+
+def extract_module(onto):
+    """Returns a new ontology in a new in-memory world containing the
+    module of MagMO ontology `onto` as described in the module docstring."""
+    graph = onto.world.graph
+    seeds = [
+        s
+        for (s,) in graph.execute(
+            "SELECT DISTINCT s FROM quads WHERE c=? AND s>0", (onto.graph.c,)
+        )
+    ]
+    extractor = _Extractor(onto)
+    extractor.extract(seeds)
+
+    unabbreviate = graph._unabbreviate  # pylint: disable=protected-access
+    world = World()
+    module = world.get_ontology(MODULE_IRI)
+    abbreviate = world._abbreviate  # pylint: disable=protected-access
+    bnodes = {}
+
+    def term(storid):
+        if storid < 0:
+            if storid not in bnodes:
+                bnodes[storid] = world.new_blank_node()
+            return bnodes[storid]
+        return abbreviate(unabbreviate(storid))
+
+    def datatype(d):
+        if isinstance(d, str) or not d:
+            return d
+        return abbreviate(unabbreviate(d))
+
+    for s, p, o in sorted(extractor.objs):
+        module._add_obj_triple_spo(  # pylint: disable=protected-access
+            term(s), term(p), term(o)
+        )
+    for s, p, o, d in sorted(extractor.datas, key=repr):
+        module._add_data_triple_spod(  # pylint: disable=protected-access
+            term(s), term(p), o, datatype(d)
+        )
+    return module
+
+
+def classify(onto, reasoner="HermiT", debug=False):
+    """Classifies the module of MagMO ontology `onto`.
+
+    Returns the inferences for the entities in the namespace of `onto` in
+    the format of `reason_cache.record()`, with `onto` as context.  They can
+    be applied with `reason_cache.replay()`.
+
+    Raises BlankNodeError if the inferences involve blank nodes."""
+    module = extract_module(onto)
+    with record(module.world) as changes:
+        module.sync_reasoner(reasoner=reasoner, debug=debug)
+    if changes.get("blank_nodes"):
+        raise BlankNodeError("inferences of the module involve blank nodes")
+
+    (context,) = onto.world.graph.execute(
+        "SELECT iri FROM ontologies WHERE c=?", (onto.graph.c,)
+    ).fetchone()
+    namespace = onto.base_iri
+    return {
+        kind: {
+            table: [
+                [context, *triple[1:]]
+                for triple in rows
+                if triple[0] == MODULE_IRI and triple[1].startswith(namespace)
+            ]
+            for table, rows in triples.items()
+        }
+        for kind, triples in changes.items()
+    }
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Additional annotation properties used by the other modules.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# Additional Annotation Properties
+
+
+class IECEntry(AnnotationProperty):
+    pass
+
+
+class wikipediaReference(AnnotationProperty):
+    pass
+
+
+class wikidataReference(AnnotationProperty):
+    pass
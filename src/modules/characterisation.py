@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Characterisation data: XRD, EDX, MOKE and profilometry.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# Characterisation data
+
+
+### XRD
+
+
+class XrdTwoThetaAngles(emmo.Vector):
+    """The 2theta angles at which the counts are measured during X-ray
+    diffraction."""
+
+    prefLabel = en("XrdTwoThetaAngles")
+    altLabel = en("XRDTwoThetaAngles")
+    is_a = [
+        emmo.hasProperty.some(emmo.Angle),
+    ]
+
+
+class XrdCounts(emmo.Vector):
+    """Counts as a function of 2theta angle obtained from X-ray
+    diffraction."""
+
+    prefLabel = en("XrdCounts")
+    altLabel = en("XRDCounts")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.CountingUnit),
+    ]
+
+
+class XrayDiffractionData(emmo.Property, emmo.Matrix):
+    """Counts as a function of 2theta angle obtained from X-ray
+    diffraction."""
+
+    prefLabel = en("XrayDiffractionData")
+    is_a = [
+        emmo.hasProperty.exactly(1, XrdTwoThetaAngles),
+        emmo.hasProperty.exactly(1, XrdCounts),
+    ]
+
+
+class Xrd2dImage(emmo.Property, emmo.Matrix):
+    """2D array containing all pixel intensities from a 2D XRD camera.
+    This is the raw XRD data from which 1D spectra are obtained."""
+
+    prefLabel = en("Xrd2dImage")
+    altLabel = [
+        en("Xrd2DImage"),
+        en("XRD2dImage"),
+        en("XRD2DImage"),
+    ]
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.CountingUnit),
+    ]
+
+
+### EDX (Energy-Dispersive X-ray Spectroscopy)
+
+
+class EdxEnergy(emmo.Vector):
+    """The energy values at which the counts are measured during
+    Energy-Dispersive X-ray spectroscopy."""
+
+    prefLabel = en("EdxEnergy")
+    altLabel = en("EDXEnergy")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.EnergyUnit),
+    ]
+
+
+class EdxCounts(emmo.Vector):
+    """Counts as a function of energy obtained from Energy-Dispersive
+    X-ray spectroscopy."""
+
+    prefLabel = en("EdxCounts")
+    altLabel = en("EDXCounts")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.CountingUnit),
+    ]
+
+
+class EdxData(emmo.Property, emmo.Matrix):
+    """Counts as a function of energy obtained from Energy-Dispersive
+    X-ray spectroscopy."""
+
+    prefLabel = en("EdxData")
+    altLabel = [
+        en("EDXData"),
+        en("EnergyDispersiveXraySpectroscopyData")
+    ]
+    is_a = [
+        emmo.hasProperty.exactly(1, EdxEnergy),
+        emmo.hasProperty.exactly(1, EdxCounts),
+    ]
+
+
+### MOKE (Magneto-Optic Kerr Effect)
+
+
+class MokeAppliedField(emmo.Vector):
+    """The applied magnetic field values during MOKE measurement."""
+
+    prefLabel = en("MokeAppliedField")
+    altLabel = en("MOKEAppliedField")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.MagneticFieldStrengthUnit),
+    ]
+
+
+class MokeKerrSignal(emmo.Vector):
+    """The Kerr signal (rotation or ellipticity) as a function of
+    applied field obtained from MOKE measurement."""
+
+    prefLabel = en("MokeKerrSignal")
+    altLabel = [
+        en("MOKEKerrSignal"),
+        en("KerrSignal"),
+    ]
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.DimensionlessUnit),
+    ]
+
+
+class MokeData(emmo.Property, emmo.Matrix):
+    """Kerr signal as a function of applied magnetic field obtained
+    from Magneto-Optic Kerr Effect measurement."""
+
+    prefLabel = en("MokeData")
+    altLabel = [
+        en("MOKEData"),
+        en("MagnetoOpticKerrEffectData"),
+    ]
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Magneto-optic_Kerr_effect"
+    )
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=121-12-97"
+    )
+    is_a = [
+        emmo.hasProperty.exactly(1, MokeAppliedField),
+        emmo.hasProperty.exactly(1, MokeKerrSignal),
+    ]
+
+
+### Profilometry
+
+
+class ProfilDistance(emmo.Vector):
+    """The distance values along the scan direction during
+    profilometry measurement."""
+
+    prefLabel = en("ProfilDistance")
+    altLabel = en("PROFILDistance")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.LengthUnit),
+    ]
+
+
+class ProfilTotalProfile(emmo.Vector):
+    """The height profile as a function of distance obtained from
+    profilometry measurement."""
+
+    prefLabel = en("ProfilTotalProfile")
+    altLabel = en("PROFILTotalProfile")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.LengthUnit),
+    ]
+
+
+class ProfilometryData(emmo.Property, emmo.Matrix):
+    """Height profile as a function of distance obtained from
+    profilometry measurement."""
+
+    prefLabel = en("ProfilometryData")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Profilometer")
+    is_a = [
+        emmo.hasProperty.exactly(1, ProfilDistance),
+        emmo.hasProperty.exactly(1, ProfilTotalProfile),
+    ]
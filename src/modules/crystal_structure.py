@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Crystal structure: space group, lattice constants and cell volume.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# Crystal structure
+
+
+# # Space group and lattice constants
+
+
+class SpaceGroup(emmo.NominalProperty):  # from define_ontology.py
+    """A spacegroup is the symmetry group of all symmetry operations
+    that apply to a crystal structure.
+
+    The complete symmetry of a crystal, including the Bravais lattice and
+    any translational symmetry elements, is given by one of the 240 space
+    groups.
+
+    A space group is identified by its Hermann-Mauguin symbol or space
+    group number (and setting) in the International tables of
+    Crystallography."""
+
+    prefLabel = en("SpaceGroup")
+    is_a = [emmo.hasStringValue.some(emmo.String)]
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q899033")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Space_group")
+
+
+class LatticeConstantA(emmo.Length):
+    """The length of lattice vectors `a`, where lattice vectors
+    `a`, `b` and `c` define the unit cell."""
+
+    prefLabel = en("LatticeConstantA")
+    altLabel = en("LatticeParameterA")
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=561-07-13"
+    )
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q625641")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Lattice_constant")
+
+
+class LatticeConstantB(emmo.Length):
+    """The length of lattice vectors `b`, where lattice vectors `a`, `b`
+    and `c` define the unit cell."""
+
+    prefLabel = en("LatticeConstantB")
+    altLabel = en("LatticeParameterB")
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=561-07-13"
+    )
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q625641")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Lattice_constant")
+
+
+class LatticeConstantC(emmo.Length):
+    """The length of lattice vectors `c`, where lattice vectors `a`, `b`
+    and `c` define the unit cell."""
+
+    prefLabel = en("LatticeConstantC")
+    altLabel = en("LatticeParameterC")
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=561-07-13"
+    )
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q625641")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Lattice_constant")
+
+
+class LatticeConstantAlpha(emmo.Angle):
+    """The angle between lattice vectors `b` and `c`, where lattice
+    vectors `a`, `b` and `c` define the unit cell."""
+
+    prefLabel = en("LatticeConstantAlpha")
+    altLabel = en("LatticeParameterAlpha")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q625641")
+
+
+class LatticeConstantBeta(emmo.Angle):
+    """The angle between lattice vectors `a` and `c`, where lattice
+    vectors `a`, `b` and `c` define the unit cell."""
+
+    prefLabel = en("LatticeConstantBeta")
+    altLabel = en("LatticeParameterBeta")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q625641")
+
+
+class LatticeConstantGamma(emmo.Angle):
+    """The angle between lattice vectors `a` and `b`, where lattice
+    vectors `a`, `b` and `c` define the unit cell."""
+
+    prefLabel = en("LatticeConstantGamma")
+    altLabel = en("LatticeParameterGamma")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q625641")
+
+
+class CellVolume(emmo.Volume):
+    """Volume of the unit cell."""
+
+    prefLabel = en("CellVolume")
+    altLabel = en("UnitCellVolume")
+
+
+# -----------------------------------------------------
+class CrystalStructure(emmo.Property):
+    """Description of ordered arrangement of atoms."""
+
+    prefLabel = en("CrystalStructure")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q895901")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Crystal_structure")
+    is_a = [
+        emmo.hasProperty.exactly(1, SpaceGroup),
+        emmo.hasProperty.exactly(1, LatticeConstantA),
+        emmo.hasProperty.exactly(1, LatticeConstantB),
+        emmo.hasProperty.exactly(1, LatticeConstantC),
+        emmo.hasProperty.exactly(1, LatticeConstantAlpha),
+        emmo.hasProperty.exactly(1, LatticeConstantBeta),
+        emmo.hasProperty.exactly(1, LatticeConstantGamma),
+        emmo.hasProperty.exactly(1, CellVolume),
+    ]
+
+# -----------------------------------------------------
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Energy density and line energy units and quantities.
+
+Also asserts the corresponding EMMO units as subclasses of the new unit
+classes and adds British and American spellings as altLabels.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# energy densities
+
+
+class EnergyDensityUnit(emmo.SIDimensionalUnit):
+    """Unit of energy density. Defined using SI base units."""
+
+    prefLabel = en("EnergyDensityUnit")
+    is_a = [emmo.hasDimensionString.value("T-2 L-1 M+1 I0 Θ0 N0 J0")]
+
+
+# Assert JoulePerCubicMetre as subclass of EnergyDensityUnit
+emmo.JoulePerCubicMetre.is_a.append(EnergyDensityUnit)
+add_altLabel(emmo.JoulePerCubicMetre, enUS("JoulePerCubicMeter"))
+add_altLabel(emmo.JoulePerCubicMetre, enGB("JoulePerCubicMetre"))
+# Assert MegaJoulePerCubicMetre as subclass of EnergyDensityUnit
+emmo.MegaJoulePerCubicMetre.is_a.append(EnergyDensityUnit)
+add_altLabel(emmo.MegaJoulePerCubicMetre, enGB("MegaJoulePerCubicMetre"))
+add_altLabel(emmo.MegaJoulePerCubicMetre, enUS("MegaJoulePerCubicMeter"))
+
+
+class EnergyDensity(emmo.PhysicalQuantity):
+    """Energy Density."""
+
+    prefLabel = en("EnergyDensity")
+    is_a = [
+        emmo.hasMeasurementUnit.some(EnergyDensityUnit),
+    ]
+
+
+class LineEnergyUnit(emmo.SIDimensionalUnit):
+    """Unit of energy per unit length. Defined using SI base units."""
+
+    prefLabel = en("LineEnergyUnit")
+    is_a = [emmo.hasDimensionString.value("T-2 L+1 M+1 I0 Θ0 N0 J0")]
+
+
+# Assert JoulePerMetre as subclass of LineEnergyUnit
+emmo.JoulePerMetre.is_a.append(LineEnergyUnit)
+add_altLabel(emmo.JoulePerMetre, enUS("JoulePerMeter"))
+add_altLabel(emmo.JoulePerMetre, enGB("JoulePerMetre"))
+
+
+class LineEnergy(emmo.PhysicalQuantity):
+    """Energy per unit length."""
+
+    prefLabel = en("LineEnergy")
+    altLabel = [en("EnergyPerUnitLength"), en("EnergyPerLength")]
+    is_a = [
+        emmo.hasMeasurementUnit.some(LineEnergyUnit),
+    ]
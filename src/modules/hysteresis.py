@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+Internal and external magnetic fields and hysteresis properties.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# Internal and external magnetic fields
+
+
+class ExternalMagneticField(emmo.ElectromagneticQuantity):
+    """The external field H′, acting on a sample that is produced by
+    electric currents or the stray field of magnets outside the sample
+    volume, is often called the applied field."""
+
+    prefLabel = en("ExternalMagneticField")
+    altLabel = [
+        en("AppliedMagneticField"),
+        pl("H'"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFieldStrengthUnit)]
+
+
+class DemagnetizingField(emmo.ElectromagneticQuantity):
+    """The magnetic field produced by the magnetization distribution
+    of the sample itself."""
+
+    prefLabel = enUS("DemagnetizingField")
+    altLabel = [
+        enGB("DemagnetisingField"),
+        pl("Hd"),
+    ]
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q5255001")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Demagnetizing_field")
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFieldStrengthUnit)]
+
+
+class InternalMagneticField(emmo.ElectromagneticQuantity):
+    """The internal field in the sample in the continuous medium
+    approximation is the sum of the external field H′ and the
+    demagnetizing field Hd."""
+
+    prefLabel = en("InternalMagneticField")
+    altLabel = pl("H")
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFieldStrengthUnit)]
+
+
+# Hysteresis properties
+
+
+class CoercivityHc(emmo.Coercivity):
+    """The internal magnetic field -Hc at which the macroscopic
+    magnetization vanishes is the coercivity or coercive force.
+
+    Although it is not an intrinsic property in our sense of the term,
+    the M-H loop coercivity Hc is sometimes referred to as
+    'intrinsic' coercivity.
+    """
+
+    prefLabel = en("CoercivityHc")
+    altLabel = [
+        en("CoercivityInternal"),
+        en("CoercivityHcInternal"),
+        en("CoerciveField"),
+        pl("Hc"),
+    ]
+    IECEntry = [
+        pl(
+            "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-02-35"
+        ),
+        pl(
+            "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=121-12-69"
+        ),
+        pl(
+            "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-02-36"
+        ),
+    ]
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q432635")
+
+
+class CoercivityBHc(emmo.Coercivity):
+    """Defined as internal field on the B(H) loop where B = 0.
+    It is also called flux coercivity BHc.
+
+    BHc depends on sample shape and has to be corrected for the
+    demagnetizing field.
+    """
+
+    prefLabel = en("CoercivityBHc")
+    altLabel = pl("BHc")
+
+
+class CoercivityHcExternal(emmo.Coercivity):
+    """The external magnetic field -H'c at which the macroscopic
+    magnetization vanishes.
+    The coercivity on M(H') loop, where H' is the external field."""
+
+    prefLabel = en("CoercivityHcExternal")
+    altLabel = pl("H'c")
+
+
+class CoercivityBHcExternal(emmo.Coercivity):
+    """Defined as external field on the B(H') loop where
+    B = 0. H' is the external field."""
+
+    prefLabel = en("CoercivityBHcExternal")
+    altLabel = pl("BH'c")
+
+
+class SwitchingFieldCoercivity(emmo.MagneticFieldStrength):
+    """Defined by the maximum slope of the descending branch of
+    the M-H hysteresis loop, with H the internal field."""
+
+    comment = pl(
+        "This field is often used when analysing the temperature\
+            dependent coercivity for deriving microstructural parameters."
+    )
+    prefLabel = en("SwitchingFieldCoercivity")
+    altLabel = pl("Hsw")
+
+
+class SwitchingFieldCoercivityExternal(emmo.MagneticFieldStrength):
+    """Defined by the maximum slope of the descending branch of
+    the M-H' hysteresis loop, with H' the external field."""
+
+    prefLabel = en("SwitchingFieldCoercivityExternal")
+    altLabel = pl("H'sw")
+
+
+class KneeField(emmo.MagneticFieldStrength):
+    """The maximum working field - also named knee field H_K, is
+    defined as the reverse internal field for which the magnetization
+    is reduced by 10%; thus it corresponds to the point on the
+    magnetization loop for which M = 0.9 Mr (J = 0.9 Jr)."""
+
+    prefLabel = en("KneeField")
+    altLabel = [
+        en("KneeFieldInternal"),
+        en("MaximumWorkingField"),
+        pl("Hk"),
+    ]
+
+
+class KneeFieldExternal(emmo.MagneticFieldStrength):
+    """The maximum working field - also named knee field H_K,
+    is defined as the reverse external field for which the
+    magnetization is reduced by 10%; thus it corresponds to the
+    point on the magnetization loop for which M = 0.9 Mr (J = 0.9 Jr).
+    """
+
+    prefLabel = en("KneeFieldExternal")
+    altLabel = pl("H'k")
+
+
+class Remanence(emmo.ElectromagneticQuantity):
+    """The remanence Mr which remains when the applied field is
+    restored to zero in the hysteresis loop"""
+
+    prefLabel = en("Remanence")
+    altLabel = [
+        enUS("RemanentMagnetization"),
+        enGB("RemanentMagnetisation"),
+        pl("Mr"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFieldStrengthUnit)]
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q4150950")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Remanence")
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-02-40"
+    )
+
+
+class RemanentMagneticPolarization(emmo.ElectromagneticQuantity):
+    """The remanent magnetic polarization Jr which remains when the applied
+    field is restored to zero in the hysteresis loop"""
+
+    prefLabel = enUS("RemanentMagneticPolarization")
+    altLabel = [
+        enGB("RemanentMagneticPolarisation"),
+        pl("Jr"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFluxDensityUnit)]
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-02-39"
+    )
+
+
+class ExternalSusceptibility(emmo.MagneticSusceptibility):
+    """Ratio of the change of magnetization and the external
+    field: M = chi' H'."""
+
+    prefLabel = en("ExternalSusceptibility")
+    altLabel = pl("chi'")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q691463")
+
+
+class InternalSusceptibility(emmo.MagneticSusceptibility):
+    """Ratio of the change of magnetization and the internal
+    field: M = chi H."""
+
+    prefLabel = en("InternalSusceptibility")
+    altLabel = pl("chi")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q691463")
+
+
+class MassSusceptibility(emmo.ElectromagneticQuantity):
+    """Ratio of the change of the magnetic moment per unit mass and
+    the internal field: sigma = chi_m H."""
+
+    comment = en("MagneticSusceptibilityPerMassDensity")
+    prefLabel = en("MassSusceptibility")
+    altLabel = pl("chi_m")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q104655916")
+    is_a = [emmo.hasMeasurementUnit.some(emmo.VolumePerMassUnit)]
+
+
+class AbsolutePermeability(emmo.ElectromagneticQuantity):
+    """Ratio of the change of magnetic flux density and the internal
+    field: B = mu H."""
+
+    prefLabel = en("AbsolutePermeability")
+    altLabel = pl("mu")
+    is_a = [emmo.hasMeasurementUnit.some(emmo.PermeabilityUnit)]
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=121-12-28"
+    )
+
+
+class MaximumEnergyProduct(emmo.ElectromagneticQuantity):
+    """The value of the maximum energy product (BH)max is deduced from a
+    plot of BH(B) for all points of the second quadrant of the B-H
+    hysteresis loop. BH varies with B going through a maximum value (BH)max
+    for a particular value of B.
+
+    (BH)max equals the area of the largest second-quadrant rectangle which
+    fits under the B-H loop.
+
+    The maximum energy product is considered to be the best single index
+    of quality of a permanent magnet material.
+    It is twice the energy stored in the stray field of the magnet of
+    optimal shape.
+    """
+
+    prefLabel = en("MaximumEnergyProduct")
+    altLabel = pl("(BH)max")
+    is_a = [emmo.hasMeasurementUnit.some(EnergyDensityUnit)]
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Maximum_energy_product")
+
+
+class SaturationMagneticPolarization(emmo.ElectromagneticQuantity):
+    """The Saturation magnetic polarization Jsat is the maximum
+    obtainable magnetic polarization for a given substance
+    at a given temperature. Jsat should be used instead of Js to avoid
+    confusion with the symbol for the spontaneous polarization"""
+
+    prefLabel = enUS("SaturationMagneticPolarization")
+    altLabel = [
+        enGB("SaturationMagneticPolarisation"),
+        en("Jsat"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFluxDensityUnit)]
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-01-05"
+    )
+
+
+class SaturationMagnetization(emmo.ElectromagneticQuantity):
+    """The Saturation magnetization Msat is the maximum
+    obtainable magnetic magnetization for a given substance
+    at a given temperature. Msat should be used instead Ms to avoid
+    confusion with the symbol for the SpontaneousMagnetization"""
+
+    prefLabel = enUS("SaturationMagnetization")
+    altLabel = [
+        enGB("SaturationMagnetisation"),
+        en("Msat"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFieldStrengthUnit)]
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-01-04"
+    )
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Saturation_(magnetic)")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q2630994")
+
+
+class LoopSquarenessFactorInternal(
+    emmo.ElectromagneticQuantity, emmo.RatioQuantity
+):
+    """The internal loop squareness factor SF is defined as the ratio of
+    the internal KneeField Hk over the internal Coercivity Hc
+    (SF = KneeFieldInternal / CoercivityHcInternal)."""
+
+    prefLabel = en("LoopSquarenessFactorInternal")
+    altLabel = [
+        en("SquarenessFactorInternal"),
+        en("SF_internal"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.DimensionlessUnit)]
+
+
+class LoopSquarenessFactorExternal(
+    emmo.ElectromagneticQuantity, emmo.RatioQuantity
+):
+    """The external loop squareness factor is defined as the ratio of
+    the external KneeField H'k over the external Coercivity H'c
+    (SF' = KneeFieldExternal / CoercivityHcExternal)."""
+
+    prefLabel = en("LoopSquarenessFactorExternal")
+    altLabel = [
+        en("SquarenessFactorExternal"),
+        en("SF_external"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.DimensionlessUnit)]
+
+
+class LoopSquareness(emmo.ElectromagneticQuantity, emmo.RatioQuantity):
+    """The external loop squareness is defined as the ratio of
+    the remanent polarisation over the saturation polarisation
+    (SS = RemanentMagneticPolarization / SaturationMagneticPolarization)."""
+
+    prefLabel = en("LoopSquareness")
+    altLabel = [
+        en("Squareness"),
+        en("SS"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.DimensionlessUnit)]
+
+
+# -----------------------------------------------------
+
+
+class MagneticHysteresisProperties(emmo.Property):
+    """The essential practical characteristic of any ferromagnetic material
+    is the irreversible nonlinear response of magnetization M to an imposed
+    magnetic field H. This response is given by the hysteresis loop. The
+    characteristics of hysteresis loop are known as hysteresis properties.
+
+    Instead of M(H), other quantities can be used to plot a hysteresis loop.
+
+    M(H): Magnetization as function of the internal field.
+    M(H'): Magnetization as function of the external field.
+
+    J(H): Magnetic polarization as function of the internal field.
+    J(H'): Magnetic polarization as function of the external field.
+
+    B(H): Magnetic flux density as function of the internal field.
+    B(H'): Magnetic flux density as function of the external field.
+    """
+
+    prefLabel = en("MagneticHysteresisProperties")
+    is_a = [
+        emmo.hasProperty.exactly(1, CoercivityHc),
+        emmo.hasProperty.min(0, CoercivityBHc),
+        emmo.hasProperty.min(0, CoercivityHcExternal),
+        emmo.hasProperty.min(0, CoercivityBHcExternal),
+        emmo.hasProperty.min(0, SwitchingFieldCoercivity),
+        emmo.hasProperty.min(0, SwitchingFieldCoercivityExternal),
+        emmo.hasProperty.min(0, KneeField),
+        emmo.hasProperty.min(0, KneeFieldExternal),
+        emmo.hasProperty.exactly(1, Remanence),
+        emmo.hasProperty.min(0, RemanentMagneticPolarization),
+        emmo.hasProperty.min(0, SaturationMagneticPolarization),
+        emmo.hasProperty.min(0, LoopSquarenessFactorInternal),
+        emmo.hasProperty.min(0, LoopSquarenessFactorExternal),
+        emmo.hasProperty.min(0, LoopSquareness),
+        emmo.hasProperty.min(0, MaximumEnergyProduct),
+    ]
+
+
+class ExtrinsicMagneticProperties(emmo.Property):
+    """Extrinsic magnetic Properties depend on the microstructure."""
+
+    prefLabel = en("ExtrinsicMagneticProperties")
+    is_a = [
+        emmo.hasProperty.exactly(1, MagneticHysteresisProperties),
+        emmo.hasProperty.min(0, DemagnetizingFactor),
+        emmo.hasProperty.min(0, AbsolutePermeability),
+        emmo.hasProperty.min(0, emmo.RelativePermeability),
+    ]
+
+# -----------------------------------------------------
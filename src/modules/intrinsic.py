@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""
+Intrinsic magnetic properties: magnetization, anisotropy and exchange.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+# pylint: disable=undefined-variable,invalid-name
+
+# intrinsic magnetic properties
+
+## magnetization
+
+add_altLabel(emmo.Magnetization, enUS("VolumeMagnetization"))
+add_altLabel(emmo.Magnetization, enGB("VolumeMagnetisation"))
+add_altLabel(emmo.Magnetization, enUS("Magnetization"))
+add_altLabel(emmo.Magnetization, enGB("Magnetisation"))
+
+
+class MassMagnetizationUnit(emmo.SIDimensionalUnit):
+    """Class of units of the magnetization per unit mass.
+    Defined using SI base units."""
+
+    prefLabel = enUS("MassMagnetizationUnit")
+    altLabel = [
+        enGB("MassMagnetisationUnit"),
+        enUS("SpecificMagnetizationUnit"),
+        enGB("SpecificMagnetisationUnit"),
+    ]
+    is_a = [emmo.hasDimensionString.value("T0 L+2 M-1 I+1 Θ0 N0 J0")]
+
+
+class AmpereSquareMeterPerKilogram(MassMagnetizationUnit):
+    """Unit of the magnetic moment per unit mass: Am²/kg."""
+
+    prefLabel = enUS("AmpereSquareMeterPerKilogram")
+    altLabel = [
+        enGB("AmpereSquareMetrePerKilogram"),
+    ]
+    unitSymbol = en("A⋅m²/kg")
+    ucumCode = en("A.m2.kg-1")
+
+
+class MagneticMomentPerUnitMass(emmo.ElectromagneticQuantity):
+    """Magnetic moment per unit mass, sigma."""
+
+    comment = en(
+        "The magnetization is obtained by multiplying sigma with \
+                     the density"
+    )
+    prefLabel = en("MagneticMomentPerUnitMass")
+    altLabel = [
+        en("SpecificMagneticMoment"),
+        enUS("MassMagnetization"),
+        enGB("MassMagnetisation"),
+        pl("sigma"),
+    ]
+
+    is_a = [emmo.hasMeasurementUnit.some(MassMagnetizationUnit)]
+
+
+class SpontaneousMagnetization(emmo.ElectromagneticQuantity):
+    """The spontaneous magnetization, Ms, of a ferromagnet is the result
+    of alignment of the magnetic moments of individual atoms. Ms exists
+    within a domain of a ferromagnet."""
+
+    prefLabel = enUS("SpontaneousMagnetization")
+    altLabel = [
+        enGB("SpontaneousMagnetisation"),
+        pl("Ms"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFieldStrengthUnit)]
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-02-41"
+    )
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Spontaneous_magnetization"
+    )
+
+
+class SpontaneousMagneticPolarization(emmo.ElectromagneticQuantity):
+    """The spontaneous magnetic polarization, Js, of a ferromagnet is the
+    result of alignment of the magnetic moments of  individual atoms.
+    Js exists within a domain of a ferromagnet."""
+
+    prefLabel = enUS("SpontaneousMagneticPolarization")
+    altLabel = [
+        enGB("SpontaneousMagneticPolarisation"),
+        pl("Js"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.MagneticFluxDensityUnit)]
+
+
+## anisotropy
+
+
+class MagneticAnisotropy(emmo.Property):
+    """Magnetic anisotropy means that the magnetic properties depend on
+    the direction in which they are measured."""
+
+    prefLabel = en("MagneticAnisotropy")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Magnetic_anisotropy")
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=221-01-08"
+    )
+
+
+class RectangularCuboid(emmo.EuclideanSpace):
+    """A rectangular cuboid is a special case of a cuboid with rectangular
+    faces in which all of its dihedral angles are right angles."""
+
+    prefLabel = en("RectangularCuboid")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q262959")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Rectangular_cuboid")
+
+
+class GeometricalSize(emmo.Property):
+    """Spatial extension along the principal axes."""
+
+    prefLabel = en("GeometricalSize")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Size")
+    is_a = [emmo.hasProperty.exactly(3, emmo.Length)]
+
+
+class GeometricShape(emmo.Property, emmo.Geometrical):
+    """Geometric shape.
+
+    Two extrinsic properties, the remanence Mr
+    and coercivity Hc, which depend on the sample shape
+    """
+
+    prefLabel = en("GeometricShape")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q207961")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Shape")
+    is_a = [emmo.hasSpatialDirectPart.exactly(1, emmo.Cylinder | RectangularCuboid)]
+
+
+class SampleGeometry(emmo.Property):
+    """The size and shape of the magnet"""
+
+    prefLabel = en("SampleGeometry")
+    is_a = [
+        emmo.hasProperty.exactly(1, GeometricalSize),
+        emmo.hasProperty.exactly(1, GeometricShape),
+    ]
+
+
+class DemagnetizingFactor(emmo.ElectromagneticQuantity):
+    """For a uniformly magnetized ellipsoid with magnetization along a
+    major axis the demagnetizing field is Hd = -N M.
+
+    The principal components of the diagonal demagnetizing tensor form
+    the demagnetizing factors. Only two of the three are independent
+    because the demagnetizing tensor has unit trace Nx + Ny + Nz = 1.
+    """
+
+    comment = pl(
+        "H = H' - DM, where D is the demagnetizing factor, M is the \
+            magnetization, and H is the internal field."
+    )
+    prefLabel = enUS("DemagnetizingFactor")
+    altLabel = [
+        enGB("DemagnetisingFactor"),
+        pl("N"),
+        pl("D"),
+    ]
+    is_a = [emmo.hasMeasurementUnit.some(emmo.DimensionlessUnit)]
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=121-12-63"
+    )
+
+
+class ShapeAnisotropyConstant(EnergyDensity):
+    """The energy density of a small particle given by
+
+    K1sh = (mu_0/4)(1-3D)Ms²
+
+    where mu_0 is the vacuum magnetic permeability and D is the
+    DemagnetizingFactor and Ms is the spontaneous magnetization.
+    """
+
+    prefLabel = en("ShapeAnisotropyConstant")
+    altLabel = pl("K1sh")
+
+
+class ShapeAnisotropy(MagneticAnisotropy):
+    """The difference in magnetostatic energy when an elongated particle
+    is magnetized along its short and long axis.
+    """
+
+    comment = en(
+        "Shape anisotropy is restricted to small particles, where \
+            the inter-atomic exchange ensures a uniform  magnetization."
+    )
+    prefLabel = en("ShapeAnisotropy")
+    is_a = [
+        emmo.hasProperty.exactly(1, DemagnetizingFactor),
+        emmo.hasProperty.exactly(1, ShapeAnisotropyConstant),
+    ]
+
+
+## magnetocrystalline anisotropy
+
+
+class MagnetocrystallineAnisotropyEnergy(EnergyDensity):
+    """The magnetocrystalline anisotropy energy density."""
+
+    prefLabel = en("MagnetocrystallineAnisotropyEnergy")
+    altLabel = pl("MAE")
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Magnetocrystalline_anisotropy"
+    )
+
+
+class AnisotropyField(emmo.MagneticFieldStrength):
+    """The anisotropy field Ha is defined as the field needed to
+    saturate the magnetization of a uniaxial crystal in a hard direction.
+    Ha = 2 Ku/Js
+    """
+
+    comment = en(
+        "Beware of taking the idea of anisotropy field too literally. \
+            Except at small angles, the energy variation in a field is \
+            not the same as the leading term in the anisotropy. \
+            A magnetic field defines an easy direction, not an easy axis."
+    )
+    prefLabel = en("AnisotropyField")
+    altLabel = pl("Ha")
+
+
+class UniaxialAnisotropyConstant(EnergyDensity):
+    """The change of energy with angle of the magnetization from
+    the preferred direction is expressed with the
+    uniaxial anisotropy constant Ea = Ku sin²(theta)."""
+
+    prefLabel = en("UniaxialAnisotropyConstant")
+    altLabel = pl("Ku")
+
+
+class UniaxialMagneticAnisotropy(MagneticAnisotropy):
+    """The anisotropy can be described as uniaxial when the anisotropy
+    energy E depends on only a single angle, the angle between the
+    magnetization vector and the easy direction of magnetization.
+    """
+
+    prefLabel = en("UniaxialMagneticAnisotropy")
+    is_a = [
+        emmo.hasProperty.exactly(1, AnisotropyField),
+        emmo.hasProperty.exactly(1, UniaxialAnisotropyConstant),
+    ]
+
+
+class InducedMagneticAnisotropy(UniaxialMagneticAnisotropy):
+    """Uniaxial anisotropy induced by annealing in a magnetic field or
+    by applying a stress."""
+
+    prefLabel = en("InducedMagneticAnisotropy")
+
+
+class MagnetocrystallineAnisotropyConstantK1(EnergyDensity):
+    """The magnetocrystalline constant K1 for tetragonal or
+    hexagonal crystals."""
+
+    comment = pl(
+        "Ea = K1 sin^2(phi) + K2 sin^4(phi) where Ea is the is the \
+            anisotropy energy density and phi is the angle of the \
+            magnetization with respect to the c-axis of the crystal."
+    )
+    prefLabel = en("MagnetocrystallineAnisotropyConstantK1")
+    altLabel = pl("K1")
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Magnetocrystalline_anisotropy"
+    )
+
+
+class MagnetocrystallineAnisotropyConstantK2(EnergyDensity):
+    """The magnetocrystalline constant K2 for tetragonal or
+    hexagonal crystals."""
+
+    comment = pl(
+        "Ea = K1 sin^2(phi) + K2 sin^4(phi) where Ea is the is the \
+            anisotropy energy density and phi is the angle of the \
+            magnetization with respect to the c-axis of the crystal."
+    )
+    prefLabel = en("MagnetocrystallineAnisotropyConstantK2")
+    altLabel = pl("K2")
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Magnetocrystalline_anisotropy"
+    )
+
+
+class MagnetocrystallineAnisotropyConstantK1c(EnergyDensity):
+    """The magnetocrystalline constant K1c for cubic crystals."""
+
+    comment = pl(
+        "Ea = K1c(a1²a2²+a2²a3²+a1²a3²)+K2c(a1²a2²a3²) where Ea is \
+            the anisotropy energy density and a1,a2,a3 are the direction \
+            cosines of the magnetization"
+    )
+    prefLabel = en("MagnetocrystallineAnisotropyConstantK1c")
+    altLabel = pl("K1c")
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Magnetocrystalline_anisotropy"
+    )
+
+
+class MagnetocrystallineAnisotropyConstantK2c(EnergyDensity):
+    """The magnetocrystalline constant K2c for cubic crystals."""
+
+    comment = pl(
+        "Ea = K1c(a1²a2²+a2²a3²+a1²a3²)+K2c(a1²a2²a3²) where Ea is the \
+            anisotropy energy density and a1,a2,a3 are the direction \
+            cosines of the magnetization"
+    )
+    prefLabel = en("MagnetocrystallineAnisotropyConstantK2c")
+    altLabel = pl("K2c")
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Magnetocrystalline_anisotropy"
+    )
+
+
+class UniaxialMagnetocrystallineAnisotropy(UniaxialMagneticAnisotropy):
+    """The uniaxial anisotropy depends on only a single angle, the angle
+    magnetization vector and the c axis.
+    """
+
+    prefLabel = en("UniaxialMagnetocrystallineAnisotropy")
+    is_a = [
+        emmo.hasProperty.exactly(1, MagnetocrystallineAnisotropyConstantK1),
+        emmo.hasProperty.min(0, MagnetocrystallineAnisotropyConstantK2),
+    ]
+
+
+class CubicMagnetocrystallineAnisotropy(MagneticAnisotropy):
+    """Cubic crystals anisotropy."""
+
+    prefLabel = en("CubicMagnetocrystallineAnisotropy")
+    is_a = [
+        emmo.hasProperty.exactly(1, MagnetocrystallineAnisotropyConstantK1c),
+        emmo.hasProperty.min(0, MagnetocrystallineAnisotropyConstantK2c),
+    ]
+
+
+class MagnetocrystallineAnisotropy(emmo.Property):
+    """Magnetocrystalline anisotropy is an intrinsic property. The
+    magnetisation process is different when the field is applied along
+    different crystallographic directions, and the anisotropy reflects
+    the crystal symmetry. Its origin is in the crystal-field interaction
+    and spin-orbit coupling, or else the interatomic dipole–dipole
+    interaction."""
+
+    prefLabel = en("MagnetocrystallineAnisotropy")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q6731660")
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Magnetocrystalline_anisotropy"
+    )
+    is_a = [
+        emmo.hasProperty.exactly(
+            1,
+            UniaxialMagnetocrystallineAnisotropy
+            | CubicMagnetocrystallineAnisotropy,
+        )
+    ]
+
+
+## Exchange
+
+
+class ExchangeStiffnessConstant(LineEnergy):
+    """Exchange constant, A, in the continuum theory of micromagnetism.
+
+    The exchange stiffness A is related to the Curie temperature TC:
+    A is roughly k_B T_c/(2 a_0), where a_0 is the lattice parameter in
+    a simple structure."""
+
+    prefLabel = en("ExchangeStiffnessConstant")
+    altLabel = pl("A")
+
+
+# ----------------------------------------------------
+class IntrinsicMagneticProperties(emmo.Property):
+    """Intrinsic magnetic properties refer to atomic-scale magnetism and
+    depend on the crystal structure."""
+
+    prefLabel = en("IntrinsicMagneticProperties")
+    is_a = [
+        emmo.hasProperty.some(SpontaneousMagnetization),
+        emmo.hasProperty.some(SpontaneousMagneticPolarization),
+        emmo.hasProperty.some(MagnetocrystallineAnisotropy),
+        emmo.hasProperty.some(ExchangeStiffnessConstant),
+        emmo.hasProperty.some(emmo.CurieTemperature | emmo.NeelTemperature),
+    ]
+
+# -----------------------------------------------------
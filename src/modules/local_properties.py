@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Local properties of thin-film samples, e.g. measured on a grid.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# local properties
+
+
+class Reflectivity(emmo.Property):
+    """Capacity of an object to reflect light."""
+
+    prefLabel = en("Reflectivity")
+    altLabel = [
+        en("Reflectance"),
+        pl("R"),
+    ]
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q663650")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Reflectance")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.DimensionlessUnit),
+    ]
+
+
+class LocalReflectivity(Reflectivity):
+    """Local reflectivity measured with the magneto-optic Kerr effect."""
+
+    prefLabel = en("LocalReflectivity")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalCoercivity(CoercivityHcExternal):
+    """Local coercive field measured with the magneto-optic Kerr effect."""
+
+    prefLabel = en("LocalCoercivity")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalXrayDiffractionData(XrayDiffractionData):
+    """Local X-ray diffraction data."""
+
+    prefLabel = en("LocalXrayDiffractionData")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalLatticeConstantA(LatticeConstantA):
+    """The length of lattice vectors `a`, where lattice vectors
+    `a`, `b` and `c` defines the unit cell, measured locally."""
+
+    prefLabel = en("LocalLatticeConstantA")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalLatticeConstantC(LatticeConstantC):
+    """The length of lattice vectors `c`, where lattice vectors
+    `a`, `b` and `c` defines the unit cell, measured locally."""
+
+    prefLabel = en("LocalLatticeConstantC")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalThickness(emmo.Thickness):
+    """The thickness of the film measured locally."""
+
+    prefLabel = en("LocalThickness")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalAtomPercent(emmo.RatioQuantity):
+    """Local atomic percentage obtained from EDX quantification."""
+
+    prefLabel = en("LocalAtomPercent")
+    altLabel = [en("LocalAtomicPercent"), en("at.%")]
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.Percent),
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalMassPercent(emmo.RatioQuantity):
+    """Local mass percentage obtained from EDX quantification."""
+
+    prefLabel = en("LocalMassPercent")
+    altLabel = [en("LocalWeightPercent"), en("wt.%")]
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.Percent),
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalAnnealingTemperature(emmo.ThermodynamicTemperature):
+    """Local annealing temperature from heat treatment such as
+    Rapid Thermal Annealing (RTA)."""
+
+    prefLabel = en("LocalAnnealingTemperature")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalAnnealingTime(emmo.Duration):
+    """Local annealing time (duration) from heat treatment such as
+    Rapid Thermal Annealing (RTA)."""
+
+    prefLabel = en("LocalAnnealingTime")
+    altLabel = en("LocalAnnealingDuration")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalPhaseFraction(emmo.RatioQuantity):
+    """Local phase fraction obtained from XRD analysis, typically
+    expressed in weight percent."""
+
+    prefLabel = en("LocalPhaseFraction")
+    altLabel = en("LocalPhaseContent")
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.Percent),
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalEdxData(EdxData):
+    """Local EDX data measured at a specific position."""
+
+    prefLabel = en("LocalEdxData")
+    altLabel = en("LocalEDXData")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalMokeData(MokeData):
+    """Local MOKE data measured at a specific position."""
+
+    prefLabel = en("LocalMokeData")
+    altLabel = en("LocalMOKEData")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class LocalProfilometryData(ProfilometryData):
+    """Local profilometry data measured at a specific position."""
+
+    prefLabel = en("LocalProfilometryData")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.PositionVector),
+    ]
+
+
+class ThinFilmMagnet(Magnet, emmo.MaterialBySize):
+    """Piece of matter made of one or more magnetic material
+    in form a thin film."""
+
+    prefLabel = en("ThinFilmMagnet")
+    is_a = [
+        emmo.hasProperty.min(0, InducedMagneticAnisotropy),
+        emmo.hasProperty.min(0, SampleGeometry),
+        emmo.hasProperty.min(0, LocalThickness),
+        emmo.hasProperty.min(0, LocalCoercivity),
+        emmo.hasProperty.min(0, LocalReflectivity),
+        emmo.hasProperty.min(0, LocalXrayDiffractionData),
+        emmo.hasProperty.min(0, LocalLatticeConstantA),
+        emmo.hasProperty.min(0, LocalLatticeConstantC),
+        # New properties from issue #20
+        emmo.hasProperty.min(0, LocalAtomPercent),
+        emmo.hasProperty.min(0, LocalMassPercent),
+        emmo.hasProperty.min(0, LocalAnnealingTemperature),
+        emmo.hasProperty.min(0, LocalAnnealingTime),
+        emmo.hasProperty.min(0, LocalPhaseFraction),
+        emmo.hasProperty.min(0, LocalEdxData),
+        emmo.hasProperty.min(0, LocalMokeData),
+        emmo.hasProperty.min(0, LocalProfilometryData),
+        emmo.hasProperty.min(0, Xrd2dImage),
+    ]
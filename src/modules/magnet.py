@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Magnets and their microstructure.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# Magnet
+
+
+## Microstructure
+
+
+class MainMagneticPhase(MagneticMaterial, emmo.PhaseOfMatter):
+    """Main phase of the magnet"""
+
+    prefLabel = en("MainMagneticPhase")
+    is_a = [
+        emmo.hasProperty.some(emmo.VolumeFraction),
+        emmo.hasSpatialPart.exactly(
+            1, AmorphousMagneticMaterial | CrystallineMagneticMaterial
+        ),
+    ]
+
+
+class SecondaryPhase(emmo.Material, emmo.PhaseOfMatter):
+    """An additional phase within a magnet, for example soft inclusions
+    or triple junctions."""
+
+    prefLabel = en("SecondaryPhase")
+    is_a = [
+        emmo.hasProperty.some(emmo.VolumeFraction),
+        emmo.hasSpatialPart.exactly(
+            1,
+            AmorphousMagneticMaterial
+            | CrystallineMagneticMaterial
+            | NonMagneticMaterial,
+        ),
+    ]
+
+
+class GrainBoundaryPhase(SecondaryPhase):
+    """Material separating grains in a microstructure."""
+
+    comment = en(
+        "In permanent magnets, the grain boundary phase inhibits \
+            the propagation of the magnetic reversal from grain to grain."
+    )
+    prefLabel = en("GrainBoundaryPhase")
+    is_a = [
+        emmo.hasProperty.some(emmo.Thickness),
+    ]
+
+
+class GranularMicrostructure(emmo.Material):
+    """The granular structure of a magnetic materials."""
+
+    prefLabel = en("GranularMicrostructure")
+    is_a = [
+        emmo.hasSpatialPart.exactly(1, MainMagneticPhase),
+        emmo.hasSpatialPart.min(0, SecondaryPhase),
+        emmo.hasSpatialPart.min(0, GrainBoundaryPhase),
+    ]
+
+
+class Magnet(emmo.FunctionalMaterial):
+    """Piece of matter made of one or more magnetic materials."""
+
+    prefLabel = en("Magnet")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q11421")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Magnet")
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=151-14-06"
+    )
+    is_a = [
+        emmo.hasProperty.min(0, emmo.MaterialsProcessing),
+        emmo.hasProperty.min(0, emmo.WorkpieceForming),
+        emmo.hasSpatialPart.min(0, GranularMicrostructure),
+        emmo.hasProperty.exactly(1, ExtrinsicMagneticProperties),
+        emmo.hasProperty.min(0, XrayDiffractionData),
+    ]
+
+
+class BulkMagnet(Magnet, emmo.MaterialBySize):
+    """Piece of matter made of one or more magnetic material."""
+
+    prefLabel = en("BulkMagnet")
+    is_a = [
+        emmo.hasProperty.exactly(1, SampleGeometry),
+        emmo.hasProperty.exactly(1, ShapeAnisotropy),
+        emmo.hasProperty.exactly(1, DemagnetizingFactor),
+    ]
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Magnetic materials, grains and granular structure.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+### magnetic materials
+
+
+### Grains and granular structure
+
+
+class EulerAngles(emmo.Quantity):
+    """Three angles introduced by Leonhard Euler to describe the
+    orientation of a rigid body with respect to a fixed coordinate
+    system."""
+
+    prefLabel = en("EulerAngles")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q751290")
+    is_a = [emmo.hasProperty.exactly(3, emmo.Angle)]
+
+
+class CrystallographicOrientation(emmo.Property):
+    """Relative direction of a crystallite in space with respect to
+    another, disregarding distance."""
+
+    prefLabel = en("CrystallographicOrientation")
+    altLabel = en("CrystalOrientation")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q11799166")
+    is_a = [emmo.hasProperty.exactly(1, EulerAngles)]
+
+
+class GrainMisalignmentAngle(emmo.Angle):
+    """Standard deviation of the angle of the easy axis with respect to
+    the alignment direction.
+    """
+
+    prefLabel = en("GrainMisalignmentAngle")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q117089304")
+
+
+class EasyAxisDistributionSigma(emmo.Angle):
+    """Standard deviation of the grain misalignment angle in an ensembles
+    of misaligned magnetic particles.
+
+    This refers not only to isotropic magnets but also to
+    partly aligned or textured magnets, where the easy-axis distribution
+    is described by a function P(theta).
+    """
+
+    prefLabel = en("EasyAxisDistributionSigma")
+
+
+class Grain(emmo.Crystal):
+    """A grain is a small or even microscopic crystal which forms, for
+    example, during the cooling of many materials."""
+
+    prefLabel = en("Grain")
+    altLabel = en("Crystallite")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q899604")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Crystallite")
+    is_a = [
+        emmo.hasProperty.exactly(1, CrystalStructure),
+        emmo.hasProperty.exactly(1, emmo.ChemicalComposition),
+        emmo.hasProperty.exactly(1, emmo.Diameter),
+        emmo.hasProperty.exactly(
+            1, CrystallographicOrientation | GrainMisalignmentAngle
+        ),
+    ]
+
+
+class MeanGrainSize(emmo.Length):
+    """The mean of the grain diameter of grains. Diameter is the diameter
+    of a sphere with equivalent volume."""
+
+    prefLabel = en("MeanGrainSize")
+
+
+class SigmaGrainSize(emmo.Length):
+    """The standard deviation of the grain diameter of grains. Diameter is
+    the diameter of a sphere with equivalent volume."""
+
+    prefLabel = en("SigmaGrainSize")
+
+
+class GrainSizeDistribution(emmo.Property):
+    """Function representing relative sizes of grains in a system.
+    Given by its mean and standard deviation of a lognormal distribution
+    """
+
+    prefLabel = en("GrainSizeDistribution")
+    altLabel = en("ParticleSizeDistribution")
+    wikipediaReference = pl(
+        "https://en.wikipedia.org/wiki/Particle-size_distribution"
+    )
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q2054937")
+    is_a = [
+        emmo.hasProperty.exactly(1, MeanGrainSize),
+        emmo.hasProperty.exactly(1, SigmaGrainSize),
+    ]
+
+
+class MagneticMaterial(emmo.MaterialByStructure):
+    """Magnetically ordered solids which have atomic magnetic moments due
+    to unpaired electrons."""
+
+    prefLabel = en("MagneticMaterial")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q11587827")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.ChemicalComposition),
+        emmo.hasProperty.exactly(1, emmo.Density),
+        emmo.hasProperty.exactly(1, IntrinsicMagneticProperties),
+    ]
+
+
+class AmorphousMagneticMaterial(emmo.AmorphousMaterial, MagneticMaterial):
+    """Any amorphous structure entails a distribution of nearest-neighbour
+    environments and bond lengths for a given magnetic atom, described by
+    the radial distribution function and higher-order correlation
+    functions. These distributions lead to a distribution of site moments,
+    exchange interactions, dipolar and crystal fields, all of which
+    influence the nature of the magnetic order."""
+
+    prefLabel = en("AmorphousMagneticMaterial")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Amorphous_magnet")
+
+
+class GranularStructure(emmo.CrystallineMaterial):
+    """Ensemble of grains of 1 or more grains."""
+
+    prefLabel = en("GranularStructure")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.CrystalStructure),
+        emmo.hasProperty.exactly(1, GrainSizeDistribution),
+        emmo.hasProperty.min(0, XrayDiffractionData),
+        emmo.hasSpatialPart.min(0, Grain),
+    ]
+
+
+class NonMagneticMaterial(emmo.Material):
+    """A material which is non-magnetic."""
+
+    prefLabel = en("NonMagneticMaterial")
+    is_a = [
+        emmo.hasProperty.exactly(1, emmo.ChemicalComposition),
+        emmo.hasProperty.exactly(1, emmo.Density),
+        emmo.hasSpatialPart.min(0, GranularStructure),
+    ]
+
+
+class CrystallineMagneticMaterial(GranularStructure, MagneticMaterial):
+    """Magnetic material with crystalline structure."""
+
+    prefLabel = en("CrystallineMagneticMaterial")
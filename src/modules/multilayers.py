@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Magnetic multilayers and magnetotransport.
+
+Executed inside ``with onto:`` by `build_onto.py`, see `fragments.py`.
+"""
+
+
+# pylint: disable=undefined-variable,invalid-name
+
+
+# Magnetic multilayers
+
+
+## Magnetotransport
+
+
+class Magnetoresistance(emmo.RatioQuantity):
+    """Change of the resistivity of a substance due to an applied
+    magnetic field.
+
+    Magnetoresistance can be defined as MR = [ϱ(B)-ϱ(0)]/ϱ(0).
+    """
+
+    prefLabel = en("Magnetoresistance")
+    altLabel = pl("MR")
+    wikidataReference = pl("https://www.wikidata.org/wiki/Q58347")
+    wikipediaReference = pl("https://en.wikipedia.org/wiki/Magnetoresistance")
+    IECEntry = pl(
+        "https://www.electropedia.org/iev/iev.nsf/display?openform&ievref=121-12-83"
+    )
+    is_a = [
+        emmo.hasMeasurementUnit.some(emmo.DimensionlessUnit),
+    ]
+
+
+class SpacerLayer(emmo.Material):
+    """Nonmagnetic thin film materials."""
+
+    prefLabel = en("SpacerLayer")
+    is_a = [
+        Not(MagneticMaterial),
+        emmo.hasProperty.exactly(1, emmo.ChemicalComposition),
+        emmo.hasProperty.some(emmo.Thickness),
+    ]
+
+
+class StackingSequence(emmo.NominalProperty):
+    """Sequence of layers in a multilayer stack."""
+
+    prefLabel = en("StackingSequence")
+    is_a = [emmo.hasStringValue.some(emmo.String)]
+
+
+class MultilayerMagnet(emmo.SpatialTiling, Magnet):
+    """Piece of matter made of stacked layers of one or more magnetic
+    materials."""
+
+    prefLabel = en("MultilayerMagnet")
+    is_a = [
+        emmo.hasSpatialTile.some(ThinFilmMagnet),
+        emmo.hasSpatialTile.min(0, SpacerLayer),
+        emmo.hasProperty.exactly(1, SampleGeometry),
+        emmo.hasProperty.exactly(1, StackingSequence),
+        emmo.hasProperty.min(0, Magnetoresistance),
+    ]
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run the build, reason, check and docs steps as a DAG.
+
+Unlike `pixi run all`, which cleans and then runs all steps one after the
+other, this runner
+
+  - skips a stage if its inputs, its command and the stages it depends on
+    are unchanged since its last successful run and its outputs are still
+    the files it (or a later stage) wrote,
+  - runs independent stages (check and docs) at the same time,
+  - reports the critical path, i.e. the chain of stages that determined
+    the total time.
+
+The commands are taken from the tasks in `pixi.toml`.  The fingerprints of
+the last successful runs are stored in `.cache/pipeline.json`.
+
+    python src/pipeline.py              # run what is out of date
+    python src/pipeline.py --dry-run    # only show what would run
+    python src/pipeline.py --force      # run everything
+"""
+import argparse
+import collections
+import concurrent.futures
+import glob
+import hashlib
+import json
+import os
+import subprocess  # nosec
+import sys
+import time
+import tomllib
+
+from emmo_cache import DEFAULT_CACHE_DIR, file_digest
+
+rootdir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+Stage = collections.namedtuple("Stage", "name depends inputs outputs")
+
+SNAPSHOT = "magnetic-materials.sqlite3"
+TTL = "magnetic-materials.ttl"
+# Indexes written next to the turtle file by the build and reason steps
+INDEXES = (
+    "magnetic-materials.units.json",
+    "magnetic-materials.closure.npz",
+    "magnetic-materials.restrictions.json",
+    "magnetic-materials.dimensions.npz",
+)
+
+# Stages in topological order.  Inputs are glob patterns relative to the
+# repository root, outputs are file names.  Files written by an earlier
+# stage are not listed as inputs, the dependency covers them.
+STAGES = (
+    Stage(
+        "build",
+        (),
+        ("src/*.py", "src/modules/*.py", "magnetic-materials.iris.json"),
+        (SNAPSHOT, TTL, *INDEXES, "magnetic-materials.manifest.json"),
+    ),
+    Stage(
+        "reason",
+        ("build",),
+        ("src/*.py",),
+        (SNAPSHOT, TTL, *INDEXES, "magnetic-materials.manifest.json"),
+    ),
+    Stage("check", ("reason",), ("src/*.py",), ()),
+    Stage("lookup", ("reason",), ("src/*.py",), ("magnetic_materials.py",)),
+    Stage(
+        "docs",
+        ("reason",),
+        (
+            "doc/*.py",
+            "doc/*.md",
+            "doc/*.yaml",
+            "doc/*.css",
+            "doc/pandoc-template.html",
+        ),
+        ("doc/magnetic-materials.html",),
+    ),
+)
+
+STATE = os.path.join(DEFAULT_CACHE_DIR, "pipeline.json")
+
+
+def get_commands(pixi_toml=os.path.join(rootdir, "pixi.toml")):
+    """Returns a dict mapping task names in `pixi_toml` to
+    ``(command, cwd)`` tuples."""
+    with open(pixi_toml, "rb") as handle:
+        tasks = tomllib.load(handle)["tasks"]
+    commands = {}
+    for name, task in tasks.items():
+        if isinstance(task, str):
+            task = {"cmd": task}
+        if "cmd" in task:
+            commands[name] = (task["cmd"], os.path.join(rootdir, task.get("cwd", "")))
+    return commands
+
+
+class Fingerprints:
+    """Digests of files, recomputed only when their size or modification
+    time changes.
+
+    Parameters
+    ----------
+    cache : dict
+        Maps file names to ``[size, mtime_ns, digest]`` lists.  Updated in
+        place.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __call__(self, filename):
+        """Returns the sha256 of `filename` relative to the repository
+        root, or None if it does not exist."""
+        path = os.path.join(rootdir, filename)
+        if not os.path.exists(path):
+            self.cache.pop(filename, None)
+            return None
+        stat = os.stat(path)
+        entry = self.cache.get(filename)
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+        digest = file_digest(path)
+        self.cache[filename] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+
+class Pipeline:
+    """Runs `stages` with the `commands` from `pixi.toml`.
+
+    Parameters
+    ----------
+    stages : sequence of Stage
+        Stages in topological order.
+    commands : dict
+        Maps stage names to ``(command, cwd)`` tuples.
+    statefile : str
+        File with the fingerprints of the last successful runs.
+    """
+
+    def __init__(self, stages=STAGES, commands=None, statefile=STATE):
+        self.stages = {stage.name: stage for stage in stages}
+        self.commands = get_commands() if commands is None else commands
+        self.statefile = statefile
+        self.state = {"seq": 0, "stages": {}, "files": {}}
+        if os.path.exists(statefile):
+            with open(statefile, "rt", encoding="utf8") as handle:
+                self.state = json.load(handle)
+        self.fingerprint = Fingerprints(self.state["files"])
+        self.keys = {}
+
+    def save(self):
+        """Writes the state file."""
+        os.makedirs(os.path.dirname(self.statefile), exist_ok=True)
+        tmpfile = f"{self.statefile}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump(self.state, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        os.replace(tmpfile, self.statefile)
+
+    def key(self, name):
+        """Returns the key of stage `name`, a digest of its command, its
+        inputs and the keys of the stages it depends on."""
+        stage = self.stages[name]
+        sha = hashlib.sha256("\n".join(self.commands[name]).encode())
+        files = sorted(
+            {
+                os.path.relpath(path, rootdir)
+                for pattern in stage.inputs
+                for path in glob.glob(os.path.join(rootdir, pattern))
+            }
+            - set(stage.outputs)
+        )
+        for filename in files:
+            sha.update(f"\n{filename} {self.fingerprint(filename)}".encode())
+        for dep in stage.depends:
+            sha.update(f"\n{dep} {self.keys.get(dep)}".encode())
+        return sha.hexdigest()
+
+    def expected(self, filename):
+        """Returns the digest of output `filename` recorded by the stage
+        that wrote it last, or None."""
+        records = [
+            record
+            for record in self.state["stages"].values()
+            if filename in record["outputs"]
+        ]
+        if not records:
+            return None
+        return max(records, key=lambda record: record["seq"])["outputs"][filename]
+
+    def reason(self, name, rerun):
+        """Returns why stage `name` must run, or None if it is up to date.
+
+        `rerun` is the set of stages that run in this invocation."""
+        self.keys[name] = key = self.key(name)
+        record = self.state["stages"].get(name)
+        if record is None:
+            return "never run"
+        if record["key"] != key:
+            return "inputs changed"
+        for dep in self.stages[name].depends:
+            if dep in rerun:
+                return f"{dep} runs"
+        for filename in self.stages[name].outputs:
+            digest = self.fingerprint(filename)
+            if digest is None:
+                return f"{filename} is missing"
+            if digest != self.expected(filename):
+                return f"{filename} was modified"
+        return None
+
+    def run_stage(self, name):
+        """Runs the command of stage `name` and returns a
+        ``(name, returncode, output, seconds)`` tuple."""
+        cmd, cwd = self.commands[name]
+        start = time.perf_counter()
+        proc = subprocess.run(  # nosec
+            cmd,
+            shell=True,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            check=False,
+        )
+        return name, proc.returncode, proc.stdout, time.perf_counter() - start
+
+    def record(self, name, seconds):
+        """Records a successful run of stage `name`."""
+        self.state["seq"] += 1
+        self.keys[name] = self.key(name)  # inputs may be updated by the stage
+        self.state["stages"][name] = {
+            "key": self.keys[name],
+            "seq": self.state["seq"],
+            "seconds": seconds,
+            "outputs": {
+                filename: self.fingerprint(filename)
+                for filename in self.stages[name].outputs
+            },
+        }
+        self.save()
+
+    def run(self, jobs=None, force=False, dry_run=False):
+        """Runs all stages that are out of date, independent stages in
+        parallel.
+
+        Returns a ``(ok, durations)`` tuple, where `durations` maps the
+        names of the stages that were run to their wall time."""
+        done, rerun, durations = set(), set(), {}
+        failed = False
+        pending = list(self.stages)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+            running = {}
+            while pending or running:
+                ready = [
+                    name
+                    for name in pending
+                    if not failed
+                    and all(dep in done for dep in self.stages[name].depends)
+                ]
+                for name in ready:
+                    pending.remove(name)
+                    why = "forced" if force else self.reason(name, rerun)
+                    if why is None:
+                        print(f"[{name}] up to date")
+                        done.add(name)
+                    elif dry_run:
+                        print(f"[{name}] would run ({why})")
+                        rerun.add(name)
+                        done.add(name)
+                    else:
+                        print(f"[{name}] running ({why})")
+                        rerun.add(name)
+                        running[pool.submit(self.run_stage, name)] = name
+                if ready and not running:
+                    continue  # stages were skipped, schedule their dependants
+                if not running:
+                    break
+                finished, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    name, returncode, output, seconds = future.result()
+                    del running[future]
+                    durations[name] = seconds
+                    if returncode:
+                        print(f"[{name}] failed ({returncode}) after {seconds:.1f} s")
+                        sys.stdout.write(output)
+                        failed = True
+                    else:
+                        print(f"[{name}] done in {seconds:.1f} s")
+                        self.record(name, seconds)
+                        done.add(name)
+        return not failed and not pending, durations
+
+    def critical_path(self, durations):
+        """Returns a ``(path, seconds)`` tuple with the chain of stages
+        with the largest sum of `durations`."""
+        finish, previous = {}, {}
+        for name, stage in self.stages.items():
+            before = max(stage.depends, key=lambda dep: finish[dep], default=None)
+            finish[name] = durations.get(name, 0.0) + (
+                finish[before] if before else 0.0
+            )
+            previous[name] = before
+        name = max(finish, key=finish.get)
+        seconds = finish[name]
+        path = []
+        while name:
+            path.insert(0, name)
+            name = previous[name]
+        return path, seconds
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="Maximum number of stages run at the same time. Default: all",
+    )
+    parser.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Run all stages, even if they are up to date.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        "-n",
+        action="store_true",
+        help="Only show which stages would run.",
+    )
+    parser.add_argument(
+        "--state",
+        metavar="FILE",
+        default=STATE,
+        help="File with the fingerprints of the last runs. Default: %(default)s",
+    )
+    args = parser.parse_args(args=argv)
+
+    pipeline = Pipeline(statefile=args.state)
+    start = time.perf_counter()
+    ok, durations = pipeline.run(
+        jobs=args.jobs, force=args.force, dry_run=args.dry_run
+    )
+    wall = time.perf_counter() - start
+    if durations:
+        path, seconds = pipeline.critical_path(durations)
+        print(
+            f"Critical path: {' -> '.join(path)} ({seconds:.1f} s); "
+            f"total {wall:.1f} s, sum of stages {sum(durations.values()):.1f} s"
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
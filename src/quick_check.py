@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fast in-process check of the EMMO conventions for MagMO entities.
+
+`emmocheck` loads the ontology with all its imports and runs every test on
+all of EMMO.  This module evaluates the emmocheck rules that concern the
+entities we add, for the entities in the MagMO namespace only:
+
+  - test_number_of_labels: classes have exactly one skos:prefLabel
+  - test_duplicate_labels: no prefLabel is used by another entity, in MagMO
+    or EMMO
+  - test_class_label: class labels are CamelCase identifiers
+  - test_object_property_label: object property labels are lowerCamelCase
+  - test_description: classes have one English elucidation, definition or
+    conceptualisation
+  - test_dimensional_unit: dimensional units have one valid dimension
+    string
+
+The rules are evaluated on label, annotation and hierarchy indexes that are
+built with a few queries on the quadstore, so the check takes a fraction of
+a second.  It runs on the world of the build (`build_onto.py --check`) or
+on the snapshot:
+
+    python src/quick_check.py --database magnetic-materials.sqlite3
+"""
+import argparse
+import collections
+import re
+import sys
+
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+from store_index import OWL, RDF_TYPE, RDFS, SKOS, Index
+
+Problem = collections.namedtuple("Problem", "test iri label message")
+
+# Same as in emmocheck
+DIMENSION_STRING = re.compile(
+    "^T([+-][1-9][0-9]*|0) L([+-][1-9]|0) M([+-][1-9]|0) "
+    "I([+-][1-9]|0) (H|Θ)([+-][1-9]|0) N([+-][1-9]|0) "
+    "J([+-][1-9]|0)$"
+)
+
+
+def check(onto, namespace=None):
+    """Checks the entities of `onto` in `namespace` and returns a list of
+    problems.
+
+    `namespace` defaults to the base IRI of `onto`."""
+    # pylint: disable=too-many-locals,too-many-branches
+    index = Index(onto.world, namespace or onto.base_iri)
+    problems = []
+
+    def report(test, s, message):
+        problems.append(Problem(test, index.iri(s), index.label(s), message))
+
+    classes = sorted(index.types["Class"])
+    for s in classes:
+        labels = index.preflabels.get(s, [])
+        if len(labels) != 1:
+            report(
+                "test_number_of_labels",
+                s,
+                f"{len(labels)} prefLabels" if labels else "missing prefLabel",
+            )
+
+    for s in sorted(set().union(*index.types.values())):
+        for label, _ in index.preflabels.get(s, []):
+            others = sorted(index.labelled[label] - {s})
+            if others:
+                where = ", ".join(index.iri(other) for other in others)
+                report(
+                    "test_duplicate_labels",
+                    s,
+                    f"prefLabel {label!r} is also used by {where}",
+                )
+
+    rdfs_label = index.storid(RDFS + "label")
+    for s in classes:
+        labels = index.preflabels.get(s, []) + index.values(s, rdfs_label)
+        for label, _ in labels:
+            if not (label.isidentifier() and label[0].isupper()):
+                report("test_class_label", s, f"label {label!r} is not CamelCase")
+
+    for s in sorted(index.types["ObjectProperty"]):
+        for label, _ in index.values(s, rdfs_label):
+            if not label[0].islower():
+                message = "does not start with lowercase"
+            elif label.startswith("has") and not label[3:4].isupper():
+                message = 'what follows "has" must be uppercase'
+            elif label.startswith("is") and not (
+                label[2:3].isupper() and label.endswith(("Of", "With"))
+            ):
+                message = 'must be "is<Uppercase>...Of" or "...With"'
+            else:
+                continue
+            report("test_object_property_label", s, f"label {label!r} {message}")
+
+    descriptions = {
+        name: index.lookup(name)
+        for name in ("elucidation", "definition", "conceptualisation")
+    }
+    dimension_string = index.lookup("hasDimensionString")
+    unit = index.lookup("MeasurementUnit")
+    for s in classes:
+        ancestors = index.ancestors(s)
+        if unit in ancestors and any(
+            index.restriction_values(cls, dimension_string) for cls in ancestors
+        ):
+            continue  # units with a physical dimension
+        values = {name: index.values(s, prop) for name, prop in descriptions.items()}
+        if not any(values.values()):
+            report(
+                "test_description",
+                s,
+                "missing description (elucidation, definition or "
+                "conceptualisation)",
+            )
+        for name, pairs in values.items():
+            if sum(1 for _, lang in pairs if lang in ("", "@en")) > 1:
+                report("test_description", s, f"more than one {name}")
+
+    dimensional_unit = index.lookup("SIDimensionalUnit")
+    for s in classes:
+        if dimensional_unit not in index.parents.get(s, ()):
+            continue
+        strings = index.restriction_values(s, dimension_string)
+        if len(strings) != 1:
+            report(
+                "test_dimensional_unit",
+                s,
+                f"expected one hasDimensionString value restriction, "
+                f"got {len(strings)}",
+            )
+        elif not DIMENSION_STRING.match(strings[0]):
+            report(
+                "test_dimensional_unit",
+                s,
+                f"invalid dimension string: {strings[0]!r}",
+            )
+
+    return problems
+
+
+def format_problems(problems):
+    """Returns a report of `problems`, one per line."""
+    return "\n".join(
+        f"{problem.test}: {problem.iri} ({problem.label}): {problem.message}"
+        for problem in problems
+    )
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology to check. Default: %(default)s",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        onto = get_snapshot_ontology(args.database, args.iri)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+    problems = check(onto)
+    if problems:
+        print(format_problems(problems))
+        print(f"{len(problems)} problems", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
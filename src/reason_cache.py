@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of reasoning results.
+
+Running HermiT on MagMO together with EMMO takes much longer than any
+other step, although the inferences only change when the logical axioms
+change.  This module records the triples added to (and removed from) the
+quadstore by the reasoner and stores them keyed by
+
+  - a canonical digest of the logical triples of the world, i.e. all
+    triples except annotations (labels, elucidations, references, ...)
+    and the ontology metadata, independent of triple order and blank node
+    identity,
+  - the name and version of the reasoner.
+
+On a cache hit the recorded inferences are replayed into the quadstore
+instead of running the reasoner, such that changes to the documentation or
+the metadata never trigger a new classification.  Inferences involving
+blank nodes cannot be replayed; for them only a marker is stored, such that
+later runs go straight to the reasoner without recording the changes.
+
+Cache layout (below `cachedir`):
+
+    reasoning/<key>.json     recorded inferences
+"""
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import time
+
+import ontopy
+import owlready2
+import owlready2.reasoning
+
+from emmo_cache import DEFAULT_CACHE_DIR, file_digest
+
+# Bump if the digest or the entry format changes
+CACHE_VERSION = 1
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+OWL = "http://www.w3.org/2002/07/owl#"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+
+# Predicates that are not part of the logical axioms, in addition to the
+# declared annotation properties
+NON_LOGICAL = (
+    RDFS + "label",
+    RDFS + "comment",
+    RDFS + "seeAlso",
+    RDFS + "isDefinedBy",
+    OWL + "versionInfo",
+    OWL + "versionIRI",
+    OWL + "priorVersion",
+    OWL + "backwardCompatibleWith",
+    OWL + "incompatibleWith",
+    OWL + "deprecated",
+)
+
+# Types of the subjects of non-logical triples
+_SKIP_TYPES = ("AnnotationProperty", "Ontology", "Axiom")
+
+# Classpath of the reasoners shipped with Owlready2
+_CLASSPATHS = {
+    "HermiT": "_HERMIT_CLASSPATH",
+    "Pellet": "_PELLET_CLASSPATH",
+}
+
+
+def reasoner_version(reasoner):
+    """Returns a string identifying `reasoner` and its version.
+
+    The version is given by the Owlready2 and EMMOntoPy versions and by the
+    digests of the jar files of the reasoner."""
+    sha = hashlib.sha256()
+    classpath = getattr(owlready2.reasoning, _CLASSPATHS.get(reasoner, ""), "")
+    for path in sorted(classpath.split(os.pathsep)):
+        jars = [path] if path.endswith(".jar") else glob.glob(f"{path}/*.jar")
+        for jar in sorted(jars):
+            if os.path.exists(jar):
+                sha.update(f"{os.path.basename(jar)} {file_digest(jar)}\n".encode())
+    return (
+        f"{reasoner} owlready2-{owlready2.VERSION} "
+        f"ontopy-{ontopy.__version__} {sha.hexdigest()[:16]}"
+    )
+
+
+def non_logical(world):
+    """Returns a ``(predicates, subjects)`` tuple with the storids of the
+    predicates and subjects of the triples in `world` that are not part of
+    the logical axioms, i.e. annotations, annotation axioms and ontology
+    metadata."""
+    graph = world.graph
+    storids = {
+        iri: storid
+        for iri in (RDF_TYPE, *NON_LOGICAL, *(OWL + name for name in _SKIP_TYPES))
+        if (storid := graph._abbreviate(iri, False))  # pylint: disable=W0212
+    }
+
+    def typed(name):
+        if OWL + name not in storids or RDF_TYPE not in storids:
+            return set()
+        return {
+            s
+            for (s,) in graph.execute(
+                "SELECT s FROM objs WHERE p=? AND o=?",
+                (storids[RDF_TYPE], storids[OWL + name]),
+            )
+        }
+
+    predicates = typed("AnnotationProperty")
+    predicates.update(storids[iri] for iri in NON_LOGICAL if iri in storids)
+    return predicates, typed("Ontology") | typed("Axiom")
+
+
+def logical_digest(world):
+    """Returns a digest of the logical triples of all ontologies in
+    `world`.
+
+    Annotations, annotation axioms and the ontology metadata are left out.
+    The digest does not depend on the order of the triples, the context
+    they are stored in or the identity of blank nodes."""
+    graph = world.graph
+    iris = dict(graph.execute("SELECT storid, iri FROM resources"))
+    skip_predicates, skip_subjects = non_logical(world)
+
+    triples = {}
+    objects = set()
+    for s, p, o in graph.execute("SELECT s, p, o FROM objs"):
+        if p not in skip_predicates and s not in skip_subjects:
+            triples.setdefault(s, set()).add((p, o))
+            if o < 0:
+                objects.add(o)
+    for s, p, o, d in graph.execute("SELECT s, p, o, d FROM datas"):
+        if p not in skip_predicates and s not in skip_subjects:
+            if isinstance(d, int):
+                d = f"^^<{iris[d]}>" if d else ""
+            triples.setdefault(s, set()).add((p, f"{o!r}{d}"))
+
+    bnodes = {}
+
+    def term(storid):
+        if isinstance(storid, str):
+            return storid
+        if storid > 0:
+            return f"<{iris[storid]}>"
+        if storid not in bnodes:
+            bnodes[storid] = None  # guard against cycles
+            lines = sorted(f"{term(p)} {term(o)}" for p, o in triples.get(storid, ()))
+            bnodes[storid] = "_:" + hashlib.sha256(
+                "\n".join(lines).encode()
+            ).hexdigest()
+        return bnodes[storid] or "_:cycle"
+
+    # Named subjects and blank nodes that are not referred to, like
+    # owl:AllDisjointClasses axioms
+    lines = sorted(
+        {
+            f"{term(s)} {term(p)} {term(o)}"
+            for s, pos in triples.items()
+            if s > 0 or s not in objects
+            for p, o in pos
+        }
+    )
+    sha = hashlib.sha256()
+    for line in lines:
+        sha.update(line.encode())
+        sha.update(b"\n")
+    return sha.hexdigest()
+
+
+def cache_key(world, reasoner, mode="world"):
+    """Returns the cache key for reasoning on `world` with `reasoner`.
+
+    `mode` distinguishes ways of running the reasoner that may give
+    different inferences for the same triples."""
+    text = "\n".join(
+        [
+            str(CACHE_VERSION),
+            reasoner_version(reasoner),
+            mode,
+            logical_digest(world),
+        ]
+    )
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+
+@contextlib.contextmanager
+def record(world, blank_nodes=False):
+    """Context manager recording the changes made to the triples of
+    `world` in the enclosed block.
+
+    Yields a dict, which on exit is filled with the ``"added"`` and
+    ``"removed"`` triples.  Blank nodes are written as ``_:<n>``.  Unless
+    `blank_nodes` is true, the dict only contains ``"blank_nodes": True``
+    if the changes involve blank nodes, since `replay()` cannot apply
+    them."""
+    graph = world.graph
+    graph.execute("CREATE TEMP TABLE before_objs AS SELECT c, s, p, o FROM objs")
+    graph.execute(
+        "CREATE TEMP TABLE before_datas AS SELECT c, s, p, o, d FROM datas"
+    )
+    changes = {}
+    try:
+        yield changes
+        changes.update(
+            added=_difference(graph, "main.{}", "temp.before_{}"),
+            removed=_difference(graph, "temp.before_{}", "main.{}"),
+        )
+        if not blank_nodes and any(
+            triple[1].startswith("_:")
+            or (table == "objs" and triple[3].startswith("_:"))
+            for triples in changes.values()
+            for table, rows in triples.items()
+            for triple in rows
+        ):
+            changes.clear()
+            changes["blank_nodes"] = True
+    finally:
+        graph.execute("DROP TABLE temp.before_objs")
+        graph.execute("DROP TABLE temp.before_datas")
+
+
+def _difference(graph, first, second):
+    """Returns the triples in tables `first` but not in `second`, with
+    IRIs instead of storids.
+
+    `first` and `second` are format strings for the table names, which are
+    called with "objs" and "datas"."""
+    contexts = dict(graph.execute("SELECT c, iri FROM ontologies"))
+    unabbreviate = graph._unabbreviate  # pylint: disable=protected-access
+
+    def iri(storid):
+        return f"_:{-storid}" if storid < 0 else unabbreviate(storid)
+
+    def datatype(d):
+        if isinstance(d, str):
+            return d  # language tag
+        return unabbreviate(d) if d else ""
+
+    query = "SELECT {0} FROM {1} EXCEPT SELECT {0} FROM {2}"
+    objs = [
+        [contexts[c], iri(s), iri(p), iri(o)]
+        for c, s, p, o in graph.execute(
+            query.format("c, s, p, o", first.format("objs"), second.format("objs"))
+        )
+    ]
+    datas = [
+        [contexts[c], iri(s), iri(p), o, datatype(d)]
+        for c, s, p, o, d in graph.execute(
+            query.format(
+                "c, s, p, o, d", first.format("datas"), second.format("datas")
+            )
+        )
+    ]
+    return {"objs": sorted(objs), "datas": sorted(datas, key=repr)}
+
+
+def replay(world, changes):
+    """Applies the recorded `changes` to the triples of `world`.
+
+    Raises ValueError if `changes` only records that the changes involved
+    blank nodes."""
+    if changes.get("blank_nodes"):
+        raise ValueError("cannot replay changes involving blank nodes")
+    abbreviate = world._abbreviate  # pylint: disable=protected-access
+    ontologies = {}
+
+    def context(iri):
+        if iri not in ontologies:
+            ontologies[iri] = world.get_ontology(iri)
+        return ontologies[iri]
+
+    def datatype(d):
+        if d.startswith("@"):
+            return d
+        return abbreviate(d) if d else 0
+
+    for c, s, p, o in changes["removed"]["objs"]:
+        context(c)._del_obj_triple_spo(abbreviate(s), abbreviate(p), abbreviate(o))
+    for c, s, p, o, d in changes["removed"]["datas"]:
+        context(c)._del_data_triple_spod(
+            abbreviate(s), abbreviate(p), o, datatype(d)
+        )
+    for c, s, p, o in changes["added"]["objs"]:
+        context(c)._add_obj_triple_spo(abbreviate(s), abbreviate(p), abbreviate(o))
+    for c, s, p, o, d in changes["added"]["datas"]:
+        context(c)._add_data_triple_spod(
+            abbreviate(s), abbreviate(p), o, datatype(d)
+        )
+
+
+class ReasoningCache:
+    """A persistent cache of reasoning results.
+
+    Parameters
+    ----------
+    cachedir : str
+        Cache directory.  Created if it does not exist.
+    """
+
+    def __init__(self, cachedir=DEFAULT_CACHE_DIR):
+        self.cachedir = os.path.abspath(cachedir)
+        self.entrydir = os.path.join(self.cachedir, "reasoning")
+
+    def _path(self, key):
+        return os.path.join(self.entrydir, f"{key}.json")
+
+    def lookup(self, key):
+        """Returns the cache entry for `key`, or None."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rt", encoding="utf8") as handle:
+            entry = json.load(handle)
+        if entry.get("version") != CACHE_VERSION or entry.get("key") != key:
+            return None
+        return entry
+
+    def store(self, key, reasoner, changes):
+        """Stores the recorded `changes` of `reasoner` under `key` and
+        returns the new cache entry.
+
+        Empty changes are stored as well, such that a reasoner that infers
+        nothing is not run again.  So are changes that only record that
+        they involved blank nodes, such that later runs know that there is
+        nothing to replay."""
+        entry = {
+            "version": CACHE_VERSION,
+            "key": key,
+            "reasoner": reasoner_version(reasoner),
+            "created": time.time(),
+            **changes,
+        }
+        os.makedirs(self.entrydir, exist_ok=True)
+        path = self._path(key)
+        tmpfile = f"{path}.{os.getpid()}.tmp"
+        with open(tmpfile, "wt", encoding="utf8") as handle:
+            json.dump(entry, handle, indent=1)
+            handle.write("\n")
+        os.replace(tmpfile, path)
+        return entry
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run the reasoner on the quadstore snapshot written by `build_onto.py`.
+
+This replaces
+
+    ontoconvert magnetic-materials.ttl magnetic-materials.ttl \\
+        --reasoner --infer --namespace emmo:https://w3id.org/emmo#
+
+but works on the snapshot instead of parsing `magnetic-materials.ttl` and
+EMMO again.  The inferred ontology is written to the output file and the
+inferences are stored back into the snapshot for the check and docs steps.
+
+The inferences are cached (see `reason_cache.py`).  If the logical axioms
+and the reasoner are the same as in an earlier run, the cached inferences
+are replayed instead of running the reasoner.
+
+With `--module`, only the MagMO axioms are classified against the fixed,
+pre-classified EMMO hierarchy (see `module_reason.py`).  If the inferences
+of the module involve blank nodes, it falls back to reasoning on the whole
+world.
+"""
+import argparse
+import sys
+
+from ontopy.utils import remove_owlready2_properties
+
+from emmo_cache import DEFAULT_CACHE_DIR
+from incremental import add_changes
+from indexes import write_indexes
+from module_reason import BlankNodeError, classify
+from reason_cache import ReasoningCache, cache_key, record, replay
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+from export import export
+
+
+def sync_reasoner(onto, args):
+    """Runs the reasoner selected by `args` on the whole world of `onto`."""
+    onto.sync_reasoner(
+        reasoner=args.reasoner,
+        include_imported=True,
+        debug=not args.quiet,
+    )
+
+
+def reason(onto, args, cache, module=False):
+    """Adds the inferences of the reasoner selected by `args` to the world
+    of `onto`, replaying them from `cache` if possible.
+
+    With `module`, only the module of `onto` is classified.  If its
+    inferences involve blank nodes, the whole world is reasoned on
+    instead.
+
+    Returns the added inferences in the format of `reason_cache.record()`,
+    or None if they involve blank nodes."""
+    mode = "module" if module else "world"
+    key = None if args.no_cache else cache_key(onto.world, args.reasoner, mode)
+    entry = cache.lookup(key) if key else None
+    if entry and not entry.get("blank_nodes"):
+        print(f"Replaying cached inferences {key}")
+        replay(onto.world, entry)
+        return entry
+    if module and entry:
+        print(
+            "Warning: the module inferences involve blank nodes, "
+            "reasoning on the whole world",
+            file=sys.stderr,
+        )
+        return reason(onto, args, cache)
+    if module:
+        try:
+            changes = classify(onto, reasoner=args.reasoner, debug=not args.quiet)
+        except BlankNodeError as exc:
+            print(
+                f"Warning: {exc}, reasoning on the whole world", file=sys.stderr
+            )
+            if key:
+                cache.store(key, args.reasoner, {"blank_nodes": True})
+            return reason(onto, args, cache)
+        replay(onto.world, changes)
+        if key:
+            cache.store(key, args.reasoner, changes)
+        return changes
+    if entry:
+        print(f"Cached inferences {key} involve blank nodes, running the reasoner")
+        sync_reasoner(onto, args)
+        return None
+    with record(onto.world) as changes:
+        sync_reasoner(onto, args)
+    if key:
+        cache.store(key, args.reasoner, changes)
+    return None if changes.get("blank_nodes") else changes
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "output",
+        nargs="?",
+        default="magnetic-materials.ttl",
+        help="Output file. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology to reason on. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--reasoner",
+        default="HermiT",
+        choices=["HermiT", "Pellet", "FaCT++"],
+        help="Reasoner to use. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--namespace",
+        "-n",
+        action="append",
+        default=["emmo:https://w3id.org/emmo#"],
+        metavar="PREFIX:NAMESPACE",
+        help="Additional prefix:namespace pair for the turtle output.",
+    )
+    parser.add_argument(
+        "--export",
+        "-e",
+        metavar="FILE",
+        action="append",
+        default=[],
+        help=(
+            "Additional output file, written in the same pass as the "
+            "output.  The format is given by the extension (ttl, nt, rdf "
+            "or jsonld).  Files ending with .gz are compressed."
+        ),
+    )
+    parser.add_argument(
+        "--module",
+        "-m",
+        action="store_true",
+        help=(
+            "Only classify the entities of the ontology against the fixed "
+            "hierarchy of the imported (inferred) EMMO."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        default=DEFAULT_CACHE_DIR,
+        help="Directory with cached reasoning results. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run the reasoner and don't store the results.",
+    )
+    parser.add_argument(
+        "--quiet",
+        "-q",
+        action="store_true",
+        help="Don't print a lot of stuff to stdout during reasoning.",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        onto = get_snapshot_ontology(args.database, args.iri)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+
+    changes = reason(onto, args, ReasoningCache(args.cache_dir), args.module)
+    with record(onto.world) as removed:
+        remove_owlready2_properties(onto)
+    export(
+        onto,
+        [args.output, *args.export],
+        namespaces=dict(arg.split(":", 1) for arg in args.namespace),
+    )
+    write_indexes(onto, args.output)
+    onto.world.save()
+    # Allow the next incremental build to revert the changes
+    add_changes(args.database, changes, removed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index of the effective restrictions of each class.
+
+A record of `CrystallineMagneticMaterial` must satisfy the restrictions of
+the class itself and those it inherits from `GranularStructure`,
+`MagneticMaterial` and their EMMO ancestors.  The build resolves them once
+and writes, next to the turtle file, `magnetic-materials.restrictions.json`
+with the flattened set of restrictions of every class in the closure of the
+class hierarchy (see `closure.py`):
+
+    {"version": 2,
+     "classes": [IRI, ...],            class IDs as in the closure file
+     "labels": [prefLabel, ...],
+     "properties": [IRI, ...],         property IDs
+     "property_labels": [prefLabel, ...],
+     "fillers": [filler, ...],         filler IDs
+     "columns": ["property", "type", "filler", "n", "source"],
+     "restrictions": [[row, ...], ...] rows of each class, by class ID}
+
+`type` is ``some``, ``only``, ``value``, ``exactly``, ``min`` or ``max`` and
+`n` the cardinality (null for the first three).  A filler is an IRI, a
+literal ``{"value": ..., "datatype": ...}`` or a class expression like
+``{"or": [filler, ...]}``, ``{"and": [...]}``, ``{"not": filler}`` or a
+nested restriction.  Unqualified cardinalities have filler ``owl:Thing``.
+`source` is the ID of the class that declares the restriction.
+Restrictions in intersections a class is a subclass of or equivalent to
+are flattened, other class expressions are not.
+
+`RestrictionIndex` loads the file:
+
+    >>> index = RestrictionIndex.load("magnetic-materials.restrictions.json")
+    >>> for row in index.restrictions("CrystallineMagneticMaterial"):
+    ...     print(row.property, row.type, row.n, row.filler, row.source)
+
+The file is written by the build and the reason step; to write it for a
+snapshot run
+
+    python src/restrictions.py --database magnetic-materials.sqlite3
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+
+from closure import hierarchy
+from store_index import OWL, RDF_TYPE, RDFS, SKOS
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+
+# Bump if the index format changes
+RESTRICTIONS_VERSION = 2
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+
+COLUMNS = ("property", "type", "filler", "n", "source")
+
+# Restriction types and the predicates of their filler
+VALUES = {
+    "some": OWL + "someValuesFrom",
+    "only": OWL + "allValuesFrom",
+    "value": OWL + "hasValue",
+}
+
+# Cardinality types and the predicates of qualified and unqualified
+# restrictions, as in `class_table.CARDINALITIES`
+CARDINALITIES = {
+    "exactly": (OWL + "qualifiedCardinality", OWL + "cardinality"),
+    "min": (OWL + "minQualifiedCardinality", OWL + "minCardinality"),
+    "max": (OWL + "maxQualifiedCardinality", OWL + "maxCardinality"),
+}
+
+OPERATORS = {
+    "or": OWL + "unionOf",
+    "and": OWL + "intersectionOf",
+}
+
+Restriction = collections.namedtuple("Restriction", COLUMNS)
+
+
+def restrictions_path(ttlfile):
+    """Returns the restriction index belonging to turtle file `ttlfile`."""
+    return f"{os.path.splitext(ttlfile)[0]}.restrictions.json"
+
+
+class _BlankNodes:
+    """The triples of the blank nodes in `world`, with IRIs instead of
+    storids for named resources."""
+
+    def __init__(self, world):
+        graph = world.graph
+        unabbreviate = graph._unabbreviate  # pylint: disable=protected-access
+
+        def term(storid):
+            return storid if storid < 0 else unabbreviate(storid)
+
+        self.objs = collections.defaultdict(dict)
+        for s, p, o in graph.execute("SELECT s, p, o FROM objs WHERE s<0"):
+            self.objs[s][unabbreviate(p)] = term(o)
+        self.datas = collections.defaultdict(dict)
+        for s, p, o, d in graph.execute("SELECT s, p, o, d FROM datas WHERE s<0"):
+            if isinstance(d, int):
+                d = unabbreviate(d) if d else ""
+            self.datas[s][unabbreviate(p)] = (o, d)
+
+    def items(self, node):
+        """Returns the members of RDF list `node`."""
+        result = []
+        while node != RDF + "nil":
+            pos = self.objs[node]
+            result.append(pos[RDF + "first"])
+            node = pos[RDF + "rest"]
+        return result
+
+    def expression(self, node):
+        """Returns the filler `node` as written in the index."""
+        if isinstance(node, str):
+            return node
+        pos = self.objs.get(node, {})
+        if pos.get(RDF_TYPE) == OWL + "Restriction":
+            return dict(zip(COLUMNS, self.restriction(node)))
+        for key, predicate in {**OPERATORS, "one_of": OWL + "oneOf"}.items():
+            if predicate in pos:
+                return {key: [self.expression(m) for m in self.items(pos[predicate])]}
+        if OWL + "complementOf" in pos:
+            return {"not": self.expression(pos[OWL + "complementOf"])}
+        return {"unsupported": sorted(pos)}
+
+    def restriction(self, node):
+        """Returns restriction `node` as a ``(property, type, filler, n)``
+        tuple."""
+        pos, values = self.objs[node], self.datas.get(node, {})
+        prop = pos.get(OWL + "onProperty")
+        for kind, predicate in VALUES.items():
+            if predicate in pos:
+                return prop, kind, self.expression(pos[predicate]), None
+            if predicate in values:
+                value, datatype = values[predicate]
+                return prop, kind, {"value": value, "datatype": datatype}, None
+        for kind, predicates in CARDINALITIES.items():
+            for predicate in predicates:
+                if predicate in values:
+                    filler = pos.get(OWL + "onClass", pos.get(OWL + "onDataRange"))
+                    filler = OWL + "Thing" if filler is None else filler
+                    n = int(values[predicate][0])
+                    return prop, kind, self.expression(filler), n
+        return prop, "unsupported", sorted(pos), None
+
+    def flatten(self, node):
+        """Returns the restrictions implied by a class being a subclass of
+        `node`, flattening intersections."""
+        if isinstance(node, str):
+            return []
+        pos = self.objs.get(node, {})
+        if pos.get(RDF_TYPE) == OWL + "Restriction":
+            return [self.restriction(node)]
+        if OPERATORS["and"] in pos:
+            return [
+                restriction
+                for member in self.items(pos[OPERATORS["and"]])
+                for restriction in self.flatten(member)
+            ]
+        return []
+
+
+def restriction_index(onto):
+    """Returns the effective restriction index of the classes in the
+    closure of the class hierarchy of `onto`."""
+    # pylint: disable=too-many-locals
+    world = onto.world
+    graph = world.graph
+    abbreviate = graph._abbreviate  # pylint: disable=protected-access
+    iris, labels, parents = hierarchy(onto)
+    ids = {iri: i for i, iri in enumerate(iris)}
+    bnodes = _BlankNodes(world)
+
+    direct = [[] for _ in iris]
+    for o, iri in graph.execute(
+        "SELECT o, iri FROM objs JOIN resources ON s=storid "
+        "WHERE o<0 AND p IN (?, ?)",
+        (
+            abbreviate(RDFS + "subClassOf", False),
+            abbreviate(OWL + "equivalentClass", False),
+        ),
+    ):
+        if iri in ids:
+            direct[ids[iri]].extend(bnodes.flatten(o))
+
+    properties, fillers = {}, {}
+
+    def intern(table, value):
+        key = json.dumps(value, sort_keys=True)
+        return table.setdefault(key, (len(table), value))[0]
+
+    # Own restrictions come first.  The rows are propagated until their
+    # restrictions do not change any more: in topological order (see
+    # `hierarchy()`) the rows of the parents are complete when a class is
+    # reached, cycles (e.g. of equivalent classes) take more passes.
+    own = [
+        [
+            [intern(properties, prop), kind, intern(fillers, filler), n, i]
+            for prop, kind, filler, n in sorted(direct[i], key=json.dumps)
+        ]
+        for i in range(len(iris))
+    ]
+    rows = [list(row) for row in own]
+    keys = [{tuple(row[:4]) for row in result} for result in rows]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(iris)):
+            seen, result = set(), []
+            for row in own[i] + [row for parent in parents[i] for row in rows[parent]]:
+                key = tuple(row[:4])
+                if key not in seen:
+                    seen.add(key)
+                    result.append(row)
+            rows[i] = result
+            if seen != keys[i]:
+                keys[i] = seen
+                changed = True
+
+    property_iris = [value for _, value in properties.values()]
+    preflabel = abbreviate(SKOS + "prefLabel", False)
+    property_labels = []
+    for iri in property_iris:
+        row = graph.execute(
+            "SELECT o FROM datas WHERE s=? AND p=? ORDER BY o",
+            (abbreviate(iri, False), preflabel),
+        ).fetchone()
+        property_labels.append(str(row[0]) if row else iri)
+
+    return {
+        "version": RESTRICTIONS_VERSION,
+        "classes": iris,
+        "labels": labels,
+        "properties": property_iris,
+        "property_labels": property_labels,
+        "fillers": [value for _, value in fillers.values()],
+        "columns": list(COLUMNS),
+        "restrictions": rows,
+    }
+
+
+def write_restrictions(index, filename):
+    """Writes restriction `index` to `filename`."""
+    tmpfile = f"{filename}.{os.getpid()}.tmp"
+    with open(tmpfile, "wt", encoding="utf8") as handle:
+        json.dump(index, handle, ensure_ascii=False, separators=(",", ":"))
+        handle.write("\n")
+    os.replace(tmpfile, filename)
+
+
+class RestrictionIndex:
+    """The effective restrictions of classes, loaded from an index written
+    by `write_restrictions()`.
+
+    Parameters
+    ----------
+    index : dict
+        The index as returned by `restriction_index()`.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.classes = index["classes"]
+        self.labels = index["labels"]
+        self.ids = {}
+        for i, label in enumerate(self.labels):
+            self.ids.setdefault(label, i)
+        self.ids.update((iri, i) for i, iri in enumerate(self.classes))
+
+    @classmethod
+    def load(cls, filename):
+        """Returns the restriction index stored in `filename`."""
+        with open(filename, "rt", encoding="utf8") as handle:
+            index = json.load(handle)
+        if index.get("version") != RESTRICTIONS_VERSION:
+            raise ValueError(
+                f"{filename!r} has index version {index.get('version')}, "
+                f"expected {RESTRICTIONS_VERSION}"
+            )
+        return cls(index)
+
+    def rows(self, cls):
+        """Returns the rows of the restrictions of `cls` (an IRI, prefLabel
+        or class ID) with property, filler and source IDs."""
+        return self.index["restrictions"][
+            cls if isinstance(cls, int) else self.ids[cls]
+        ]
+
+    def restrictions(self, cls):
+        """Returns the effective restrictions of `cls` as a list of
+        `Restriction` tuples with property, filler and source resolved."""
+        properties, fillers = self.index["properties"], self.index["fillers"]
+        return [
+            Restriction(
+                properties[prop], kind, fillers[filler], n, self.classes[source]
+            )
+            for prop, kind, filler, n, source in self.rows(cls)
+        ]
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        default=restrictions_path("magnetic-materials.ttl"),
+        help="Restriction index to write. Default: %(default)s",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        onto = get_snapshot_ontology(args.database, args.iri)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+    write_restrictions(restriction_index(onto), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
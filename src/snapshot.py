@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Access to the Owlready2 quadstore snapshot written by `build_onto.py`.
+
+The snapshot `magnetic-materials.sqlite3` contains MagMO together with
+the imported EMMO.  The reason, check and docs steps open it directly
+instead of parsing `magnetic-materials.ttl` and EMMO again.
+"""
+import os
+
+from ontopy import World
+
+from emmo_cache import mark_loaded
+
+# Default snapshot file and IRI of the ontology stored in it
+SNAPSHOT = "magnetic-materials.sqlite3"
+ONTOLOGY_IRI = "https://w3id.org/emmo/domain/magnetic-materials#"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing or does not contain the
+    requested ontology."""
+
+
+def open_snapshot(filename=SNAPSHOT):
+    """Opens quadstore snapshot `filename` and returns the world.
+
+    All ontologies stored in the snapshot are marked as loaded, such
+    that calling `load()` on them does not parse or fetch anything."""
+    if not os.path.exists(filename):
+        raise SnapshotError(
+            f"no such snapshot: {filename!r}.  Run `pixi run build` first."
+        )
+    world = World(filename=filename)
+    for onto in list(world.ontologies.values()):
+        mark_loaded(onto)
+    return world
+
+
+def get_snapshot_ontology(filename=SNAPSHOT, iri=ONTOLOGY_IRI):
+    """Returns ontology `iri` from quadstore snapshot `filename`."""
+    world = open_snapshot(filename)
+    if iri not in world.ontologies:
+        raise SnapshotError(
+            f"{iri!r} is not in {filename!r}.  Available ontologies:\n  "
+            + "\n  ".join(world.ontologies.keys())
+        )
+    return world.ontologies[iri]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Label, annotation and hierarchy indexes built from the quadstore.
+
+`Index` reads the prefLabels, types, named parents and restrictions of the
+entities in a world with a few queries on the owlready2 quadstore.  It is
+shared by the quick check and the indexes written next to the turtle file
+(units, lookup, closure, restrictions and dimensions).
+"""
+import collections
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL = "http://www.w3.org/2002/07/owl#"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+
+
+class Index:
+    """Label, annotation and hierarchy indexes of the entities in `world`.
+
+    Parameters
+    ----------
+    world : owlready2.World
+        World to index.
+    namespace : str
+        Namespace of the entities to check.
+    """
+
+    def __init__(self, world, namespace):
+        self.graph = graph = world.graph
+        self.namespace = namespace
+        self.storid = lambda iri: graph._abbreviate(iri, False)  # pylint: disable=W0212
+        self.iri = graph._unabbreviate  # pylint: disable=protected-access
+
+        # Entities in the namespace by type
+        self.types = collections.defaultdict(set)
+        for s, o in graph.execute(
+            "SELECT s, o FROM objs JOIN resources ON s=storid "
+            "WHERE p=? AND substr(iri, 1, ?)=?",
+            (self.storid(RDF_TYPE), len(namespace), namespace),
+        ):
+            self.types[self.iri(o)[len(OWL) :]].add(s)
+
+        # prefLabels of all entities and labels of all prefLabels
+        self.preflabels = collections.defaultdict(list)
+        self.labelled = collections.defaultdict(set)
+        for s, o, d in graph.execute(
+            "SELECT s, o, d FROM datas WHERE p=?",
+            (self.storid(SKOS + "prefLabel"),),
+        ):
+            self.preflabels[s].append((o, d))
+            self.labelled[o].add(s)
+
+        # Named parents and restrictions of all classes
+        self.parents = collections.defaultdict(set)
+        self.restrictions = collections.defaultdict(set)
+        for s, o in graph.execute(
+            "SELECT s, o FROM objs WHERE p IN (?, ?)",
+            (self.storid(RDFS + "subClassOf"), self.storid(OWL + "equivalentClass")),
+        ):
+            (self.parents if o > 0 else self.restrictions)[s].add(o)
+
+    def lookup(self, label):
+        """Returns the storid of the entity with prefLabel `label`, or
+        None."""
+        entities = self.labelled.get(label)
+        return min(entities) if entities else None
+
+    def values(self, s, prop):
+        """Returns the ``(value, lang)`` pairs of annotation or data
+        property `prop` (a storid) of `s`."""
+        if prop is None:
+            return []
+        return [
+            (o, d if isinstance(d, str) else "")
+            for o, d in self.graph.execute(
+                "SELECT o, d FROM datas WHERE s=? AND p=?", (s, prop)
+            )
+        ]
+
+    def ancestors(self, s):
+        """Returns the named ancestors of class `s`, including `s`."""
+        seen, pending = set(), [s]
+        while pending:
+            cls = pending.pop()
+            if cls not in seen:
+                seen.add(cls)
+                pending.extend(self.parents.get(cls, ()))
+        return seen
+
+    def restriction_values(self, s, prop):
+        """Returns the owl:hasValue values of the restrictions on
+        property `prop` among the restrictions of class `s`."""
+        on_property = self.storid(OWL + "onProperty")
+        has_value = self.storid(OWL + "hasValue")
+        values = []
+        for restriction in self.restrictions.get(s, ()):
+            if self.graph.execute(
+                "SELECT 1 FROM objs WHERE s=? AND p=? AND o=?",
+                (restriction, on_property, prop),
+            ).fetchone():
+                values.extend(value for value, _ in self.values(restriction, has_value))
+        return values
+
+    def label(self, s):
+        """Returns the first prefLabel of `s`, or its IRI."""
+        labels = self.preflabels.get(s)
+        return str(labels[0][0]) if labels else self.iri(s)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Effective units of the quantity classes of MagMO.
+
+The unit of a quantity is given by a `hasMeasurementUnit` (or another
+metrological reference) restriction on the quantity or on one of its
+ancestors.  It refers to a unit class with a `hasDimensionString`, like
+`EnergyDensityUnit`, or to a concrete unit with a UCUM code.  This module
+resolves, once per build, for every quantity class of MagMO and every EMMO
+quantity class MagMO refers to
+
+  - the dimension string and the exponents of the seven base quantities
+    (T, L, M, I, Θ, N, J),
+  - the coherent SI unit, its symbol and UCUM code,
+  - where the unit comes from: the class and property of the restriction
+    (``source``) and how the SI unit was found (``via``: the unit itself,
+    a subclass of the unit class, the only coherent SI unit with the same
+    dimension, or the UCUM code derived from the dimension).
+
+The result is written next to the turtle file as
+`magnetic-materials.units.json`:
+
+    {"version": 1,
+     "columns": ["label", "dimension", "vector", "unit", "unit_iri",
+                 "symbol", "ucum", "source", "via"],
+     "quantities": {IRI: [row, ...], ...},
+     "labels": {label: IRI, ...}}
+
+such that consumers get the unit of a quantity by IRI or label without
+loading the ontology.  The table is written by the build and the reason
+step; to write it for a snapshot run
+
+    python src/units.py --database magnetic-materials.sqlite3
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+
+from store_index import OWL, RDFS, Index
+from snapshot import ONTOLOGY_IRI, SNAPSHOT, SnapshotError, get_snapshot_ontology
+
+# Bump if the table format changes
+UNITS_VERSION = 1
+
+COLUMNS = (
+    "label",
+    "dimension",
+    "vector",
+    "unit",
+    "unit_iri",
+    "symbol",
+    "ucum",
+    "source",
+    "via",
+)
+
+# Base quantities in the order of the dimension string and their SI units
+# as UCUM codes
+BASE_QUANTITIES = ("T", "L", "M", "I", "Θ", "N", "J")
+BASE_UNITS = {"T": "s", "L": "m", "M": "kg", "I": "A", "Θ": "K", "N": "mol", "J": "cd"}
+
+# Order of the base units in derived UCUM codes, e.g. kg.m-1.s-2; units
+# with positive exponents come first, e.g. A.m-1
+UCUM_ORDER = ("M", "L", "T", "I", "Θ", "N", "J")
+
+# Labels of the EMMO classes of coherent SI units
+COHERENT = ("SIBaseUnit", "SICoherentDerivedUnit", "SICoherentUnit")
+
+Unit = collections.namedtuple("Unit", COLUMNS)
+
+
+def units_path(ttlfile):
+    """Returns the unit table belonging to turtle file `ttlfile`."""
+    return f"{os.path.splitext(ttlfile)[0]}.units.json"
+
+
+def parse_dimension(string):
+    """Returns the exponents of the base quantities in dimension string
+    `string`, e.g. ``"T-2 L-1 M+1 I0 Θ0 N0 J0"``, as a list of ints."""
+    exponents = {}
+    for part in string.split():
+        symbol = "Θ" if part[0] == "H" else part[0]
+        exponents[symbol] = int(part[1:])
+    return [exponents.get(symbol, 0) for symbol in BASE_QUANTITIES]
+
+
+def ucum_code(vector):
+    """Returns the UCUM code of the coherent SI unit of the dimension with
+    exponents `vector`, e.g. ``"kg.m-1.s-2"``."""
+    exponents = dict(zip(BASE_QUANTITIES, vector))
+    order = sorted(UCUM_ORDER, key=lambda symbol: exponents[symbol] < 0)
+    parts = []
+    for symbol in order:
+        exponent = exponents[symbol]
+        if exponent:
+            unit = BASE_UNITS[symbol]
+            parts.append(unit if exponent == 1 else f"{unit}{exponent}")
+    return ".".join(parts) or "1"
+
+
+class UnitIndex(Index):
+    """Index of the quantities, units and metrological references in
+    `world`.
+
+    Parameters
+    ----------
+    world : owlready2.World
+        World with MagMO and EMMO.
+    namespace : str
+        Namespace of MagMO.
+    """
+
+    def __init__(self, world, namespace):
+        super().__init__(world, namespace)
+        graph = self.graph
+        storid = self.storid
+
+        self.children = collections.defaultdict(set)
+        for s, parents in self.parents.items():
+            for parent in parents:
+                self.children[parent].add(s)
+
+        # Properties of metrological references, hasMeasurementUnit first
+        measurement_unit = self.lookup("hasMeasurementUnit")
+        reference = self.lookup("hasMetrologicalReference")
+        subproperties = collections.defaultdict(set)
+        for s, o in graph.execute(
+            "SELECT s, o FROM objs WHERE p=?", (storid(RDFS + "subPropertyOf"),)
+        ):
+            subproperties[o].add(s)
+        self.references = [measurement_unit] if measurement_unit else []
+        pending = [reference] if reference else []
+        while pending:
+            prop = pending.pop()
+            if prop not in self.references:
+                self.references.append(prop)
+            pending.extend(sorted(subproperties.get(prop, ())))
+
+        # owl:onProperty and the named filler of each restriction
+        fillers = (
+            storid(OWL + "someValuesFrom"),
+            storid(OWL + "allValuesFrom"),
+            storid(OWL + "hasValue"),
+        )
+        self.on_property = dict(
+            graph.execute(
+                "SELECT s, o FROM objs WHERE s<0 AND p=?",
+                (storid(OWL + "onProperty"),),
+            )
+        )
+        self.filler = {
+            s: o
+            for s, p, o in graph.execute("SELECT s, p, o FROM objs WHERE s<0")
+            if p in fillers and o > 0
+        }
+
+        self.ucum = self._annotation("ucumCode")
+        self.symbol = self._annotation("unitSymbol")
+        coherent = {self.lookup(label) for label in COHERENT} - {None}
+        self.coherent = {s for s in self.ucum if coherent & self.ancestors(s)}
+        self.dimension_string = self.lookup("hasDimensionString")
+        self.quantity = self.lookup("Quantity")
+
+    def _annotation(self, label):
+        """Returns a dict mapping subjects to the first value of annotation
+        `label`."""
+        prop = self.lookup(label)
+        if prop is None:
+            return {}
+        values = {}
+        for s, o in self.graph.execute(
+            "SELECT s, o FROM datas WHERE p=? ORDER BY o", (prop,)
+        ):
+            values.setdefault(s, o)
+        return values
+
+    def linearised(self, s):
+        """Returns `s` and its named ancestors, nearest first."""
+        order, seen, level = [], {s}, [s]
+        while level:
+            order.extend(level)
+            following = []
+            for cls in level:
+                for parent in sorted(self.parents.get(cls, ())):
+                    if parent not in seen:
+                        seen.add(parent)
+                        following.append(parent)
+            level = following
+        return order
+
+    def dimension(self, unit):
+        """Returns the nearest dimension string of `unit`, or None."""
+        for cls in self.linearised(unit):
+            values = self.restriction_values(cls, self.dimension_string)
+            if values:
+                return values[0]
+        return None
+
+    def measurement_unit(self, quantity):
+        """Returns a ``(unit, source)`` tuple with the unit referred to by
+        the nearest metrological reference of `quantity`, or
+        ``(None, None)``."""
+        for cls in self.linearised(quantity):
+            found = {}
+            for restriction in self.restrictions.get(cls, ()):
+                prop = self.on_property.get(restriction)
+                if prop in self.references and restriction in self.filler:
+                    found.setdefault(prop, []).append(self.filler[restriction])
+            for prop in self.references:
+                if prop in found:
+                    unit = min(found[prop], key=self.label)
+                    source = f"{self.label(cls)} {self.label(prop)} {self.label(unit)}"
+                    return unit, source
+        return None, None
+
+    def si_unit(self, unit, dimension, by_dimension):
+        """Returns a ``(unit, via)`` tuple with the coherent SI unit of unit
+        class `unit` with `dimension`, or ``(None, "dimension")``."""
+        if unit in self.coherent:
+            return unit, "unit"
+        seen, pending, found = set(), [unit], []
+        while pending:
+            cls = pending.pop()
+            for child in self.children.get(cls, ()):
+                if child not in seen:
+                    seen.add(child)
+                    pending.append(child)
+                    if child in self.coherent:
+                        found.append(child)
+        if found:
+            return min(found, key=self.label), "subclass"
+        if len(by_dimension.get(dimension, ())) == 1:
+            return by_dimension[dimension][0], "dimension"
+        return None, "derived"
+
+
+def unit_table(onto):
+    """Returns the unit table of the quantity classes of MagMO ontology
+    `onto` and the EMMO quantity classes it refers to."""
+    world = onto.world
+    index = UnitIndex(world, onto.base_iri)
+    graph = index.graph
+
+    # Quantities of MagMO and the named EMMO classes MagMO refers to,
+    # directly or through restrictions
+    referenced, pending = set(index.types["Class"]), []
+    for (o,) in graph.execute(
+        "SELECT DISTINCT o FROM objs WHERE c=?", (onto.graph.c,)
+    ):
+        pending.append(o)
+    while pending:
+        o = pending.pop()
+        if o > 0:
+            referenced.add(o)
+        elif o not in referenced:
+            referenced.add(o)
+            pending.extend(
+                obj for (obj,) in graph.execute("SELECT o FROM objs WHERE s=?", (o,))
+            )
+    quantities = sorted(
+        (
+            s
+            for s in referenced
+            if s > 0 and s != index.quantity and index.quantity in index.ancestors(s)
+        ),
+        key=lambda s: (index.label(s), s),
+    )
+
+    by_dimension = collections.defaultdict(list)
+    for unit in sorted(index.coherent, key=index.label):
+        dimension = index.dimension(unit)
+        if dimension:
+            by_dimension[dimension].append(unit)
+
+    rows, labels = {}, {}
+    for quantity in quantities:
+        unit_class, source = index.measurement_unit(quantity)
+        dimension = vector = si_unit = ucum = None
+        via = None
+        if unit_class is not None:
+            dimension = index.dimension(unit_class)
+            si_unit, via = index.si_unit(unit_class, dimension, by_dimension)
+        if si_unit is not None:
+            ucum = index.ucum.get(si_unit)
+        if dimension:
+            vector = parse_dimension(dimension)
+            if ucum is None:
+                ucum = ucum_code(vector)
+        label = index.label(quantity)
+        iri = index.iri(quantity)
+        rows[iri] = list(
+            Unit(
+                label,
+                dimension,
+                vector,
+                index.label(si_unit) if si_unit else None,
+                index.iri(si_unit) if si_unit else None,
+                index.symbol.get(si_unit),
+                ucum,
+                source,
+                via,
+            )
+        )
+        labels.setdefault(label, iri)
+    return {
+        "version": UNITS_VERSION,
+        "columns": list(COLUMNS),
+        "quantities": rows,
+        "labels": labels,
+    }
+
+
+def write_units(table, filename):
+    """Writes unit `table` to `filename`."""
+    tmpfile = f"{filename}.{os.getpid()}.tmp"
+    with open(tmpfile, "wt", encoding="utf8") as handle:
+        json.dump(table, handle, ensure_ascii=False, indent=1, sort_keys=True)
+        handle.write("\n")
+    os.replace(tmpfile, filename)
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--database",
+        "-d",
+        metavar="FILENAME",
+        default=SNAPSHOT,
+        help="Quadstore snapshot written by the build. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--iri",
+        default=ONTOLOGY_IRI,
+        help="IRI of the ontology. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        default=units_path("magnetic-materials.ttl"),
+        help="Unit table to write. Default: %(default)s",
+    )
+    args = parser.parse_args(args=argv)
+
+    try:
+        onto = get_snapshot_ontology(args.database, args.iri)
+    except SnapshotError as exc:
+        parser.error(str(exc))
+    table = unit_table(onto)
+    write_units(table, args.output)
+    print(f"{len(table['quantities'])} quantities", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
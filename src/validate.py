@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk validation of material records against the restrictions of MagMO.
+
+Records are checked against the effective cardinality restrictions of
+their class, e.g. that the `MagneticHysteresisProperties` of a magnet have
+exactly one `CoercivityHc`, without a DL reasoner.  The restrictions of
+each class are compiled once from the restriction index and the closure of
+the class hierarchy (`restrictions.py`, `closure.py`) into a list of checks
+with the set of classes that satisfy each filler, so checking a value is a
+set lookup.
+
+A record is a JSON object:
+
+    {"@id": "magnet-17",
+     "@type": "MagneticHysteresisProperties",
+     "hasProperty": [{"@type": "CoercivityHc", "value": 1.2e6},
+                     "Remanence"],
+     "SaturationMagnetization": 1.1e6}
+
+`@type` is the label or IRI of the class of the record.  Other keys are
+labels or IRIs of either
+
+  - a property: its values are nested records (checked themselves), labels
+    or IRIs of classes, or plain values of unknown class,
+  - a class: the key is a value of that class for any property, as in flat
+    records with one column per quantity.
+
+Other keys, e.g. ``value`` or ``unit``, are ignored.  Records that are not
+JSON objects or not valid JSON are reported as violations.  CSV files have one
+flat record per row, with ``@id`` and ``@type`` columns; cells of property
+columns list class labels separated by ``;`` and empty cells are left out.
+
+`exactly`, `min` and `max` restrictions count the values whose class is a
+subclass of the filler, `only` restrictions require all values of known
+class to be such a subclass.  `some` restrictions are only checked with
+`--existential`, since most records leave out units and other details.
+
+JSON Lines (``.jsonl``, ``.ndjson``) and CSV files are streamed in chunks
+through worker processes, with a bounded number of chunks in flight, so
+the memory does not depend on the size of the input.  ``.json`` files,
+with one record or a list of records, are read at once.  Violations are
+written as JSON Lines with the IRIs of the class, property and filler:
+
+    python src/validate.py records.jsonl magnets.csv --jobs 8
+"""
+import argparse
+import collections
+import concurrent.futures
+import csv
+import itertools
+import json
+import os
+import sys
+
+from closure import Closure, closure_path
+from restrictions import RestrictionIndex, restrictions_path
+
+OWL_THING = "http://www.w3.org/2002/07/owl#Thing"
+
+# Cardinality restriction types
+CARDINALITY = ("exactly", "min", "max")
+
+Violation = collections.namedtuple(
+    "Violation", "record path cls property type n filler found message"
+)
+
+_Check = collections.namedtuple("_Check", "property type n filler members")
+
+# Placeholder for an input record that cannot be read
+InvalidRecord = collections.namedtuple("InvalidRecord", "message")
+
+
+class Validator:
+    """Checks records against the effective restrictions of their class.
+
+    Parameters
+    ----------
+    index : RestrictionIndex
+        Effective restrictions of the classes.
+    closure : Closure
+        Closure of the class hierarchy with the same class IDs as `index`.
+    existential : bool
+        Whether to check `some` restrictions.
+    """
+
+    def __init__(self, index, closure, existential=False):
+        if list(index.classes) != closure.iris.tolist():
+            raise ValueError("restriction index and closure do not match")
+        self.index = index
+        self.closure = closure
+        self.types = {*CARDINALITY, "only"} | ({"some"} if existential else set())
+        self.properties = {}
+        data = index.index
+        for i, label in enumerate(data["property_labels"]):
+            self.properties.setdefault(label, i)
+        self.properties.update((iri, i) for i, iri in enumerate(data["properties"]))
+        self._members = {}
+        self._checks = {}
+
+    @classmethod
+    def load(cls, ttlfile="magnetic-materials.ttl", existential=False):
+        """Returns a validator for the indexes written next to
+        `ttlfile`."""
+        return cls(
+            RestrictionIndex.load(restrictions_path(ttlfile)),
+            Closure.load(closure_path(ttlfile)),
+            existential=existential,
+        )
+
+    def members(self, filler):
+        """Returns the set of class IDs satisfying `filler`, None for any
+        value, or False if the filler cannot be checked."""
+        key = json.dumps(filler, sort_keys=True)
+        if key not in self._members:
+            self._members[key] = self._resolve(filler)
+        return self._members[key]
+
+    def _resolve(self, filler):
+        if filler == OWL_THING:
+            return None
+        if isinstance(filler, str):
+            if filler not in self.closure.names:
+                return False
+            return frozenset(self.closure.descendants(filler).tolist())
+        if isinstance(filler, dict) and set(filler) & {"or", "and"}:
+            parts = [self._resolve(part) for part in next(iter(filler.values()))]
+            if any(part is False for part in parts):
+                return False
+            if "or" in filler:
+                if any(part is None for part in parts):
+                    return None
+                return frozenset().union(*parts)
+            # Unrestricted parts of an intersection do not restrict it
+            parts = [part for part in parts if part is not None]
+            return frozenset.intersection(*parts) if parts else None
+        return False
+
+    def checks(self, cls):
+        """Returns the compiled checks of class ID `cls`."""
+        if cls not in self._checks:
+            data = self.index.index
+            checks = []
+            for prop, kind, filler, n, _ in self.index.rows(cls):
+                if kind not in self.types or (kind == "min" and n == 0):
+                    continue
+                members = self.members(data["fillers"][filler])
+                if members is not False:
+                    checks.append(_Check(prop, kind, n, filler, members))
+            self._checks[cls] = checks
+        return self._checks[cls]
+
+    def classify(self, value):
+        """Returns the class ID of `value` (a nested record or a class
+        reference), or None."""
+        if isinstance(value, dict):
+            value = value.get("@type")
+        if isinstance(value, str):
+            return self.closure.names.get(value)
+        return None
+
+    def validate(self, record, ref="", path=""):
+        """Returns the violations of `record` and its nested records."""
+        violations = []
+        data = self.index.index
+        if isinstance(record, InvalidRecord) or not isinstance(record, dict):
+            message = (
+                record.message
+                if isinstance(record, InvalidRecord)
+                else f"not a JSON object: {json.dumps(record)[:80]}"
+            )
+            violations.append(
+                Violation(ref, path, None, None, None, None, None, None, message)
+            )
+            return violations
+        cls = self.classify(record)
+
+        def report(check, found, message):
+            violations.append(
+                Violation(
+                    ref,
+                    path,
+                    self.index.classes[cls] if cls is not None else None,
+                    None if check is None else data["properties"][check.property],
+                    None if check is None else check.type,
+                    None if check is None else check.n,
+                    None if check is None else data["fillers"][check.filler],
+                    found,
+                    message,
+                )
+            )
+
+        if cls is None:
+            report(None, None, f"unknown class {record.get('@type')!r}")
+            return violations
+
+        # Values by property, values of class keys apply to any property
+        values, anywhere = collections.defaultdict(list), []
+        for key, value in record.items():
+            if key.startswith("@"):
+                continue
+            if key in self.properties:
+                items = value if isinstance(value, list) else [value]
+                values[self.properties[key]].extend(items)
+                for i, item in enumerate(items):
+                    if isinstance(item, dict):
+                        violations.extend(
+                            self.validate(item, ref, f"{path}/{key}[{i}]")
+                        )
+            elif key in self.closure.names:
+                anywhere.append(key)
+
+        for check in self.checks(cls):
+            if check.type == "only":
+                # Values of class keys need not belong to this property
+                classes = [self.classify(v) for v in values.get(check.property, ())]
+                wrong = [
+                    c
+                    for c in classes
+                    if c is not None
+                    and check.members is not None
+                    and c not in check.members
+                ]
+                if wrong:
+                    report(check, len(wrong), "values outside of the filler")
+                continue
+            items = values.get(check.property, []) + anywhere
+            classes = [self.classify(item) for item in items]
+            if check.members is None:
+                found = len(items)
+            else:
+                found = sum(1 for c in classes if c in check.members)
+            if check.type == "some" and not found:
+                report(check, found, "no value")
+            elif check.type == "exactly" and found != check.n:
+                report(check, found, f"{found} values, expected exactly {check.n}")
+            elif check.type == "min" and found < check.n:
+                report(check, found, f"{found} values, expected at least {check.n}")
+            elif check.type == "max" and found > check.n:
+                report(check, found, f"{found} values, expected at most {check.n}")
+        return violations
+
+
+def _ref(record, default):
+    """Returns the `@id` of `record`, or `default`."""
+    return record.get("@id", default) if isinstance(record, dict) else default
+
+
+def read_records(filename):
+    """Yields ``(ref, record)`` tuples with the records in `filename`,
+    where `ref` is the file name with the line or row number or the
+    `@id` of the record.
+
+    Lines or files that are not valid JSON give an `InvalidRecord`."""
+    ext = os.path.splitext(filename)[1].lower()
+    with open(filename, "rt", encoding="utf8", newline="") as handle:
+        if ext == ".csv":
+            for number, row in enumerate(csv.DictReader(handle), start=2):
+                record = {}
+                for key, cell in row.items():
+                    if key is None or cell is None or not cell.strip():
+                        continue
+                    cell = cell.strip()
+                    record[key] = cell.split(";") if ";" in cell else cell
+                yield record.get("@id", f"{filename}:{number}"), record
+        elif ext in (".jsonl", ".ndjson"):
+            for number, line in enumerate(handle, start=1):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as exc:
+                        record = InvalidRecord(f"invalid JSON: {exc}")
+                    yield _ref(record, f"{filename}:{number}"), record
+        else:
+            try:
+                records = json.load(handle)
+            except json.JSONDecodeError as exc:
+                yield filename, InvalidRecord(f"invalid JSON: {exc}")
+                return
+            if not isinstance(records, list):
+                records = [records]
+            for number, record in enumerate(records):
+                yield _ref(record, f"{filename}[{number}]"), record
+
+
+_VALIDATOR = None
+
+
+def _init_worker(ttlfile, existential):
+    global _VALIDATOR  # pylint: disable=global-statement
+    _VALIDATOR = Validator.load(ttlfile, existential=existential)
+
+
+def _validate_chunk(chunk):
+    return [
+        violation
+        for ref, record in chunk
+        for violation in _VALIDATOR.validate(record, ref)
+    ]
+
+
+def validate_files(filenames, ttlfile, jobs=None, chunksize=500, existential=False):
+    """Yields the violations of the records in `filenames`, in input order.
+
+    The records are validated in chunks of `chunksize` records by `jobs`
+    worker processes (default: the number of CPUs).  At most two chunks per
+    worker are read ahead."""
+    jobs = jobs or os.cpu_count() or 1
+    records = itertools.chain.from_iterable(map(read_records, filenames))
+    chunks = iter(lambda: list(itertools.islice(records, chunksize)), [])
+    if jobs == 1:
+        _init_worker(ttlfile, existential)
+        for chunk in chunks:
+            yield from _validate_chunk(chunk)
+        return
+    with concurrent.futures.ProcessPoolExecutor(
+        jobs, initializer=_init_worker, initargs=(ttlfile, existential)
+    ) as executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_validate_chunk, chunk))
+            if len(pending) >= 2 * jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    """Main run function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "records",
+        nargs="+",
+        metavar="FILE",
+        help="JSON, JSON Lines or CSV files with records.",
+    )
+    parser.add_argument(
+        "--ontology",
+        metavar="FILE",
+        default="magnetic-materials.ttl",
+        help=(
+            "Turtle file next to which the build wrote the restriction index "
+            "and the closure. Default: %(default)s"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="Number of worker processes. Default: number of CPUs",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=500,
+        help="Records per chunk sent to a worker. Default: %(default)s",
+    )
+    parser.add_argument(
+        "--existential",
+        action="store_true",
+        help="Also check `some` restrictions.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        help="Write the violations to FILE instead of standard output.",
+    )
+    args = parser.parse_args(args=argv)
+
+    for filename in (restrictions_path(args.ontology), closure_path(args.ontology)):
+        if not os.path.exists(filename):
+            parser.error(f"no such index: {filename!r}.  Run `pixi run build` first.")
+
+    count = 0
+    with open(args.output or os.devnull, "wt", encoding="utf8") as output:
+        stream = output if args.output else sys.stdout
+        for violation in validate_files(
+            args.records,
+            args.ontology,
+            jobs=args.jobs,
+            chunksize=args.chunksize,
+            existential=args.existential,
+        ):
+            count += 1
+            stream.write(json.dumps(violation._asdict(), ensure_ascii=False))
+            stream.write("\n")
+    print(f"{count} violations", file=sys.stderr)
+    return 1 if count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""The modules in `src/` import each other as top-level modules."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Tests of the restriction index."""
+import owlready2
+
+from restrictions import restriction_index
+
+BASE_IRI = "http://example.org/test#"
+
+
+def equivalent_classes():
+    """Returns an ontology with ``B ≡ A``, ``C ⊑ B`` and a restriction on
+    `A`."""
+    world = owlready2.World()
+    onto = world.get_ontology(BASE_IRI)
+    with onto:
+
+        class D(owlready2.Thing):
+            pass
+
+        class hasPart(owlready2.ObjectProperty):  # pylint: disable=invalid-name
+            pass
+
+        class A(owlready2.Thing):
+            is_a = [owlready2.Thing, hasPart.some(D)]
+
+        class B(owlready2.Thing):
+            equivalent_to = [A]
+
+        class C(B):
+            pass
+
+    return onto
+
+
+def test_equivalent_classes():
+    """Equivalent named classes share their restrictions and pass them on
+    to their subclasses."""
+    index = restriction_index(equivalent_classes())
+    rows = dict(zip(index["classes"], index["restrictions"]))
+    assert index["properties"] == [BASE_IRI + "hasPart"]
+    assert index["fillers"] == [BASE_IRI + "D"]
+    for name in "ABC":
+        assert [row[:4] for row in rows[BASE_IRI + name]] == [[0, "some", 0, None]]
+        assert rows[BASE_IRI + name][0][4] == index["classes"].index(BASE_IRI + "A")